@@ -0,0 +1,48 @@
+import argparse
+import sys
+
+from src.benchmark.generators import PreferenceGenerator
+from src.benchmark.report import BenchmarkReport
+from src.benchmark.runner import BenchmarkRunner
+
+
+def main(argv: list[str]) -> int:
+    """
+    Runs the clustering benchmark from the command line, e.g.
+    `python -m src.benchmark --sizes 100,1000 --methods greedy,refine --output run.csv --compare baseline.csv`.
+    Args:
+        argv (list[str]): Command-line arguments.
+    Returns:
+        int: 1 if regressions were found against the baseline, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark", description="Clustering scaling benchmark.")
+    parser.add_argument("--sizes", default=",".join(map(str, BenchmarkRunner.SIZES)))
+    parser.add_argument("--methods", default=",".join(BenchmarkRunner.METHODS))
+    parser.add_argument("--generator", default="budget", choices=PreferenceGenerator.GENERATORS)
+    parser.add_argument("--group-size", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--output", help="write the results to this .csv or .json file")
+    parser.add_argument("--compare", help="baseline .csv or .json file to check for regressions")
+    parser.add_argument("--time-tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = BenchmarkRunner.run(
+        tuple(int(size) for size in args.sizes.split(",")), tuple(args.methods.split(",")), args.generator,
+        args.group_size, args.repeats, not args.no_memory, args.seed
+    )
+    for result in results:
+        print(result)
+    if args.output:
+        BenchmarkReport.write(results, args.output)
+    if args.compare:
+        regressions = BenchmarkReport.compare(BenchmarkReport.read(args.compare), results, args.time_tolerance)
+        for regression in regressions:
+            print(regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
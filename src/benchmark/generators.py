@@ -0,0 +1,151 @@
+from typing import Optional
+
+import numpy as np
+from src.domain.user import User
+
+
+class PreferenceGenerator:
+    """
+    Synthetic preference sets for benchmarks, reproducible from a seed.
+    "budget" mimics a real vote: every student splits a budget of points between a few random classmates.
+    "friends" does the same inside circles of friends, so the preference graph has a community structure
+    like a real class. "density" draws every (voter, classmate) pair independently, to control the density.
+    """
+
+    GENERATORS = ("budget", "friends", "density")
+
+    @staticmethod
+    def users(count: int) -> list[User]:
+        """
+        Creates anonymous students.
+        Args:
+            count (int): Number of students.
+        Returns:
+            list[User]: Students named student0, student1...
+        """
+        return [User(f"Student{i}", "Bench", f"student{i}", f"student{i}@example.com") for i in range(count)]
+
+    @staticmethod
+    def __split(rng: np.random.Generator, points: int, picks: int) -> list[int]:
+        """
+        Splits a budget between picks, each pick getting at least one point.
+        Args:
+            rng (np.random.Generator): Random generator.
+            points (int): Budget of points.
+            picks (int): Number of picks (at most points).
+        Returns:
+            list[int]: Points given to each pick.
+        """
+        return (rng.multinomial(points - picks, np.full(picks, 1 / picks)) + 1).tolist()
+
+    @staticmethod
+    def budget(count: int, points: int = 10, picks: int = 3, seed: Optional[int] = None) -> dict[User, dict[User, int]]:
+        """
+        Generates a vote where every student splits a budget of points between random classmates.
+        Args:
+            count (int): Number of students.
+            points (int): Budget of every student.
+            picks (int): Number of classmates picked by every student.
+            seed (Optional[int]): Seed of the generator.
+        Returns:
+            dict[User, dict[User, int]]: Points given by each student to the picked classmates.
+        """
+        rng = np.random.default_rng(seed)
+        users = PreferenceGenerator.users(count)
+        preferences = {user: {} for user in users}
+        picks = min(picks, points, count - 1)
+        if picks <= 0:
+            return preferences
+        for i, user in enumerate(users):
+            # Classmates are drawn among the count - 1 others, then shifted past the student's own index.
+            chosen = rng.choice(count - 1, picks, replace=False)
+            chosen[chosen >= i] += 1
+            for j, score in zip(chosen.tolist(), PreferenceGenerator.__split(rng, points, picks)):
+                preferences[user][users[j]] = score
+        return preferences
+
+    @staticmethod
+    def friends(
+        count: int,
+        circle_size: int = 5,
+        points: int = 10,
+        picks: int = 3,
+        loyalty: float = 0.8,
+        seed: Optional[int] = None
+    ) -> dict[User, dict[User, int]]:
+        """
+        Generates a vote of a class made of circles of friends.
+        Students are split into consecutive circles; each pick is a member of the student's own circle with
+        probability `loyalty`, and a random classmate otherwise.
+        Args:
+            count (int): Number of students.
+            circle_size (int): Number of students per circle of friends.
+            points (int): Budget of every student.
+            picks (int): Number of classmates picked by every student.
+            loyalty (float): Probability that a pick is in the student's circle.
+            seed (Optional[int]): Seed of the generator.
+        Returns:
+            dict[User, dict[User, int]]: Points given by each student to the picked classmates.
+        """
+        rng = np.random.default_rng(seed)
+        users = PreferenceGenerator.users(count)
+        preferences = {user: {} for user in users}
+        picks = min(picks, points, count - 1)
+        if picks <= 0:
+            return preferences
+        for i, user in enumerate(users):
+            start = i - i % circle_size
+            circle = [j for j in range(start, min(start + circle_size, count)) if j != i]
+            loyal = min(int(rng.binomial(picks, loyalty)), len(circle))
+            chosen = set(rng.choice(circle, loyal, replace=False).tolist()) if loyal else set()
+            while len(chosen) < picks:
+                j = int(rng.integers(count))
+                if j != i:
+                    chosen.add(j)
+            for j, score in zip(sorted(chosen), PreferenceGenerator.__split(rng, points, picks)):
+                preferences[user][users[j]] = score
+        return preferences
+
+    @staticmethod
+    def density(count: int, density: float, max_score: int = 5, seed: Optional[int] = None) -> dict[User, dict[User, int]]:
+        """
+        Generates a vote where every student scores each classmate with a given probability.
+        Args:
+            count (int): Number of students.
+            density (float): Probability that a student scores a given classmate.
+            max_score (int): Scores are drawn uniformly between 1 and max_score.
+            seed (Optional[int]): Seed of the generator.
+        Returns:
+            dict[User, dict[User, int]]: Scores given by each student to classmates.
+        """
+        rng = np.random.default_rng(seed)
+        users = PreferenceGenerator.users(count)
+        preferences = {}
+        for i, user in enumerate(users):
+            others = np.flatnonzero(rng.random(count) < density)
+            others = others[others != i]
+            scores = rng.integers(1, max_score + 1, len(others))
+            preferences[user] = {users[j]: score for j, score in zip(others.tolist(), scores.tolist())}
+        return preferences
+
+    @staticmethod
+    def create(name: str, count: int, seed: Optional[int] = None, **options) -> dict[User, dict[User, int]]:
+        """
+        Generates a vote with a generator chosen by name.
+        Args:
+            name (str): One of GENERATORS.
+            count (int): Number of students.
+            seed (Optional[int]): Seed of the generator.
+            **options: Other arguments of the generator (e.g. density for "density", which defaults to 0.01).
+        Returns:
+            dict[User, dict[User, int]]: The generated preferences.
+        Raises:
+            ValueError: If the generator is unknown.
+        """
+        if name == "budget":
+            return PreferenceGenerator.budget(count, seed=seed, **options)
+        if name == "friends":
+            return PreferenceGenerator.friends(count, seed=seed, **options)
+        if name == "density":
+            return PreferenceGenerator.density(count, options.pop("density", 0.01), seed=seed, **options)
+        raise ValueError(f"Unknown preference generator: {name}")
@@ -0,0 +1,114 @@
+import csv
+import json
+import os
+
+from src.benchmark.runner import BenchmarkResult
+
+
+class Regression:
+    """
+    A metric of a benchmark case that got worse between a baseline run and the current run.
+    """
+
+    def __init__(self, key: tuple[str, int, str], metric: str, baseline: float, current: float) -> None:
+        """
+        Initializes the regression.
+        Args:
+            key (tuple[str, int, str]): Generator, size and method of the case.
+            metric (str): "seconds", "peak_memory" or "score".
+            baseline (float): Value of the metric in the baseline run.
+            current (float): Value of the metric in the current run.
+        Returns:
+            None
+        """
+        self.key = key
+        self.metric = metric
+        self.baseline = baseline
+        self.current = current
+
+    def __repr__(self) -> str:
+        """
+        Returns a readable description of the regression.
+        Returns:
+            str: The description.
+        """
+        generator, size, method = self.key
+        return f"Regression({generator}/{size}/{method}: {self.metric} {self.baseline:g} -> {self.current:g})"
+
+
+class BenchmarkReport:
+    """
+    Writes benchmark results as CSV or JSON, reads them back and compares two runs.
+    """
+
+    FIELDS = ("generator", "size", "method", "seconds", "throughput", "score", "peak_memory")
+
+    @staticmethod
+    def write(results: list[BenchmarkResult], path: str) -> None:
+        """
+        Writes results to a file, as CSV if its name ends with .csv and as JSON otherwise.
+        Args:
+            results (list[BenchmarkResult]): The results.
+            path (str): Path of the file.
+        Returns:
+            None
+        """
+        rows = [result.as_row() for result in results]
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(file, fieldnames=BenchmarkReport.FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump(rows, file, indent=4)
+
+    @staticmethod
+    def read(path: str) -> list[BenchmarkResult]:
+        """
+        Reads results written by write.
+        Args:
+            path (str): Path of a .csv or .json file.
+        Returns:
+            list[BenchmarkResult]: The results.
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No benchmark results at {path}")
+        with open(path, encoding="utf-8", newline="") as file:
+            rows = list(csv.DictReader(file)) if path.endswith(".csv") else json.load(file)
+        return [BenchmarkResult.from_row(row) for row in rows]
+
+    @staticmethod
+    def compare(
+        baseline: list[BenchmarkResult],
+        current: list[BenchmarkResult],
+        time_tolerance: float = 0.2,
+        memory_tolerance: float = 0.1,
+        min_seconds: float = 0.01
+    ) -> list[Regression]:
+        """
+        Flags the cases of the current run that are slower, use more memory or score lower than in the baseline.
+        Cases are matched by generator, size and method; cases present in only one run are ignored.
+        Args:
+            baseline (list[BenchmarkResult]): Results of the reference run.
+            current (list[BenchmarkResult]): Results of the run to check.
+            time_tolerance (float): Relative slowdown tolerated before flagging the time.
+            memory_tolerance (float): Relative growth of the peak memory tolerated before flagging it.
+            min_seconds (float): Cases faster than this in both runs are too noisy to flag their time.
+        Returns:
+            list[Regression]: The regressions, in the order of the current results.
+        """
+        reference = {result.key: result for result in baseline}
+        regressions = []
+        for result in current:
+            before = reference.get(result.key)
+            if before is None:
+                continue
+            if result.seconds > max(before.seconds * (1 + time_tolerance), min_seconds):
+                regressions.append(Regression(result.key, "seconds", before.seconds, result.seconds))
+            if before.peak_memory and result.peak_memory > before.peak_memory * (1 + memory_tolerance):
+                regressions.append(Regression(result.key, "peak_memory", before.peak_memory, result.peak_memory))
+            if result.score < before.score:
+                regressions.append(Regression(result.key, "score", before.score, result.score))
+        return regressions
@@ -0,0 +1,199 @@
+import time
+from typing import Optional
+
+from src.benchmark.generators import PreferenceGenerator
+from src.clustering.clustering import Clustering
+from src.domain.user import User
+
+
+class BenchmarkResult:
+    """
+    Measurement of one clustering configuration on one generated vote.
+    """
+
+    def __init__(self, generator: str, size: int, method: str, seconds: float, score: int, peak_memory: int = 0) -> None:
+        """
+        Initializes the measurement.
+        Args:
+            generator (str): Name of the preference generator.
+            size (int): Number of students.
+            method (str): Name of the benchmarked configuration, among BenchmarkRunner.METHODS.
+            seconds (float): Best wall time of the clustering, in seconds.
+            score (int): Total affinity score of the groups.
+            peak_memory (int): Peak memory allocated by the clustering in bytes (0 when not measured).
+        Returns:
+            None
+        """
+        self.generator = generator
+        self.size = size
+        self.method = method
+        self.seconds = seconds
+        self.score = score
+        self.peak_memory = peak_memory
+
+    @property
+    def key(self) -> tuple[str, int, str]:
+        """
+        Returns the identity of the measured case, used to match the results of two runs.
+        Returns:
+            tuple[str, int, str]: Generator, size and method.
+        """
+        return self.generator, self.size, self.method
+
+    @property
+    def throughput(self) -> float:
+        """
+        Returns the number of students clustered per second.
+        Returns:
+            float: size / seconds (0 for an instantaneous run).
+        """
+        return self.size / self.seconds if self.seconds > 0 else 0.0
+
+    def as_row(self) -> dict:
+        """
+        Summarizes the result as a table row.
+        Returns:
+            dict: Generator, size, method, seconds, throughput, score and peak memory.
+        """
+        return {
+            "generator": self.generator,
+            "size": self.size,
+            "method": self.method,
+            "seconds": self.seconds,
+            "throughput": self.throughput,
+            "score": self.score,
+            "peak_memory": self.peak_memory,
+        }
+
+    @staticmethod
+    def from_row(row: dict) -> "BenchmarkResult":
+        """
+        Reads a result back from a table row, whose values may be strings (CSV).
+        Args:
+            row (dict): A row produced by as_row.
+        Returns:
+            BenchmarkResult: The result.
+        """
+        return BenchmarkResult(
+            row["generator"], int(row["size"]), row["method"], float(row["seconds"]), int(row["score"]),
+            int(row.get("peak_memory") or 0)
+        )
+
+    def __repr__(self) -> str:
+        """
+        Returns a readable summary of the result.
+        Returns:
+            str: The summary.
+        """
+        return (
+            f"BenchmarkResult({self.generator}, size={self.size}, method={self.method}, "
+            f"seconds={self.seconds:.3f}, score={self.score}, peak_memory={self.peak_memory})"
+        )
+
+
+class BenchmarkRunner:
+    """
+    Times the clustering configurations on generated votes of increasing size.
+    Every case is timed without instrumentation (best of `repeats` runs); the peak memory is measured by one
+    more run with stats, since tracing the memory slows the clustering down.
+    """
+
+    SIZES = (10, 100, 1000, 5000, 20000)
+    METHODS = {
+        "greedy": {},
+        "refine": {"refine": True, "refine_time_limit": 30.0},
+        "anneal": {"method": "anneal", "time_limit": 2.0},
+        "exact": {"method": "exact", "time_limit": 30.0},
+        "sparse": {"backend": "sparse"},
+        "packed": {"backend": "packed"},
+    }
+
+    @staticmethod
+    def supports(method: str, size: int) -> bool:
+        """
+        Checks whether a configuration can run on a vote of the given size.
+        Args:
+            method (str): Name of the configuration.
+            size (int): Number of students.
+        Returns:
+            bool: False for the exact method above Clustering.EXACT_MAX_USERS students.
+        """
+        return method != "exact" or size <= Clustering.EXACT_MAX_USERS
+
+    @staticmethod
+    def measure(
+        preferences: dict[User, dict[User, int]],
+        method: str,
+        group_size: int = 4,
+        repeats: int = 1,
+        memory: bool = True,
+        seed: Optional[int] = 0
+    ) -> tuple[float, int, int]:
+        """
+        Times one configuration on one vote.
+        Args:
+            preferences (dict[User, dict[User, int]]): The vote.
+            method (str): Name of the configuration, among METHODS.
+            group_size (int): Desired number of students per group.
+            repeats (int): Number of timed runs; the fastest one is kept.
+            memory (bool): Whether to measure the peak memory with an extra run.
+            seed (Optional[int]): Seed of the randomized methods.
+        Returns:
+            tuple[float, int, int]: Best wall time in seconds, score and peak memory in bytes (0 if not measured).
+        Raises:
+            ValueError: If the configuration is unknown.
+        """
+        if method not in BenchmarkRunner.METHODS:
+            raise ValueError(f"Unknown benchmark method: {method}")
+        options = BenchmarkRunner.METHODS[method]
+        best, score = float("inf"), 0
+        for _ in range(max(repeats, 1)):
+            start = time.perf_counter()
+            _, score = Clustering.cluster(preferences, group_size, seed=seed, **options)
+            best = min(best, time.perf_counter() - start)
+        peak_memory = 0
+        if memory:
+            *_, stats = Clustering.cluster(preferences, group_size, seed=seed, stats=True, **options)
+            peak_memory = stats.peak_memory
+        return best, score, peak_memory
+
+    @staticmethod
+    def run(
+        sizes: tuple[int, ...] = SIZES,
+        methods: tuple[str, ...] = tuple(METHODS),
+        generator: str = "budget",
+        group_size: int = 4,
+        repeats: int = 1,
+        memory: bool = True,
+        seed: int = 0
+    ) -> list[BenchmarkResult]:
+        """
+        Benchmarks every configuration on a generated vote of every size.
+        Configurations that do not support a size are skipped.
+        Args:
+            sizes (tuple[int, ...]): Numbers of students.
+            methods (tuple[str, ...]): Names of the configurations, among METHODS.
+            generator (str): Name of the preference generator, among PreferenceGenerator.GENERATORS.
+            group_size (int): Desired number of students per group.
+            repeats (int): Number of timed runs per case.
+            memory (bool): Whether to measure the peak memory of every case.
+            seed (int): Seed of the generator and of the randomized methods.
+        Returns:
+            list[BenchmarkResult]: One result per case, by size then method.
+        Raises:
+            ValueError: If a configuration or the generator is unknown.
+        """
+        unknown = [method for method in methods if method not in BenchmarkRunner.METHODS]
+        if unknown:
+            raise ValueError(f"Unknown benchmark method: {unknown[0]}")
+        results = []
+        for size in sizes:
+            preferences = PreferenceGenerator.create(generator, size, seed=seed)
+            for method in methods:
+                if not BenchmarkRunner.supports(method, size):
+                    continue
+                seconds, score, peak_memory = BenchmarkRunner.measure(
+                    preferences, method, group_size, repeats, memory, seed
+                )
+                results.append(BenchmarkResult(generator, size, method, seconds, score, peak_memory))
+        return results
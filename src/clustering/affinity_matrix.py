@@ -0,0 +1,146 @@
+from typing import Optional
+
+import numpy as np
+from src.clustering.packed_affinity import PackedAffinity
+
+
+class AffinityMatrix:
+    """
+    Persistent affinity matrix of a vote, maintained from preference submissions.
+    Usernames are interned to row indices on first sight. The directed scores are kept sparsely, as one
+    dict of column index to points per row, so memory grows with the number of preferences instead of the
+    square of the class size, and a submission replaces the row of its author in O(row length).
+    Clustering reads the scores as COO triplets, built in O(nnz) and kept until the next submission; the
+    symmetrized dense matrix is only derived on demand.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty matrix.
+        Returns:
+            None
+        """
+        self.usernames: list[str] = []
+        self.__index: dict[str, int] = {}
+        self.__rows: list[dict[int, int]] = []
+        self.__triplets: Optional[tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def from_preferences(
+        preferences: dict[str, dict[str, int]],
+        usernames: Optional[list[str]] = None
+    ) -> "AffinityMatrix":
+        """
+        Builds the matrix of a vote from its stored preferences.
+        Args:
+            preferences (dict[str, dict[str, int]]): Points given by each username to other usernames.
+            usernames (Optional[list[str]]): Users to intern first (e.g. the eligible students), so that
+                students who have not voted yet are part of the matrix.
+        Returns:
+            AffinityMatrix: The matrix.
+        """
+        matrix = AffinityMatrix()
+        for username in list(usernames or []) + list(preferences):
+            matrix.intern(username)
+        for username, points in preferences.items():
+            matrix.submit(username, points)
+        return matrix
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the number of interned users.
+        Returns:
+            int: Number of rows of the matrix.
+        """
+        return len(self.usernames)
+
+    def index(self, username: str) -> Optional[int]:
+        """
+        Returns the row of a user.
+        Args:
+            username (str): The username.
+        Returns:
+            Optional[int]: The row index, or None if the user is unknown.
+        """
+        return self.__index.get(username)
+
+    def intern(self, username: str) -> int:
+        """
+        Returns the row of a user, adding the user (with an empty row) if needed.
+        Args:
+            username (str): The username.
+        Returns:
+            int: The row index.
+        """
+        index = self.__index.get(username)
+        if index is None:
+            index = len(self.usernames)
+            self.__index[username] = index
+            self.usernames.append(username)
+            self.__rows.append({})
+        return index
+
+    def submit(self, username: str, preferences: dict[str, int]) -> None:
+        """
+        Replaces the preferences of a user.
+        Points given to oneself are ignored; unknown usernames are interned.
+        Args:
+            username (str): Author of the submission.
+            preferences (dict[str, int]): Points given to other usernames.
+        Returns:
+            None
+        """
+        i = self.intern(username)
+        row = {}
+        for other, points in preferences.items():
+            if other != username:
+                j = self.intern(other)
+                if points:
+                    row[j] = points
+        self.__rows[i] = row
+        self.__triplets = None
+
+    def preferences_of(self, username: str) -> dict[str, int]:
+        """
+        Returns the current preferences of a user.
+        Args:
+            username (str): The username.
+        Returns:
+            dict[str, int]: Points given to other usernames (empty for unknown users).
+        """
+        i = self.__index.get(username)
+        if i is None:
+            return {}
+        return {self.usernames[j]: points for j, points in sorted(self.__rows[i].items())}
+
+    def triplets(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Lists the non-zero directed scores in COO form, row by row and by ascending column within a row.
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The row indices, column indices and scores (read-only
+                arrays shared until the next submission).
+        """
+        if self.__triplets is None:
+            entries = [(i, j, points) for i, row in enumerate(self.__rows) for j, points in sorted(row.items())]
+            rows = np.array([entry[0] for entry in entries], dtype=np.intp)
+            cols = np.array([entry[1] for entry in entries], dtype=np.intp)
+            scores = np.array([entry[2] for entry in entries], dtype=np.int64)
+            for array in (rows, cols, scores):
+                array.flags.writeable = False
+            self.__triplets = rows, cols, scores
+        return self.__triplets
+
+    def symmetric(self) -> np.ndarray:
+        """
+        Derives the dense symmetrized affinity matrix (mutual scores, zero diagonal) from the directed scores.
+        It uses the smallest integer dtype that holds twice the mutual scores, as the dense clustering backend.
+        Returns:
+            np.ndarray: A new size x size matrix.
+        """
+        rows, cols, scores = self.triplets()
+        bound = 2 * int(np.abs(scores).max(initial=0))
+        sym = np.zeros((self.size, self.size), dtype=PackedAffinity.compact_dtype(bound))
+        sym[rows, cols] = scores
+        sym[cols, rows] += scores.astype(sym.dtype)
+        return sym
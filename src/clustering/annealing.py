@@ -0,0 +1,254 @@
+import math
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from src.clustering.cancellation import CancellationToken
+from src.clustering.constraints import Constraints
+from src.clustering.objectives import Objective
+
+
+class SimulatedAnnealing:
+    """
+    Anytime simulated annealing over balanced partitions.
+    The search only swaps users between groups, so the group sizes of the initial partition
+    (normally the greedy result built from the balanced group sizes) are preserved.
+    Candidate swaps are drawn and scored in vectorized batches, and the temperature decreases
+    geometrically with the elapsed fraction of the time budget.
+    The best partition found so far can be read at any time, including from another thread.
+    With an Objective, candidates are scored one by one with the objective's own delta, since the value of a
+    swap may depend on the rest of the partition (e.g. on the worst-off group). With Constraints, swaps of
+    locked (must-linked) users and swaps creating a cannot-link pair are rejected before they are scored.
+    """
+
+    BATCH_SIZE = 256
+    FINAL_TEMPERATURE_RATIO = 1e-3
+
+    def __init__(
+        self,
+        sym: np.ndarray,
+        groups: list[list[int]],
+        seed: Optional[int | np.random.Generator] = None,
+        objective: Optional[Objective] = None,
+        constraints: Optional[Constraints] = None
+    ) -> None:
+        """
+        Initializes the search from an existing partition.
+        Args:
+            sym (np.ndarray): The symmetrized affinity matrix (zero diagonal).
+            groups (list[list[int]]): Initial groups given as lists of user indices.
+            seed (Optional[int | np.random.Generator]): Seed or generator, for reproducible runs.
+            objective (Optional[Objective]): Objective to maximize instead of the total score of sym.
+            constraints (Optional[Constraints]): Constraints satisfied by the groups, which every swap keeps.
+        Returns:
+            None
+        """
+        self.sym = sym
+        self.objective = objective
+        self.constraints = constraints
+        self.rng = np.random.default_rng(seed)
+        self.labels = np.zeros(len(sym), dtype=np.intp)
+        width = max((len(group) for group in groups), default=0)
+        self.members = np.full((len(groups), width), -1, dtype=np.intp)
+        self.slot = np.zeros(len(sym), dtype=np.intp)
+        for label, group in enumerate(groups):
+            self.labels[group] = label
+            self.members[label, :len(group)] = group
+            self.slot[group] = np.arange(len(group))
+
+        if objective is not None:
+            objective.bind(groups)
+            self.score = objective.evaluate(groups)
+        else:
+            self.score = sum(int(sym[np.ix_(group, group)].sum()) for group in groups) // 2
+        self.__energy = 0.0
+        self.__best_energy = 0.0
+        self._lock = threading.Lock()
+        self._best_groups = [list(group) for group in groups]
+        self._best_score = self.score
+
+    def best(self) -> tuple[list[list[int]], int]:
+        """
+        Returns the best partition found so far.
+        Returns:
+            tuple[list[list[int]], int]: Groups of user indices and their total affinity score
+                (or the value of the objective).
+        """
+        with self._lock:
+            return [list(group) for group in self._best_groups], self._best_score
+
+    def __group_sums(self, users: np.ndarray, groups: np.ndarray) -> np.ndarray:
+        """
+        Computes, for each k, the total mutual score between users[k] and the members of groups[k].
+        Args:
+            users (np.ndarray): Indices of users.
+            groups (np.ndarray): Labels of groups, same length as users.
+        Returns:
+            np.ndarray: The sums, one per (user, group) pair.
+        """
+        members = self.members[groups]
+        values = self.sym[users[:, None], np.maximum(members, 0)]
+        return np.where(members >= 0, values, 0).sum(axis=1)
+
+    def __swap_deltas(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Scores a batch of candidate swaps between users a[k] and b[k] (in different groups).
+        The change of score is S[b, A] + S[a, B] - S[a, A] - S[b, B] - 2 S[a, b].
+        Args:
+            a (np.ndarray): Indices of the first users.
+            b (np.ndarray): Indices of the second users.
+        Returns:
+            np.ndarray: The change of total score of each swap.
+        """
+        group_a, group_b = self.labels[a], self.labels[b]
+        return (
+            self.__group_sums(b, group_a) + self.__group_sums(a, group_b)
+            - self.__group_sums(a, group_a) - self.__group_sums(b, group_b)
+            - 2 * self.sym[a, b]
+        )
+
+    def __feasible(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Checks a batch of candidate swaps against the constraints with lookups of the forbidden pairs.
+        Args:
+            a (np.ndarray): Indices of the first users.
+            b (np.ndarray): Indices of the second users (in a different group).
+        Returns:
+            np.ndarray: Boolean mask of the swaps keeping the constraints satisfied.
+        """
+        forbidden, feasible = self.constraints.forbidden, ~(self.constraints.locked[a] | self.constraints.locked[b])
+        for joining, leaving in ((a, b), (b, a)):
+            members = self.members[self.labels[leaving]]
+            present = (members >= 0) & (members != leaving[:, None])
+            feasible &= ~(forbidden(joining[:, None], np.maximum(members, 0)) & present).any(axis=1)
+        return feasible
+
+    def __apply_swap(self, a: int, b: int) -> None:
+        """
+        Exchanges two users between their groups.
+        Args:
+            a (int): Index of the first user.
+            b (int): Index of the second user.
+        Returns:
+            None
+        """
+        group_a, group_b = self.labels[a], self.labels[b]
+        slot_a, slot_b = self.slot[a], self.slot[b]
+        self.members[group_a, slot_a], self.members[group_b, slot_b] = b, a
+        self.labels[a], self.labels[b] = group_b, group_a
+        self.slot[a], self.slot[b] = slot_b, slot_a
+
+    def __record_best(self) -> None:
+        """
+        Stores the current partition as the best one.
+        Returns:
+            None
+        """
+        groups = [[int(u) for u in row if u >= 0] for row in self.members]
+        if self.objective is not None:
+            self.score = self.objective.evaluate(groups)
+        with self._lock:
+            self._best_groups, self._best_score = groups, self.score
+
+    def __anneal_objective(self, a: np.ndarray, b: np.ndarray, temperature: float) -> None:
+        """
+        Examines a batch of candidate swaps one after the other with the objective.
+        Every delta is computed on the current partition, so accepted swaps are applied immediately.
+        Args:
+            a (np.ndarray): Indices of the first users (in a different group than b).
+            b (np.ndarray): Indices of the second users.
+            temperature (float): Current temperature.
+        Returns:
+            None
+        """
+        for i, j, draw in zip(a.tolist(), b.tolist(), self.rng.random(len(a)).tolist()):
+            if self.constraints is not None and not self.__feasible(np.array([i]), np.array([j]))[0]:
+                continue
+            delta = self.objective.swap_delta(i, j)
+            if delta <= 0 and draw >= math.exp(max(delta / temperature, -700.0)):
+                continue
+            self.objective.swap(i, j)
+            self.__apply_swap(i, j)
+            self.__energy += delta
+            if self.__energy > self.__best_energy:
+                self.__best_energy = self.__energy
+                self.__record_best()
+
+    def __initial_temperature(self) -> float:
+        """
+        Estimates a starting temperature from the magnitude of the mutual scores, or of the objective's deltas
+        over a sample of swaps.
+        Returns:
+            float: The initial temperature.
+        """
+        if self.objective is not None:
+            a = self.rng.integers(0, len(self.sym), self.BATCH_SIZE)
+            b = self.rng.integers(0, len(self.sym), self.BATCH_SIZE)
+            deltas = np.abs([
+                self.objective.swap_delta(i, j) for i, j in zip(a.tolist(), b.tolist()) if self.labels[i] != self.labels[j]
+            ])
+            positive = deltas[deltas > 0]
+        else:
+            positive = self.sym[self.sym > 0]
+        return float(positive.mean()) if len(positive) else 1.0
+
+    def run(
+        self,
+        time_limit: float = 2.0,
+        cancel: Optional[CancellationToken] = None,
+        max_iterations: Optional[int] = None
+    ) -> tuple[list[list[int]], int]:
+        """
+        Anneals until the time budget, the iteration budget or a cancellation request is reached.
+        Args:
+            time_limit (float): Wall-clock budget in seconds.
+            cancel (Optional[CancellationToken]): Token checked between batches.
+            max_iterations (Optional[int]): Maximum number of candidate batches.
+        Returns:
+            tuple[list[list[int]], int]: The best groups found and their total affinity score
+                (or the value of the objective).
+        """
+        size = len(self.sym)
+        if len(self.members) < 2 or size < 2:
+            return self.best()
+
+        start = time.perf_counter()
+        initial_temperature = self.__initial_temperature()
+        iteration = 0
+
+        while cancel is None or not cancel.cancelled:
+            progress = (time.perf_counter() - start) / time_limit if time_limit > 0 else 1.0
+            if max_iterations is not None:
+                progress = max(progress, iteration / max_iterations)
+            if progress >= 1.0:
+                break
+            temperature = initial_temperature * self.FINAL_TEMPERATURE_RATIO ** progress
+            iteration += 1
+
+            a = self.rng.integers(0, size, self.BATCH_SIZE)
+            b = self.rng.integers(0, size, self.BATCH_SIZE)
+            valid = self.labels[a] != self.labels[b]
+            a, b = a[valid], b[valid]
+            if self.constraints is not None and self.objective is None:
+                feasible = self.__feasible(a, b)
+                a, b = a[feasible], b[feasible]
+            if self.objective is not None:
+                self.__anneal_objective(a, b, temperature)
+                continue
+            deltas = self.__swap_deltas(a, b)
+            with np.errstate(over="ignore"):
+                accepted = (deltas > 0) | (self.rng.random(len(deltas)) < np.exp(deltas / temperature))
+
+            touched = set()
+            for k in np.flatnonzero(accepted).tolist():
+                group_a, group_b = int(self.labels[a[k]]), int(self.labels[b[k]])
+                if group_a in touched or group_b in touched:
+                    continue
+                touched |= {group_a, group_b}
+                self.__apply_swap(int(a[k]), int(b[k]))
+                self.score += int(deltas[k])
+                if self.score > self._best_score:
+                    self.__record_best()
+
+        return self.best()
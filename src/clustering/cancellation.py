@@ -0,0 +1,33 @@
+import threading
+
+
+class CancellationToken:
+    """
+    Thread-safe flag used to ask a long-running clustering engine to stop early.
+    Engines poll `cancelled` regularly and return the best result found so far once it is set.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes a token that is not cancelled.
+        Returns:
+            None
+        """
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Requests cancellation.
+        Returns:
+            None
+        """
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Tells whether cancellation was requested.
+        Returns:
+            bool: True once cancel() has been called.
+        """
+        return self._event.is_set()
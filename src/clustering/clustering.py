@@ -1,4 +1,26 @@
+import heapq
+from collections import Counter
+import time
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Optional
+
 import numpy as np
+from src.clustering.affinity_matrix import AffinityMatrix
+from src.clustering.annealing import SimulatedAnnealing
+from src.clustering.cancellation import CancellationToken
+from src.clustering.components import ComponentDecomposition
+from src.clustering.constraints import Constraints
+from src.clustering.exact import ExactSolver, OptimalityProof
+from src.clustering.local_search import LocalSearch
+from src.clustering.matching import PairMatching
+from src.clustering.multi_start import MultiStart
+from src.clustering.objectives import Objective, Objectives, PairwiseObjective
+from src.clustering.packed_affinity import PackedAffinity
+from src.clustering.result_cache import ResultCache
+from src.clustering.sparse_affinity import SparseAffinity
+from src.clustering.stats import ClusterStats
+from src.clustering.sweep import SweepResult
 from src.domain.user import User
 
 
@@ -6,8 +28,56 @@ class Clustering:
     """
     Clustering class to handle user clustering based on weighted preferences.
     Each user assigns a numeric score to other users, indicating preference strength.
+    Three backends are available: a dense affinity matrix, a sparse CSR graph (SparseAffinity)
+    whose cost is proportional to the number of non-zero preferences, and a packed upper triangle
+    (PackedAffinity) that halves the memory of the dense matrix. Dense matrices use the smallest safe dtype.
     """
 
+    BACKENDS = ("auto", "dense", "sparse", "packed")
+    METHODS = ("greedy", "anneal", "exact")
+    SPARSE_DENSITY_THRESHOLD = 0.05
+    PERTURBATION = 0.05
+    ANNEAL_TIME_LIMIT = 2.0
+    EXACT_MAX_USERS = 24
+    EXACT_TIME_LIMIT = 2.0
+    MATCHING_MAX_USERS = 2000
+    MATCHING_TIME_LIMIT = 2.0
+    REPAIR_NEIGHBORS = 4
+
+    @staticmethod
+    def __collect_preference_triplets(
+        preferences: dict[User, dict[User, int]]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[User]]:
+        """
+        Flattens weighted user preferences into COO-style (row, col, score) arrays.
+        Users are mapped to their row index through a dictionary, so each preference is resolved in O(1).
+        Preferences towards users that are not keys of `preferences` are ignored.
+        Args:
+            preferences (dict[User, dict[User, int]]): User preference weights toward others.
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, list[User]]:
+                The row indices, column indices and scores of every preference,
+                and the list of users giving the meaning of each index.
+        """
+        users = list(preferences.keys())
+        index = {user: i for i, user in enumerate(users)}
+        rows, cols, scores = [], [], []
+
+        for i, user in enumerate(users):
+            for preferred, score in preferences.get(user, {}).items():
+                j = index.get(preferred)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+                    scores.append(score)
+
+        return (
+            np.array(rows, dtype=np.intp),
+            np.array(cols, dtype=np.intp),
+            np.array(scores, dtype=int),
+            users,
+        )
+
     @staticmethod
     def __build_affinity_matrix(preferences: dict[User, dict[User, int]]) -> tuple[np.ndarray, list[User]]:
         """
@@ -21,18 +91,99 @@ class Clustering:
             tuple[np.ndarray, list[User]]: 
                 A square affinity matrix and the corresponding list of users (row/column indices).
         """
-        users = list(preferences.keys())
-        size = len(users)
-        matrix = np.zeros((size, size), dtype=int)
+        rows, cols, scores, users = Clustering.__collect_preference_triplets(preferences)
+        return Clustering.__matrix_from_triplets(len(users), rows, cols, scores), users
 
-        for i, user in enumerate(users):
-            prefs = preferences.get(user, {})
-            for preferred, score in prefs.items():
-                if preferred in users:
-                    j = users.index(preferred)
-                    matrix[i][j] = score
+    @staticmethod
+    def __matrix_from_triplets(size: int, rows: np.ndarray, cols: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """
+        Scatters COO-style preference arrays into a dense affinity matrix.
+        The matrix uses the smallest integer dtype that also holds its symmetrized sums
+        (int8 for the usual point values) instead of int64.
+        Args:
+            size (int): Number of users.
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+        Returns:
+            np.ndarray: The size x size affinity matrix.
+        """
+        bound = 2 * int(np.abs(scores).max(initial=0))
+        matrix = np.zeros((size, size), dtype=PackedAffinity.compact_dtype(bound))
+        matrix[rows, cols] = scores
+        return matrix
+
+    @staticmethod
+    def __select_backend(size: int, scores: np.ndarray, backend: str, density_threshold: float) -> str:
+        """
+        Resolves the backend to use for a clustering run.
+        Args:
+            size (int): Number of users.
+            scores (np.ndarray): Scores of every collected preference.
+            backend (str): Requested backend ("auto", "dense", "sparse" or "packed").
+            density_threshold (float): Density (non-zero preferences / size²) at or below which
+                "auto" selects the sparse backend; "auto" never selects the packed backend.
+        Returns:
+            str: "dense", "sparse" or "packed".
+        Raises:
+            ValueError: If the backend is unknown.
+        """
+        if backend not in Clustering.BACKENDS:
+            raise ValueError(f"Unknown clustering backend: {backend}")
+        if backend != "auto":
+            return backend
+        if size == 0:
+            return "dense"
+        density = np.count_nonzero(scores) / (size * size)
+        return "sparse" if density <= density_threshold else "dense"
 
-        return matrix, users
+    @staticmethod
+    def __collect_inputs(
+        preferences: dict[User, dict[User, int]] | AffinityMatrix
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, list]:
+        """
+        Lists the preferences in COO form, whether they come as nested dicts or as a maintained matrix.
+        Args:
+            preferences (dict[User, dict[User, int]] | AffinityMatrix): The preferences.
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, list]: The row indices, column indices and scores,
+                and the users (or usernames) giving the meaning of each index.
+        """
+        if isinstance(preferences, AffinityMatrix):
+            rows, cols, scores = preferences.triplets()
+            return rows, cols, scores, list(preferences.usernames)
+        return Clustering.__collect_preference_triplets(preferences)
+
+    @staticmethod
+    def __build_affinity(
+        preferences: dict[User, dict[User, int]] | AffinityMatrix,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        scores: np.ndarray,
+        backend: str,
+        density_threshold: float
+    ) -> np.ndarray | SparseAffinity | PackedAffinity:
+        """
+        Builds the symmetrized affinities with the selected backend.
+        Args:
+            preferences (dict[User, dict[User, int]] | AffinityMatrix): The preferences.
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+            backend (str): "dense", "sparse", "packed" or "auto".
+            density_threshold (float): Density threshold used by the "auto" backend.
+        Returns:
+            np.ndarray | SparseAffinity | PackedAffinity: The symmetrized affinity matrix or graph.
+        Raises:
+            ValueError: If the backend is unknown.
+        """
+        size = preferences.size if isinstance(preferences, AffinityMatrix) else len(preferences)
+        selected = Clustering.__select_backend(size, scores, backend, density_threshold)
+        if selected == "sparse":
+            return SparseAffinity.from_triplets(size, rows, cols, scores)
+        if selected == "packed":
+            return PackedAffinity.from_triplets(size, rows, cols, scores)
+        return Clustering.__symmetrize(Clustering.__matrix_from_triplets(size, rows, cols, scores))
 
     @staticmethod
     def __score_group(group_indices: list[int], matrix: np.ndarray) -> int:
@@ -44,14 +195,21 @@ class Clustering:
         Returns:
             int: Total mutual affinity score within the group.
         """
-        score = 0
-        used_pairs = set()
-        for i in group_indices:
-            for j in group_indices:
-                if i != j and (j, i) not in used_pairs:
-                    score += matrix[i][j] + matrix[j][i]
-                    used_pairs.add((i, j))
-        return int(score)
+        block = matrix[np.ix_(group_indices, group_indices)]
+        return int(block.sum() - np.trace(block))
+
+    @staticmethod
+    def __exceeded(start: float, *budgets: Optional[float]) -> bool:
+        """
+        Tells whether a run may have been cut short by one of its wall-clock budgets.
+        Args:
+            start (float): time.perf_counter() at the start of the run.
+            *budgets (Optional[float]): Budgets of the run in seconds; None for no limit.
+        Returns:
+            bool: True if the run lasted at least as long as its smallest budget.
+        """
+        limits = [budget for budget in budgets if budget is not None]
+        return bool(limits) and time.perf_counter() - start >= min(limits)
 
     @staticmethod
     def __compute_balanced_group_sizes(total: int, group_size: int) -> list[int]:
@@ -72,48 +230,71 @@ class Clustering:
         raise ValueError("Impossible to distribute users fairly without 1-sized group.")
 
     @staticmethod
-    def __compute_affinity_score(i: int, ungrouped: set[int], matrix: np.ndarray) -> int:
+    def __symmetrize(matrix: np.ndarray) -> np.ndarray:
         """
-        Computes how well a user connects (via preference scores) to the ungrouped population.
+        Builds the mutual score matrix used by the greedy algorithm.
+        Element (i, j) is matrix[i][j] + matrix[j][i]; the diagonal is zeroed so self-preferences never count.
         Args:
-            i (int): Index of the user.
-            ungrouped (set[int]): Indices of ungrouped users.
             matrix (np.ndarray): The affinity matrix.
         Returns:
-            int: Total bidirectional affinity score with ungrouped users.
+            np.ndarray: The symmetrized affinity matrix.
+        """
+        sym = matrix + matrix.T
+        np.fill_diagonal(sym, 0)
+        return sym
+
+    @staticmethod
+    def __perturbation(rng: np.random.Generator, size: int) -> np.ndarray:
+        """
+        Draws multiplicative noise factors used to randomize greedy starts.
+        Args:
+            rng (np.random.Generator): Random generator of the start.
+            size (int): Number of factors to draw.
+        Returns:
+            np.ndarray: Factors drawn uniformly in [1 - PERTURBATION, 1 + PERTURBATION].
         """
-        return sum(matrix[i][j] + matrix[j][i] for j in ungrouped if j != i)
+        return rng.uniform(1 - Clustering.PERTURBATION, 1 + Clustering.PERTURBATION, size)
 
     @staticmethod
-    def __find_best_leader(ungrouped: set[int], matrix: np.ndarray) -> int:
+    def __find_best_leader(affinity: np.ndarray, free: np.ndarray) -> int:
         """
         Selects the user who is best connected to others (highest affinity sum) as group leader.
         Args:
-            ungrouped (set[int]): Indices of users not yet grouped.
-            matrix (np.ndarray): The affinity matrix.
+            affinity (np.ndarray): Bidirectional affinity of each user with the ungrouped population.
+            free (np.ndarray): Boolean mask of ungrouped users.
         Returns:
-            int: Index of the most connected user among ungrouped ones.
+            int: Index of the most connected user among ungrouped ones (lowest index on ties).
         """
-        return max(ungrouped, key=lambda i: Clustering.__compute_affinity_score(i, ungrouped, matrix))
+        masked = np.where(free, affinity, -np.inf)
+        return int(np.argmax(masked))
 
     @staticmethod
-    def __find_best_partners(leader_index: int, ungrouped: set[int], matrix: np.ndarray, num_partners: int) -> list[int]:
+    def __find_best_partners(
+        leader_index: int,
+        free: np.ndarray,
+        sym: np.ndarray | PackedAffinity,
+        num_partners: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> list[int]:
         """
         Selects the best `num_partners` users to group with a given leader based on mutual scores.
         Args:
             leader_index (int): Index of the leader user.
-            ungrouped (set[int]): Indices of ungrouped users.
-            matrix (np.ndarray): The affinity matrix.
+            free (np.ndarray): Boolean mask of ungrouped users.
+            sym (np.ndarray | PackedAffinity): The symmetrized affinity matrix.
             num_partners (int): Number of partners to select.
+            rng (Optional[np.random.Generator]): If given, scores are randomly perturbed.
         Returns:
-            list[int]: Indices of selected partner users.
+            list[int]: Indices of selected partner users (lowest indices first on ties).
         """
-        scores = [
-            (j, matrix[leader_index][j] + matrix[j][leader_index])
-            for j in ungrouped if j != leader_index
-        ]
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return [j for j, _ in scores[:num_partners]]
+        candidates = np.flatnonzero(free)
+        candidates = candidates[candidates != leader_index]
+        row = sym.row(leader_index) if isinstance(sym, PackedAffinity) else sym[leader_index]
+        scores = row[candidates]
+        if rng is not None:
+            scores = scores * Clustering.__perturbation(rng, len(candidates))
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order[:num_partners]].tolist()
 
     @staticmethod
     def __form_group(leader: int, partners: list[int]) -> list[int]:
@@ -128,53 +309,920 @@ class Clustering:
         return [leader] + partners
 
     @staticmethod
-    def __cluster_users_greedy_balanced(preferences: dict[User, dict[User, int]], group_size: int) -> list[list[User]]:
+    def __cluster_users_greedy_balanced(
+        sym: np.ndarray | PackedAffinity,
+        group_size: int,
+        rng: Optional[np.random.Generator] = None,
+        group_sizes: Optional[list[int]] = None,
+        stats: Optional[ClusterStats] = None
+    ) -> list[list[int]]:
         """
         Clusters users into balanced groups using a greedy algorithm based on preference weights.
+        Each user's affinity with the ungrouped population is computed once and decreased by the
+        contribution of every newly grouped user, so a run costs O(n²) instead of O(n³ / group_size).
+        A packed matrix is read row by row.
         Args:
-            preferences (dict[User, dict[User, int]]): User preference weights toward others.
+            sym (np.ndarray | PackedAffinity): The symmetrized affinity matrix.
+            group_size (int): Target group size.
+            rng (Optional[np.random.Generator]): If given, leader and partner scores are randomly
+                perturbed, which gives a different start for multi-start clustering.
+            group_sizes (Optional[list[int]]): Sizes of the groups to form, in order; by default the
+                balanced sizes for group_size.
+            stats (Optional[ClusterStats]): If given, the leader and partner selections are timed.
+        Returns:
+            list[list[int]]: List of groups, each given as the indices of its users.
+        """
+        packed = isinstance(sym, PackedAffinity)
+        total_users = sym.size if packed else len(sym)
+
+        if total_users == 0:
+            return []
+
+        if group_sizes is None:
+            group_sizes = Clustering.__compute_balanced_group_sizes(total_users, group_size)
+        affinity = sym.row_sums() if packed else sym.sum(axis=1)
+        bias = None if rng is None else Clustering.__perturbation(rng, total_users)
+        free = np.ones(total_users, dtype=bool)
+        remaining = total_users
+        groups = []
+
+        for size in group_sizes:
+            if remaining == 0:
+                break
+            if stats is not None:
+                start = time.perf_counter()
+            leader = Clustering.__find_best_leader(affinity if bias is None else affinity * bias, free)
+            if stats is not None:
+                selected = time.perf_counter()
+                stats.record("leaders", selected - start)
+            partners = Clustering.__find_best_partners(leader, free, sym, size - 1, rng)
+            if stats is not None:
+                stats.record("partners", time.perf_counter() - selected)
+            group_indices = Clustering.__form_group(leader, partners)
+            groups.append(group_indices)
+            free[group_indices] = False
+            remaining -= len(group_indices)
+            affinity -= sym.rows_sum(group_indices) if packed else sym[:, group_indices].sum(axis=1)
+
+        return groups
+
+    @staticmethod
+    def __find_best_sparse_partners(
+        leader_index: int,
+        graph: SparseAffinity,
+        free: np.ndarray,
+        num_partners: int,
+        cursor: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> list[int]:
+        """
+        Selects the best partners of a leader by scanning only the leader's non-zero neighbors.
+        Ties are broken by ascending index, and missing partners are filled with the lowest free indices,
+        which reproduces the choices of __find_best_partners on the dense matrix.
+        Args:
+            leader_index (int): Index of the leader user.
+            graph (SparseAffinity): The symmetrized affinity graph.
+            free (np.ndarray): Boolean mask of ungrouped users.
+            num_partners (int): Number of partners to select.
+            cursor (int): Lowest index that may still be free.
+            rng (Optional[np.random.Generator]): If given, scores are randomly perturbed.
+        Returns:
+            list[int]: Indices of selected partner users.
+        """
+        neighbors, weights = graph.neighbors(leader_index)
+        available = free[neighbors]
+        neighbors, weights = neighbors[available], weights[available]
+        if rng is not None:
+            weights = weights * Clustering.__perturbation(rng, len(weights))
+        order = np.lexsort((neighbors, -weights))
+        partners = neighbors[order][:num_partners].tolist()
+
+        chosen = set(partners)
+        j = cursor
+        while len(partners) < num_partners and j < graph.size:
+            if free[j] and j != leader_index and j not in chosen:
+                partners.append(j)
+            j += 1
+        return partners
+
+    @staticmethod
+    def __cluster_sparse_greedy_balanced(
+        graph: SparseAffinity,
+        group_size: int,
+        rng: Optional[np.random.Generator] = None,
+        group_sizes: Optional[list[int]] = None,
+        stats: Optional[ClusterStats] = None
+    ) -> list[list[int]]:
+        """
+        Sparse counterpart of __cluster_users_greedy_balanced.
+        Leader affinities are computed once from the graph and decreased as users are grouped,
+        and the best leader is popped from a lazy max-heap, so a whole run costs O((n + nnz) log n).
+        Args:
+            graph (SparseAffinity): The symmetrized affinity graph.
             group_size (int): Target group size.
+            rng (Optional[np.random.Generator]): If given, leader and partner scores are randomly perturbed.
+            group_sizes (Optional[list[int]]): Sizes of the groups to form, in order.
+            stats (Optional[ClusterStats]): If given, the leader and partner selections are timed.
         Returns:
-            list[list[User]]: List of groups with users.
+            list[list[int]]: List of groups, each given as the indices of its users.
         """
-        matrix, user_list = Clustering.__build_affinity_matrix(preferences)
-        total_users = len(user_list)
+        total_users = graph.size
 
         if total_users == 0:
             return []
 
-        group_sizes = Clustering.__compute_balanced_group_sizes(total_users, group_size)
-        ungrouped = set(range(total_users))
+        if group_sizes is None:
+            group_sizes = Clustering.__compute_balanced_group_sizes(total_users, group_size)
+        free = np.ones(total_users, dtype=bool)
+        affinity = graph.row_sums()
+        bias = np.ones(total_users) if rng is None else Clustering.__perturbation(rng, total_users)
+        heap = [(-score, i) for i, score in enumerate((affinity * bias).tolist())]
+        heapq.heapify(heap)
+        cursor = 0
+        remaining = total_users
         groups = []
 
         for size in group_sizes:
-            if not ungrouped:
+            if remaining == 0:
                 break
-            leader = Clustering.__find_best_leader(ungrouped, matrix)
-            partners = Clustering.__find_best_partners(leader, ungrouped, matrix, size - 1)
+            if stats is not None:
+                start = time.perf_counter()
+            while cursor < total_users and not free[cursor]:
+                cursor += 1
+            while True:
+                negative_score, leader = heapq.heappop(heap)
+                if free[leader] and -negative_score == affinity[leader] * bias[leader]:
+                    break
+            if stats is not None:
+                selected = time.perf_counter()
+                stats.record("leaders", selected - start)
+            partners = Clustering.__find_best_sparse_partners(leader, graph, free, size - 1, cursor, rng)
+            if stats is not None:
+                stats.record("partners", time.perf_counter() - selected)
             group_indices = Clustering.__form_group(leader, partners)
-            group = [user_list[i] for i in group_indices]
-            groups.append(group)
-            ungrouped -= set(group_indices)
+            groups.append(group_indices)
+            free[group_indices] = False
+            remaining -= len(group_indices)
+
+            for member in group_indices:
+                neighbors, weights = graph.neighbors(member)
+                affinity[neighbors] -= weights
+            touched = np.unique(np.concatenate([graph.neighbors(m)[0] for m in group_indices]))
+            for j in touched[free[touched]].tolist():
+                heapq.heappush(heap, (-float(affinity[j] * bias[j]), j))
 
         return groups
 
     @staticmethod
-    def cluster(preferences: dict[User, dict[User, int]], group_size: int) -> tuple[list[list[User]], int]:
+    def __score_partition(groups: list[list[int]], sym: np.ndarray | SparseAffinity | PackedAffinity) -> int:
+        """
+        Computes the total mutual score of a partition from the symmetrized affinities.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices.
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph.
+        Returns:
+            int: Sum of the scores of every group, as computed by __score_group.
+        """
+        if isinstance(sym, (SparseAffinity, PackedAffinity)):
+            return sym.score_groups(groups)
+        return sum(int(sym[np.ix_(group, group)].sum()) for group in groups) // 2
+
+    @staticmethod
+    def __linked_groups(sym: np.ndarray | SparseAffinity | PackedAffinity, fixed: list[list[int]], users: list[int], count: int) -> list[int]:
+        """
+        Finds the fixed groups sharing the most affinity with a set of users.
+        Only the rows of these users are read, so the cost depends on the size of the set.
+        Args:
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph.
+            fixed (list[list[int]]): Groups that were kept.
+            users (list[int]): Indices of the users.
+            count (int): Maximum number of groups to return.
+        Returns:
+            list[int]: Positions in `fixed` of the most linked groups (with a positive affinity), best first.
+        """
+        size = sym.size if isinstance(sym, (SparseAffinity, PackedAffinity)) else len(sym)
+        labels = np.full(size, -1, dtype=np.intp)
+        for position, group in enumerate(fixed):
+            labels[group] = position
+
+        if isinstance(sym, SparseAffinity):
+            cols = np.concatenate([sym.neighbors(i)[0] for i in users] + [np.zeros(0, dtype=np.intp)])
+            weights = np.concatenate([sym.neighbors(i)[1] for i in users] + [np.zeros(0, dtype=np.int64)])
+        else:
+            block = sym.block(users, np.arange(size)) if isinstance(sym, PackedAffinity) else sym[users]
+            cols = np.nonzero(block)[1]
+            weights = block[np.nonzero(block)]
+        linked = labels[cols] >= 0
+        links = np.bincount(labels[cols][linked], weights=weights[linked], minlength=len(fixed))
+        best = np.argsort(-links, kind="stable")[:count]
+        return [int(k) for k in best if links[k] > 0]
+
+    @staticmethod
+    def __satisfaction(
+        rows: np.ndarray,
+        cols: np.ndarray,
+        scores: np.ndarray,
+        groups: list[list[int]],
+        size: int
+    ) -> np.ndarray:
+        """
+        Computes how many points every user gave to the members of their own group, in O(nnz).
+        Args:
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+            groups (list[list[int]]): Groups given as lists of user indices.
+            size (int): Number of users.
+        Returns:
+            np.ndarray: Satisfaction of every user.
+        """
+        labels = np.full(size, -1, dtype=np.intp)
+        for position, group in enumerate(groups):
+            labels[group] = position
+        same = (labels[rows] == labels[cols]) & (rows != cols)
+        return np.rint(np.bincount(rows[same], weights=scores[same], minlength=size)).astype(np.int64)
+
+    @staticmethod
+    def __constraint_indices(constraint_sets: Optional[list[list[User]]], user_list: list[User]) -> list[list[int]]:
+        """
+        Maps constraint sets of users to sets of user indices.
+        Args:
+            constraint_sets (Optional[list[list[User]]]): Sets of users, or None.
+            user_list (list[User]): Users giving the meaning of each index.
+        Returns:
+            list[list[int]]: Sets of user indices, each sorted, in sorted order (so equal constraints hash equally).
+        Raises:
+            ValueError: If a constraint names an unknown user.
+        """
+        index = {user: i for i, user in enumerate(user_list)}
+        indices = []
+        for users in constraint_sets or []:
+            if any(user not in index for user in users):
+                raise ValueError("Constraints can only name users taking part in the clustering.")
+            indices.append(sorted({index[user] for user in users}))
+        return sorted(indices)
+
+    @staticmethod
+    def __format_result(
+        index_groups: list[list[int]],
+        total_score: int,
+        proof: Optional[OptimalityProof],
+        user_list: list[User],
+        with_proof: bool
+    ) -> tuple[list[list[User]], int] | tuple[list[list[User]], int, OptimalityProof]:
+        """
+        Maps groups of user indices back to users and builds the value returned by cluster.
+        Args:
+            index_groups (list[list[int]]): Groups of user indices.
+            total_score (int): Total affinity score.
+            proof (Optional[OptimalityProof]): Optimality proof, returned when with_proof is True.
+            user_list (list[User]): Users giving the meaning of each index.
+            with_proof (bool): Whether to append the proof.
+        Returns:
+            tuple[list[list[User]], int] | tuple[list[list[User]], int, OptimalityProof]: The result of cluster.
+        """
+        groups = [[user_list[i] for i in indices] for indices in index_groups]
+
+        if with_proof:
+            return groups, total_score, proof
+        return groups, total_score
+
+    @staticmethod
+    def _solve_start(
+        sym: np.ndarray | SparseAffinity,
+        rng: Optional[np.random.Generator] = None,
+        *,
+        group_size: int,
+        refine: bool = False,
+        refine_iterations: int = 100,
+        refine_time_limit: Optional[float] = None,
+        method: str = "greedy",
+        time_limit: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        seed: Optional[int] = None,
+        group_sizes: Optional[list[int]] = None,
+        objective: Optional[Objective] = None,
+        constraints: Optional[Constraints] = None,
+        stats: Optional[ClusterStats] = None
+    ) -> tuple[list[list[int]], int]:
+        """
+        Runs one start of the selected method in index space.
+        Every method starts from the (possibly perturbed) greedy partition, which has the balanced group sizes.
+        This method is not name-mangled so that it can be pickled and sent to worker processes.
+        Args:
+            sym (np.ndarray | SparseAffinity): The symmetrized affinity matrix or graph.
+            rng (Optional[np.random.Generator]): Random generator of a perturbed start, or None.
+            group_size (int): Desired number of users per group.
+            refine (bool): Whether to improve the greedy groups with a swap/move local search.
+            refine_iterations (int): Maximum number of local search passes.
+            refine_time_limit (Optional[float]): Wall-clock budget of the local search in seconds.
+            method (str): "greedy", or "anneal" to continue with simulated annealing.
+            time_limit (Optional[float]): Wall-clock budget of the annealing in seconds.
+            cancel (Optional[CancellationToken]): Token stopping the annealing early.
+            seed (Optional[int]): Seed of the annealing when rng is None.
+            group_sizes (Optional[list[int]]): Explicit sizes of the groups to form, overriding group_size.
+            objective (Optional[Objective]): Objective optimized by the annealing and the local search instead of
+                the total score of sym, which then only guides the greedy start.
+            constraints (Optional[Constraints]): Must-link and cannot-link constraints kept by every engine.
+            stats (Optional[ClusterStats]): Statistics receiving the time of every phase of the start, if collected.
+                They are only filled in the calling process.
+        Returns:
+            tuple[list[list[int]], int]: Groups of user indices and their total affinity score
+                (or the value of the objective).
+        """
+        if group_sizes is None:
+            with ClusterStats.measure(stats, "sizes"):
+                size = sym.size if isinstance(sym, (SparseAffinity, PackedAffinity)) else len(sym)
+                group_sizes = Clustering.__compute_balanced_group_sizes(size, group_size) if size else []
+        if constraints is not None:
+            groups = constraints.greedy(sym, group_sizes, rng, stats)
+        elif isinstance(sym, SparseAffinity):
+            groups = Clustering.__cluster_sparse_greedy_balanced(sym, group_size, rng, group_sizes, stats)
+        else:
+            groups = Clustering.__cluster_users_greedy_balanced(sym, group_size, rng, group_sizes, stats)
+
+        if method == "anneal":
+            with ClusterStats.measure(stats, "annealing"):
+                dense = sym.to_dense() if isinstance(sym, (SparseAffinity, PackedAffinity)) else sym
+                annealer = SimulatedAnnealing(dense, groups, rng if rng is not None else seed, objective, constraints)
+                groups, _ = annealer.run(Clustering.ANNEAL_TIME_LIMIT if time_limit is None else time_limit, cancel)
+
+        if refine:
+            with ClusterStats.measure(stats, "refinement"):
+                groups = LocalSearch.refine(groups, sym, refine_iterations, refine_time_limit, objective, constraints)
+
+        with ClusterStats.measure(stats, "scoring"):
+            if objective is not None:
+                return groups, objective.evaluate(groups)
+            return groups, Clustering.__score_partition(groups, sym)
+
+    @staticmethod
+    def _pair_start(
+        sym: np.ndarray | SparseAffinity,
+        rng: Optional[np.random.Generator] = None,
+        *,
+        group_sizes: Optional[list[int]] = None,
+        time_limit: Optional[float] = None,
+        fallback: Optional[Callable] = None
+    ) -> tuple[list[list[int]], int]:
+        """
+        Pairs the users with the maximum-weight matching engine, with the signature of _solve_start.
+        The matching costs O(n³) in pure Python, so blocks of more than MATCHING_MAX_USERS users, and blocks whose
+        matching runs out of time, are paired by the fallback solver instead.
+        Args:
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph; a packed
+                matrix is unpacked for the matching, which reads whole rows.
+            rng (Optional[np.random.Generator]): Passed to the fallback; the matching is deterministic.
+            group_sizes (Optional[list[int]]): Sizes of the groups (pairs and at most one single user), passed to
+                the fallback; the matching forms them by itself.
+            time_limit (Optional[float]): Wall-clock budget of the matching in seconds, or None for no limit.
+            fallback (Optional[Callable]): Solver with the signature of _solve_start; by default the greedy
+                method followed by the swap/move local search.
+        Returns:
+            tuple[list[list[int]], int]: Pairs of user indices and their total affinity score.
+        """
+        size = sym.size if isinstance(sym, (SparseAffinity, PackedAffinity)) else len(sym)
+        groups = None
+        if size <= Clustering.MATCHING_MAX_USERS:
+            deadline = None if time_limit is None else time.perf_counter() + time_limit
+            groups = PairMatching.pair(sym.to_dense() if isinstance(sym, PackedAffinity) else sym, deadline)
+        if groups is None:
+            if fallback is None:
+                fallback = partial(Clustering._solve_start, group_size=2, refine=True)
+            return fallback(sym, rng, group_sizes=group_sizes)
+        return groups, Clustering.__score_partition(groups, sym)
+
+    @staticmethod
+    def _timed_start(
+        sym: np.ndarray | SparseAffinity,
+        rng: Optional[np.random.Generator] = None,
+        *,
+        solve: Callable
+    ) -> tuple[list[list[int]], int, float]:
+        """
+        Runs a solver and measures its wall-clock time; picklable so that it can run in worker processes.
+        Args:
+            sym (np.ndarray | SparseAffinity): The symmetrized affinity matrix or graph.
+            rng (Optional[np.random.Generator]): Random generator passed to the solver.
+            solve (Callable): The solver.
+        Returns:
+            tuple[list[list[int]], int, float]: Groups, score and runtime in seconds.
+        """
+        start = time.perf_counter()
+        groups, score = solve(sym, rng)
+        return groups, score, time.perf_counter() - start
+
+    @staticmethod
+    def cluster(
+        preferences: dict[User, dict[User, int]] | AffinityMatrix,
+        group_size: int,
+        backend: str = "auto",
+        density_threshold: float = SPARSE_DENSITY_THRESHOLD,
+        refine: bool = False,
+        refine_iterations: int = 100,
+        refine_time_limit: Optional[float] = None,
+        restarts: int = 1,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        method: str = "greedy",
+        time_limit: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        with_proof: bool = False,
+        decompose: bool = True,
+        cache: Optional[ResultCache] = None,
+        objective: str = "sum",
+        must_link: Optional[list[list[User]]] = None,
+        cannot_link: Optional[list[list[User]]] = None,
+        stats: bool = False
+    ) -> tuple:
         """
         Public method to perform clustering and return total affinity score.
+        Pairs (group_size == 2) are computed with the optimal maximum-weight matching engine, whatever the method,
+        for classes of at most MATCHING_MAX_USERS users, or else for every connected component of at most that
+        many users. Larger components, and matchings that exceed their time budget, are paired with the greedy
+        method followed by the swap/move local search.
         Args:
-            preferences (dict[User, dict[User, int]]): User-to-user affinity weights.
+            preferences (dict[User, dict[User, int]] | AffinityMatrix): User-to-user affinity weights, or the
+                maintained matrix of a vote, whose cached sparse scores are read without walking the preference
+                dicts (groups then contain usernames).
             group_size (int): Desired number of users per group.
+            backend (str): "dense", "sparse", "packed" (dense upper triangle, read natively by the greedy method
+                and the local search), or "auto" to pick the sparse backend when the preference density is at
+                or below `density_threshold`.
+            density_threshold (float): Density threshold used by the "auto" backend.
+            refine (bool): Whether to improve the greedy groups with a swap/move local search.
+            refine_iterations (int): Maximum number of local search passes.
+            refine_time_limit (Optional[float]): Wall-clock budget of the local search in seconds.
+            restarts (int): Number of greedy starts; every start but the first is randomly perturbed
+                (by up to PERTURBATION) and the best partition is kept. Off by default: on the benchmark
+                generators 8 to 16 starts gain about 0.5-1.3% of the score for as many times the greedy time.
+            workers (int): Number of processes running the starts in parallel.
+            seed (Optional[int]): Seed of the perturbed starts, for reproducible results.
+            method (str): "greedy"; "anneal" to improve the greedy groups with simulated annealing;
+                or "exact" to search the optimum by branch and bound (at most EXACT_MAX_USERS users).
+            time_limit (Optional[float]): Wall-clock budget in seconds of the annealing
+                (ANNEAL_TIME_LIMIT by default), of the exact search (EXACT_TIME_LIMIT by default; the best
+                groups found are then returned with an upper bound instead of a proof) or of each pair matching
+                (MATCHING_TIME_LIMIT by default).
+            cancel (Optional[CancellationToken]): Token stopping the annealing or the exact search early;
+                the best groups found so far are returned. Only supported with workers=1.
+            with_proof (bool): Whether to also return an OptimalityProof. It proves optimality for a completed
+                exact search or a completed matching of the whole class, and otherwise gives an upper bound on the
+                best achievable score.
+            decompose (bool): Whether the greedy method solves each connected component of the preference
+                graph separately (in parallel with workers > 1) and packs the small components together.
+            cache (Optional[ResultCache]): Cache of previous results. A request with the same preference matrix
+                and options (see cache_key) is answered from the cache without clustering again; results of
+                cancelled runs, of annealing runs and of runs that may have been cut short by a time budget (an
+                aborted exact search, or a run lasting longer than its matching or local search budget) are not
+                stored, since they depend on the machine load.
+            objective (str): Objective to maximize, among Objectives.names(): "sum" (total affinity), "envy"
+                (minus the number of picks whose picker and picked user are in different groups) or "maximin"
+                (satisfaction of the worst-off student). "maximin" uses the dense matrices, always runs the local
+                search and only supports the greedy and anneal methods, without proof.
+            must_link (Optional[list[list[User]]]): Sets of users that must end up in the same group.
+            cannot_link (Optional[list[list[User]]]): Sets of users that must end up in different groups (usually
+                pairs). Constrained runs are solved by the greedy, anneal and local search engines on the whole
+                class: pairs are not matched optimally and the components are not solved separately. The packed
+                backend is unpacked into a dense matrix for them, so large constrained classes should use the
+                sparse backend.
+            stats (bool): Whether to also return a ClusterStats with the wall time and number of calls of every
+                phase (matrix build, group sizes, leader and partner selection, scoring, refinement...) and the
+                peak memory traced by tracemalloc. Tracing the memory slows the pure-Python phases down, so phase
+                times are best compared between runs that all collect stats. With workers > 1 the phases run by
+                worker processes are not timed. Runs without stats are not instrumented.
+        Returns:
+            tuple: Final grouped users and value of the objective (the total affinity score by default),
+                followed by the OptimalityProof when with_proof is True, then by the ClusterStats when stats
+                is True.
+        Raises:
+            ValueError: If the backend, the method or the objective is unknown, if a cancellation token is used
+                with workers > 1, if the exact method is used with more than EXACT_MAX_USERS users, if the
+                maximin objective is used with the exact method or a proof, if constraints are used with the exact
+                method, or if the constraints are contradictory or cannot be satisfied with balanced groups.
+        """
+        collected = ClusterStats() if stats else None
+        with collected if collected is not None else nullcontext():
+            result = Clustering.__cluster(
+                preferences, group_size, backend, density_threshold, refine, refine_iterations, refine_time_limit,
+                restarts, workers, seed, method, time_limit, cancel, with_proof, decompose, cache, objective,
+                must_link, cannot_link, collected
+            )
+        return result if collected is None else (*result, collected)
+
+    @staticmethod
+    def cache_key(
+        preferences: dict[User, dict[User, int]] | AffinityMatrix,
+        group_size: int,
+        backend: str = "auto",
+        density_threshold: float = SPARSE_DENSITY_THRESHOLD,
+        refine: bool = False,
+        refine_iterations: int = 100,
+        refine_time_limit: Optional[float] = None,
+        restarts: int = 1,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        method: str = "greedy",
+        time_limit: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None,
+        with_proof: bool = False,
+        decompose: bool = True,
+        cache: Optional[ResultCache] = None,
+        objective: str = "sum",
+        must_link: Optional[list[list[User]]] = None,
+        cannot_link: Optional[list[list[User]]] = None,
+        stats: bool = False
+    ) -> str:
+        """
+        Computes the key under which cluster stores its result in a ResultCache, so that a caller solving in
+        another process (e.g. AlgoService.cluster_votes) can look the result up and store it itself.
+        The stored groups are lists of indices into the users of the preferences (AffinityMatrix.usernames).
+        Args:
+            Same as cluster; workers, cancel, cache and stats do not change the result and are ignored.
+        Returns:
+            str: The fingerprint of the request.
+        Raises:
+            ValueError: If a constraint names an unknown user.
+        """
+        rows, cols, scores, user_list = Clustering.__collect_inputs(preferences)
+        if must_link or cannot_link:
+            must_link = Clustering.__constraint_indices(must_link, user_list)
+            cannot_link = Clustering.__constraint_indices(cannot_link, user_list)
+        return Clustering.__fingerprint(
+            len(user_list), rows, cols, scores, group_size, backend, density_threshold, refine, refine_iterations,
+            refine_time_limit, restarts, seed, method, time_limit, with_proof, decompose, objective, must_link,
+            cannot_link
+        )
+
+    @staticmethod
+    def __fingerprint(
+        size: int,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        scores: np.ndarray,
+        group_size: int,
+        backend: str,
+        density_threshold: float,
+        refine: bool,
+        refine_iterations: int,
+        refine_time_limit: Optional[float],
+        restarts: int,
+        seed: Optional[int],
+        method: str,
+        time_limit: Optional[float],
+        with_proof: bool,
+        decompose: bool,
+        objective: str,
+        must_link: Optional[list[list[int]]],
+        cannot_link: Optional[list[list[int]]]
+    ) -> str:
+        """
+        Fingerprints the preference matrix and every option that changes the result, including the backend
+        and the density threshold, which select the engine producing it.
+        Args:
+            size (int): Number of users.
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+            must_link (Optional[list[list[int]]]): Must-link constraints as sets of user indices.
+            cannot_link (Optional[list[list[int]]]): Cannot-link constraints as sets of user indices.
+            Other arguments: see cluster.
+        Returns:
+            str: The key of the result in a ResultCache.
+        """
+        return ResultCache.fingerprint(
+            size, rows, cols, scores,
+            group_size=group_size, backend=backend, density_threshold=density_threshold, method=method,
+            refine=refine, refine_iterations=refine_iterations, refine_time_limit=refine_time_limit,
+            restarts=restarts, seed=seed, time_limit=time_limit, with_proof=with_proof, decompose=decompose,
+            objective=objective, must_link=must_link or None, cannot_link=cannot_link or None
+        )
+
+    @staticmethod
+    def __cluster(
+        preferences: dict[User, dict[User, int]] | AffinityMatrix,
+        group_size: int,
+        backend: str,
+        density_threshold: float,
+        refine: bool,
+        refine_iterations: int,
+        refine_time_limit: Optional[float],
+        restarts: int,
+        workers: int,
+        seed: Optional[int],
+        method: str,
+        time_limit: Optional[float],
+        cancel: Optional[CancellationToken],
+        with_proof: bool,
+        decompose: bool,
+        cache: Optional[ResultCache],
+        objective: str,
+        must_link: Optional[list[list[User]]],
+        cannot_link: Optional[list[list[User]]],
+        stats: Optional[ClusterStats]
+    ) -> tuple[list[list[User]], int] | tuple[list[list[User]], int, OptimalityProof]:
+        """
+        Performs the clustering described by the arguments of cluster.
+        Args:
+            stats (Optional[ClusterStats]): Statistics receiving the time of every phase, or None.
+            Other arguments: see cluster.
+        Returns:
+            tuple[list[list[User]], int] | tuple[list[list[User]], int, OptimalityProof]: See cluster.
+        Raises:
+            ValueError: See cluster.
+        """
+        if method not in Clustering.METHODS:
+            raise ValueError(f"Unknown clustering method: {method}")
+        if cancel is not None and workers > 1 and restarts > 1:
+            raise ValueError("A cancellation token can only be used with workers=1.")
+        if objective not in Objectives.names():
+            raise ValueError(f"Unknown clustering objective: {objective}")
+        if objective == "maximin" and (method == "exact" or with_proof):
+            raise ValueError("The maximin objective does not support the exact method or proofs.")
+        constrained = bool(must_link or cannot_link)
+        if constrained and method == "exact":
+            raise ValueError("Constraints do not support the exact method.")
+
+        if stats is not None:
+            start = time.perf_counter()
+        rows, cols, scores, user_list = Clustering.__collect_inputs(preferences)
+        if stats is not None:
+            collect_seconds = time.perf_counter() - start
+        size = len(user_list)
+        constraints = None
+        if constrained:
+            must_link = Clustering.__constraint_indices(must_link, user_list)
+            cannot_link = Clustering.__constraint_indices(cannot_link, user_list)
+            constraints = Constraints.compile(size, must_link, cannot_link)
+
+        if cache is not None:
+            key = Clustering.__fingerprint(
+                size, rows, cols, scores, group_size, backend, density_threshold, refine, refine_iterations,
+                refine_time_limit, restarts, seed, method, time_limit, with_proof, decompose, objective,
+                must_link, cannot_link
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return Clustering.__format_result(*cached, user_list, with_proof)
+        run_start = time.perf_counter()
+
+        if stats is not None:
+            start = time.perf_counter()
+        target, offset = None, 0
+        objective_class = Objectives.lookup(objective)
+        if issubclass(objective_class, PairwiseObjective):
+            # Pairwise objectives are plain total scores of their weights, which every engine optimizes; the
+            # weights come from the triplets, so only the dense backend holds a full matrix.
+            weight_rows, weight_cols, weights, offset = objective_class.pair_triplets(rows, cols, scores)
+            sym = Clustering.__build_affinity(
+                preferences, weight_rows, weight_cols, weights, backend, density_threshold
+            )
+        else:
+            directed = Clustering.__matrix_from_triplets(size, rows, cols, scores)
+            target = Objectives.create(objective, directed)
+            sym = Clustering.__symmetrize(directed)
+        if isinstance(sym, PackedAffinity) and (method == "exact" or constrained):
+            # The exact and constrained engines read whole matrices.
+            sym = sym.to_dense()
+        if stats is not None:
+            stats.record("build", collect_seconds + time.perf_counter() - start)
+
+        solve = partial(
+            Clustering._solve_start,
+            group_size=group_size,
+            refine=refine or target is not None,
+            refine_iterations=refine_iterations,
+            refine_time_limit=refine_time_limit,
+            method=method,
+            time_limit=time_limit,
+            cancel=cancel,
+            seed=seed,
+            objective=target,
+            constraints=constraints,
+            stats=stats if workers == 1 else None
+        )
+        if group_size == 2 and target is None and constraints is None:
+            matching_time = Clustering.MATCHING_TIME_LIMIT if time_limit is None else time_limit
+            fallback = partial(solve, refine=True)
+            index_groups, proved = None, False
+            if size <= Clustering.MATCHING_MAX_USERS:
+                with ClusterStats.measure(stats, "matching"):
+                    # The matching reads whole rows, so a packed matrix is unpacked for it.
+                    matched = sym.to_dense() if isinstance(sym, PackedAffinity) else sym
+                    index_groups = PairMatching.pair(matched, time.perf_counter() + matching_time)
+                proved = index_groups is not None
+            elif decompose:
+                pair = partial(Clustering._pair_start, time_limit=matching_time, fallback=fallback)
+                with ClusterStats.measure(stats, "sizes"):
+                    group_sizes = Clustering.__compute_balanced_group_sizes(size, group_size)
+                with ClusterStats.measure(stats, "matching"):
+                    index_groups = ComponentDecomposition.solve(
+                        sym, group_sizes, pair, 1, workers if cancel is None else 1, seed
+                    )
+            if index_groups is None:
+                index_groups, _ = fallback(sym)
+            with ClusterStats.measure(stats, "scoring"):
+                total_score = Clustering.__score_partition(index_groups, sym)
+            limited = not proved and Clustering.__exceeded(run_start, matching_time, refine_time_limit)
+            if proved:
+                proof = OptimalityProof(total_score, total_score, True)
+            elif with_proof:
+                group_sizes = [len(indices) for indices in index_groups]
+                with ClusterStats.measure(stats, "proof"):
+                    proof = OptimalityProof(total_score, ExactSolver.upper_bound(sym, group_sizes), False)
+        elif method == "exact":
+            if size > Clustering.EXACT_MAX_USERS:
+                raise ValueError(f"Exact clustering is limited to {Clustering.EXACT_MAX_USERS} users.")
+            incumbent, _ = solve(sym, method="greedy", refine=True)
+            dense = sym.to_dense() if isinstance(sym, SparseAffinity) else sym
+            group_sizes = [len(indices) for indices in incumbent]
+            with ClusterStats.measure(stats, "exact"):
+                index_groups, total_score, proof = ExactSolver.solve(
+                    dense,
+                    group_sizes,
+                    incumbent,
+                    Clustering.EXACT_TIME_LIMIT if time_limit is None else time_limit,
+                    cancel
+                )
+            limited = not proof.proved_optimal
+        else:
+            index_groups = None
+            with ClusterStats.measure(stats, "sizes"):
+                group_sizes = Clustering.__compute_balanced_group_sizes(size, group_size)
+            block_workers = workers if cancel is None else 1
+            if method == "greedy" and decompose and sum(group_sizes) == size and target is None and constraints is None:
+                index_groups = ComponentDecomposition.solve(sym, group_sizes, solve, restarts, block_workers, seed)
+            if index_groups is not None:
+                with ClusterStats.measure(stats, "scoring"):
+                    total_score = Clustering.__score_partition(index_groups, sym)
+            elif restarts > 1:
+                # The objective and constraints go through MultiStart, which shares their arrays with the workers.
+                index_groups, total_score = MultiStart.run(
+                    partial(solve, objective=None, constraints=None), sym, restarts, workers, seed, target, constraints
+                )
+            else:
+                index_groups, total_score = solve(sym)
+            limited = method == "anneal" or (
+                (refine or target is not None) and Clustering.__exceeded(run_start, refine_time_limit)
+            )
+            if with_proof:
+                group_sizes = [len(indices) for indices in index_groups]
+                with ClusterStats.measure(stats, "proof"):
+                    proof = OptimalityProof(total_score, ExactSolver.upper_bound(sym, group_sizes), False)
+
+        if not with_proof:
+            proof = None
+        if offset:
+            total_score += offset
+            if proof is not None:
+                proof = OptimalityProof(
+                    total_score, proof.upper_bound + offset, proof.proved_optimal, proof.nodes, proof.pruned
+                )
+        if cache is not None and not limited and not (cancel is not None and cancel.cancelled):
+            cache.put(key, index_groups, total_score, proof)
+        return Clustering.__format_result(index_groups, total_score, proof, user_list, with_proof)
+
+    @staticmethod
+    def recluster(
+        previous_groups: list[list[User]],
+        changed_users: list[User],
+        preferences: dict[User, dict[User, int]] | AffinityMatrix,
+        group_size: Optional[int] = None,
+        backend: str = "auto",
+        density_threshold: float = SPARSE_DENSITY_THRESHOLD,
+        repair_iterations: int = 20,
+        repair_time_limit: Optional[float] = None
+    ) -> tuple[list[list[User]], int]:
+        """
+        Repairs an existing grouping after a change instead of clustering the whole class again.
+        Groups without changed or departed users are kept as they are. The members of the other groups and the
+        newly arrived users are regrouped with the greedy method, then a bounded local search improves these
+        new groups together with the REPAIR_NEIGHBORS kept groups most linked to them. The balanced group sizes
+        of the current class are preserved; a kept group whose size no longer fits them is regrouped as well.
+        Args:
+            previous_groups (list[list[User]]): The current groups (usernames for an AffinityMatrix).
+            changed_users (list[User]): Users whose preferences changed or who left the class.
+            preferences (dict[User, dict[User, int]] | AffinityMatrix): The current preferences; users absent
+                from them are dropped, and users absent from previous_groups are added.
+            group_size (Optional[int]): Desired number of users per group; by default the largest previous group.
+            backend (str): "dense", "sparse", "packed" or "auto" (see cluster).
+            density_threshold (float): Density threshold used by the "auto" backend.
+            repair_iterations (int): Maximum number of local search passes of the repair.
+            repair_time_limit (Optional[float]): Wall-clock budget of the repair in seconds.
         Returns:
-            tuple[list[list[User]], int]: Final grouped users and total affinity score.
+            tuple[list[list[User]], int]: The kept groups in their previous order followed by the repaired groups,
+                and the total affinity score of the class.
+        Raises:
+            ValueError: If the backend is unknown.
         """
-        groups = Clustering.__cluster_users_greedy_balanced(preferences, group_size)
-        matrix, user_list = Clustering.__build_affinity_matrix(preferences)
+        rows, cols, scores, user_list = Clustering.__collect_inputs(preferences)
+        sym = Clustering.__build_affinity(preferences, rows, cols, scores, backend, density_threshold)
+        size = len(user_list)
+        if group_size is None:
+            group_size = max((len(group) for group in previous_groups), default=size)
+        group_sizes = Clustering.__compute_balanced_group_sizes(size, group_size)
+        if sum(group_sizes) != size:
+            return Clustering.cluster(preferences, group_size, backend, density_threshold)
+
+        index = {user: i for i, user in enumerate(user_list)}
+        changed = set(changed_users)
+        available = Counter(group_sizes)
+        fixed, released, placed = [], [], set()
+        for group in previous_groups:
+            members = [index[user] for user in group if user in index]
+            placed.update(members)
+            if len(members) == len(group) and not changed.intersection(group) and available[len(members)] > 0:
+                available[len(members)] -= 1
+                fixed.append(members)
+            else:
+                released.extend(members)
+        released.extend(i for i in range(size) if i not in placed)
+
+        if released:
+            sub = ComponentDecomposition.subproblem(sym, released)
+            local_groups, _ = Clustering._solve_start(
+                sub, group_size=group_size, group_sizes=sorted(available.elements(), reverse=True)
+            )
+            regrouped = [[released[i] for i in local] for local in local_groups]
+
+            linked = Clustering.__linked_groups(sym, fixed, released, Clustering.REPAIR_NEIGHBORS)
+            repaired = regrouped + [fixed[k] for k in linked]
+            members = [i for group in repaired for i in group]
+            local_index = {user: k for k, user in enumerate(members)}
+            local_groups = LocalSearch.refine(
+                [[local_index[i] for i in group] for group in repaired],
+                ComponentDecomposition.subproblem(sym, members),
+                repair_iterations,
+                repair_time_limit
+            )
+            fixed = [group for k, group in enumerate(fixed) if k not in linked]
+            fixed += [[members[i] for i in local] for local in local_groups]
+
+        return Clustering.__format_result(fixed, Clustering.__score_partition(fixed, sym), None, user_list, False)
+
+    @staticmethod
+    def sweep(
+        preferences: dict[User, dict[User, int]] | AffinityMatrix,
+        sizes: list[int],
+        backend: str = "auto",
+        density_threshold: float = SPARSE_DENSITY_THRESHOLD,
+        refine: bool = False,
+        method: str = "greedy",
+        time_limit: Optional[float] = None,
+        seed: Optional[int] = None,
+        workers: int = 1
+    ) -> list[SweepResult]:
+        """
+        Compares several group sizes in one call.
+        The affinity matrix is built and symmetrized once; with several workers the sizes are evaluated
+        concurrently in a process pool sharing it. Pairs use the matching engine, as in cluster.
+        Args:
+            preferences (dict[User, dict[User, int]] | AffinityMatrix): User-to-user affinity weights.
+            sizes (list[int]): Group sizes to evaluate.
+            backend (str): "dense", "sparse", "packed" or "auto" (see cluster).
+            density_threshold (float): Density threshold used by the "auto" backend.
+            refine (bool): Whether to improve the greedy groups with a swap/move local search.
+            method (str): "greedy" or "anneal".
+            time_limit (Optional[float]): Wall-clock budget of the annealing for each size.
+            seed (Optional[int]): Seed of the annealing.
+            workers (int): Number of processes evaluating sizes concurrently.
+        Returns:
+            list[SweepResult]: One result per size, in the order of `sizes`.
+        Raises:
+            ValueError: If the backend is unknown or the method is not "greedy" or "anneal".
+        """
+        if method not in ("greedy", "anneal"):
+            raise ValueError(f"Unsupported sweep method: {method}")
+
+        rows, cols, scores, user_list = Clustering.__collect_inputs(preferences)
+        sym = Clustering.__build_affinity(preferences, rows, cols, scores, backend, density_threshold)
 
-        total_score = 0
-        for group in groups:
-            indices = [user_list.index(u) for u in group]
-            total_score += Clustering.__score_group(indices, matrix)
+        solvers = []
+        for group_size in sizes:
+            if group_size == 2:
+                solve = partial(
+                    Clustering._pair_start,
+                    time_limit=Clustering.MATCHING_TIME_LIMIT if time_limit is None else time_limit
+                )
+            else:
+                solve = partial(
+                    Clustering._solve_start,
+                    group_size=group_size,
+                    refine=refine,
+                    method=method,
+                    time_limit=time_limit,
+                    seed=seed
+                )
+            solvers.append(partial(Clustering._timed_start, solve=solve))
 
-        return groups, total_score
\ No newline at end of file
+        table = []
+        for group_size, (index_groups, total_score, runtime) in zip(sizes, MultiStart.map(solvers, sym, workers)):
+            satisfaction = Clustering.__satisfaction(rows, cols, scores, index_groups, len(user_list))
+            table.append(SweepResult(
+                group_size,
+                [[user_list[i] for i in indices] for indices in index_groups],
+                total_score,
+                [int(satisfaction[indices].min()) for indices in index_groups],
+                runtime
+            ))
+        return table
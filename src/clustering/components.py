@@ -0,0 +1,241 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+import numpy as np
+from src.clustering.multi_start import MultiStart
+from src.clustering.packed_affinity import PackedAffinity
+from src.clustering.sparse_affinity import SparseAffinity
+
+Affinity = np.ndarray | SparseAffinity | PackedAffinity
+
+
+class ComponentDecomposition:
+    """
+    Splits the clustering problem along the connected components of the non-zero affinity graph.
+    Users in different components share no score, so each component that can hold whole groups is
+    solved on its own (in parallel when several workers are available). Users that do not fit in
+    the groups assigned to their component are packed together with the small components, so the
+    overall balanced group sizes are preserved.
+    """
+
+    MIN_COMPONENT_SIZE = 64
+
+    @staticmethod
+    def labels(sym: Affinity) -> np.ndarray:
+        """
+        Computes the connected component of every user in one pass over the non-zero entries (union-find).
+        Args:
+            sym (Affinity): The symmetrized affinity matrix or graph.
+        Returns:
+            np.ndarray: Component label of each user; labels are numbered by their lowest user index.
+        """
+        if isinstance(sym, SparseAffinity):
+            size, rows, cols = sym.size, sym.entry_rows(), sym.indices
+        elif isinstance(sym, PackedAffinity):
+            size = sym.size
+            rows, cols = sym.nonzero()
+        else:
+            size = len(sym)
+            rows, cols = np.nonzero(sym)
+        upper = rows < cols
+        parent = list(range(size))
+
+        def find(v: int) -> int:
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            return v
+
+        for i, j in zip(rows[upper].tolist(), cols[upper].tolist()):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        roots = np.array([find(v) for v in range(size)], dtype=np.intp)
+        _, labels = np.unique(roots, return_inverse=True)
+        return labels.ravel()
+
+    @staticmethod
+    def allocate(component_size: int, group_size: int, available: dict[int, int]) -> list[int]:
+        """
+        Chooses the group sizes covering as many users of a component as possible.
+        Args:
+            component_size (int): Number of users in the component.
+            group_size (int): Largest group size.
+            available (dict[int, int]): Remaining number of groups of each size, updated in place.
+        Returns:
+            list[int]: Sizes of the groups given to the component (possibly empty).
+        """
+        small = group_size - 1
+        best = (0, 0, 0)
+        for count_small in range(min(available.get(small, 0), component_size // max(small, 1)) + 1):
+            count_large = min(available.get(group_size, 0), (component_size - count_small * small) // group_size)
+            covered = count_large * group_size + count_small * small
+            if covered > best[0]:
+                best = (covered, count_large, count_small)
+
+        _, count_large, count_small = best
+        if count_large:
+            available[group_size] -= count_large
+        if count_small:
+            available[small] -= count_small
+        return [group_size] * count_large + [small] * count_small
+
+    @staticmethod
+    def subproblem(sym: Affinity, users: list[int]) -> Affinity:
+        """
+        Restricts the affinities to a subset of users.
+        Args:
+            sym (Affinity): The symmetrized affinity matrix or graph.
+            users (list[int]): Indices of the users to keep.
+        Returns:
+            Affinity: The affinities between these users, renumbered in the given order (a dense block for
+                a packed matrix).
+        """
+        if isinstance(sym, SparseAffinity):
+            return sym.subgraph(users)
+        if isinstance(sym, PackedAffinity):
+            return sym.block(users, users)
+        return sym[np.ix_(users, users)]
+
+    @staticmethod
+    def __weakest_group(sub: Affinity, groups: list[list[int]], size: int) -> int:
+        """
+        Finds the group of a given size with the lowest internal score.
+        Args:
+            sub (Affinity): Affinities of the subproblem.
+            groups (list[list[int]]): Groups of the subproblem in local indices.
+            size (int): Size of the group to find.
+        Returns:
+            int: Position of the weakest group of this size in groups.
+        """
+        def score(group: list[int]) -> int:
+            if isinstance(sub, SparseAffinity):
+                return sub.score_groups([group])
+            return int(sub[np.ix_(group, group)].sum())
+
+        candidates = [k for k, group in enumerate(groups) if len(group) == size]
+        return min(candidates, key=lambda k: (score(groups[k]), -k))
+
+    @staticmethod
+    def solve_subproblems(
+        solve: Callable,
+        subproblems: list[Affinity],
+        group_sizes: list[list[int]],
+        restarts: int,
+        workers: int,
+        seed: Optional[int]
+    ) -> list[list[list[int]]]:
+        """
+        Solves independent subproblems, concurrently when several workers are available.
+        Args:
+            solve (Callable): Picklable solver accepting the affinity, a random generator and group_sizes.
+            subproblems (list[Affinity]): Affinities of the subproblems.
+            group_sizes (list[list[int]]): Sizes of the groups to form in each subproblem.
+            restarts (int): Number of starts of the solver on each subproblem.
+            workers (int): Number of worker processes; 1 solves every subproblem in the current process.
+            seed (Optional[int]): Seed of the perturbed starts.
+        Returns:
+            list[list[list[int]]]: Groups of every subproblem in local indices.
+        """
+        count = len(subproblems)
+        arguments = ([solve] * count, subproblems, group_sizes, [restarts] * count, [seed] * count)
+        if workers > 1 and count > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, count)) as pool:
+                return list(pool.map(ComponentDecomposition._solve_task, *arguments))
+        return list(map(ComponentDecomposition._solve_task, *arguments))
+
+    @staticmethod
+    def _solve_task(
+        solve: Callable,
+        sub: Affinity,
+        group_sizes: list[int],
+        restarts: int,
+        seed: Optional[int]
+    ) -> list[list[int]]:
+        """
+        Solves one subproblem; runs in a worker process when the decomposition is parallel.
+        Args:
+            solve (Callable): Solver accepting the affinity, a random generator and group_sizes.
+            sub (Affinity): Affinities of the subproblem.
+            group_sizes (list[int]): Sizes of the groups to form.
+            restarts (int): Number of starts of the solver.
+            seed (Optional[int]): Seed of the perturbed starts.
+        Returns:
+            list[list[int]]: Groups in local indices.
+        """
+        groups, _ = MultiStart.run(partial(solve, group_sizes=group_sizes), sub, restarts, 1, seed)
+        return groups
+
+    @staticmethod
+    def solve(
+        sym: Affinity,
+        group_sizes: list[int],
+        solve: Callable,
+        restarts: int = 1,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        min_component_size: int = MIN_COMPONENT_SIZE
+    ) -> Optional[list[list[int]]]:
+        """
+        Solves the problem component by component.
+        Components are served largest first. A component that the remaining sizes do not cover exactly is
+        solved with one extra group for its leftover users; the weakest group of that size then joins
+        the pool of small components, which is solved last with the remaining sizes.
+        Args:
+            sym (Affinity): The symmetrized affinity matrix or graph.
+            group_sizes (list[int]): Balanced sizes of all the groups to form.
+            solve (Callable): Picklable solver accepting the affinity, a random generator and group_sizes.
+            restarts (int): Number of starts of the solver on each subproblem.
+            workers (int): Number of processes solving subproblems concurrently.
+            seed (Optional[int]): Seed of the perturbed starts.
+            min_component_size (int): Smallest component solved on its own; smaller components go to the pool.
+        Returns:
+            Optional[list[list[int]]]: Groups of user indices, or None if no component is worth solving
+                separately (a connected graph, or only small components).
+        """
+        labels = ComponentDecomposition.labels(sym)
+        if len(labels) == 0 or labels.max() == 0:
+            return None
+        order = np.argsort(labels, kind="stable")
+        components = np.split(order, np.cumsum(np.bincount(labels))[:-1])
+        components.sort(key=len, reverse=True)
+        min_component_size = max(min_component_size, max(group_sizes) - 1)
+        if len(components[0]) < min_component_size:
+            return None
+
+        group_size = max(group_sizes)
+        available = {size: group_sizes.count(size) for size in set(group_sizes)}
+
+        jobs, pool_users = [], []
+        for members in components:
+            sizes = ComponentDecomposition.allocate(len(members), group_size, available) \
+                if len(members) >= min_component_size else []
+            leftover = len(members) - sum(sizes)
+            if sizes:
+                jobs.append((members, sizes + [leftover] if leftover else sizes, leftover))
+            else:
+                pool_users.extend(members.tolist())
+
+        subproblems = [ComponentDecomposition.subproblem(sym, members.tolist()) for members, _, _ in jobs]
+        results = ComponentDecomposition.solve_subproblems(
+            solve, subproblems, [sizes for _, sizes, _ in jobs], restarts, workers, seed
+        )
+
+        groups = []
+        for (members, _, leftover), sub, local_groups in zip(jobs, subproblems, results):
+            if leftover:
+                weakest = ComponentDecomposition.__weakest_group(sub, local_groups, leftover)
+                pool_users.extend(members[local_groups.pop(weakest)].tolist())
+            groups += [members[local].tolist() for local in local_groups]
+
+        if pool_users:
+            pool_users.sort()
+            remaining_sizes = sorted((size for size, count in available.items() for _ in range(count)), reverse=True)
+            pool = ComponentDecomposition.subproblem(sym, pool_users)
+            pool_array = np.asarray(pool_users)
+            local_groups = ComponentDecomposition._solve_task(solve, pool, remaining_sizes, restarts, seed)
+            groups += [pool_array[local].tolist() for local in local_groups]
+
+        return groups
@@ -0,0 +1,313 @@
+import time
+from typing import Optional
+
+import numpy as np
+from src.clustering.sparse_affinity import SparseAffinity
+from src.clustering.stats import ClusterStats
+
+Affinity = np.ndarray | SparseAffinity
+
+
+class Constraints:
+    """
+    Must-link and cannot-link constraints compiled for the clustering engines.
+    Must-link sets are merged by union-find into super-nodes that are always placed as a whole; their
+    members are locked, so the refinement engines never move them. Cannot-link sets become the sorted keys of
+    the forbidden super-node pairs plus the conflicts of every super-node, so memory grows with the number of
+    separated pairs instead of the square of the class size, and a candidate placement is still checked with
+    vectorized lookups instead of scanning the constraint lists.
+    """
+
+    PERTURBATION = 0.3
+
+    def __init__(self, nodes: np.ndarray, count: int, separated: np.ndarray) -> None:
+        """
+        Initializes the compiled constraints.
+        Args:
+            nodes (np.ndarray): Super-node of every user, numbered by their lowest user index.
+            count (int): Number of super-nodes.
+            separated (np.ndarray): Pairs of distinct super-nodes that cannot share a group, one per row.
+        Returns:
+            None
+        """
+        self.nodes = nodes
+        self.separated = separated
+        self.sizes = np.bincount(nodes, minlength=count)
+        self.locked = self.sizes[nodes] > 1
+        pairs = np.concatenate([separated, separated[:, ::-1]]).astype(np.int64).reshape(-1, 2)
+        self.__keys = np.unique(pairs[:, 0] * count + pairs[:, 1])
+        # The keys are sorted by their first super-node, so the conflicts of every super-node are one slice.
+        bounds = np.searchsorted(self.__keys, np.arange(1, count) * count)
+        self.conflicts = np.split((self.__keys % count).astype(np.intp), bounds) if count else []
+        self.members = [[] for _ in range(count)]
+        for user, node in enumerate(nodes.tolist()):
+            self.members[node].append(user)
+
+    @staticmethod
+    def compile(size: int, must_link: list[list[int]], cannot_link: list[list[int]]) -> "Constraints":
+        """
+        Compiles constraint sets given as user indices.
+        Args:
+            size (int): Number of users.
+            must_link (list[list[int]]): Sets of users that must end up in the same group.
+            cannot_link (list[list[int]]): Sets of users that must end up in pairwise different groups.
+        Returns:
+            Constraints: The compiled constraints.
+        Raises:
+            ValueError: If two users are both linked and separated.
+        """
+        parent = list(range(size))
+
+        def find(v: int) -> int:
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            return v
+
+        for linked in must_link:
+            for i, j in zip(linked, linked[1:]):
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        _, nodes = np.unique([find(v) for v in range(size)], return_inverse=True)
+        nodes = nodes.ravel().astype(np.intp)
+        count = int(nodes.max()) + 1 if size else 0
+        separated = []
+        for users in cannot_link:
+            separated_nodes = nodes[list(users)].tolist()
+            if len(set(separated_nodes)) < len(separated_nodes):
+                raise ValueError("The same users cannot be both linked and separated.")
+            separated.extend(
+                (a, b) for k, a in enumerate(separated_nodes) for b in separated_nodes[k + 1:]
+            )
+        return Constraints(nodes, count, np.array(separated, dtype=np.intp).reshape(-1, 2))
+
+    @property
+    def count(self) -> int:
+        """
+        Returns the number of super-nodes.
+        Returns:
+            int: Number of super-nodes, single users included.
+        """
+        return len(self.sizes)
+
+    def forbidden(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Checks whether users cannot share a group, element-wise with numpy broadcasting.
+        Args:
+            a (np.ndarray): Indices of the first users.
+            b (np.ndarray): Indices of the second users, broadcast against a.
+        Returns:
+            np.ndarray: Boolean array of the broadcast shape; True where the two users are separated.
+        """
+        keys = self.nodes[a].astype(np.int64) * self.count + self.nodes[b]
+        if not len(self.__keys):
+            return np.zeros(keys.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(self.__keys, keys), len(self.__keys) - 1)
+        return self.__keys[positions] == keys
+
+    def __blocked_by(self, nodes: list[int]) -> np.ndarray:
+        """
+        Finds the super-nodes that cannot join some super-nodes.
+        Args:
+            nodes (list[int]): The super-nodes.
+        Returns:
+            np.ndarray: Boolean mask over the super-nodes.
+        """
+        blocked = np.zeros(self.count, dtype=bool)
+        for node in nodes:
+            blocked[self.conflicts[node]] = True
+        return blocked
+
+    def satisfied(self, groups: list[list[int]]) -> bool:
+        """
+        Checks a partition against the constraints.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices.
+        Returns:
+            bool: True if every super-node lies in one group and no group holds a forbidden pair.
+        """
+        labels = np.full(len(self.nodes), -1, dtype=np.intp)
+        for position, group in enumerate(groups):
+            labels[group] = position
+        for members in self.members:
+            if len(set(labels[members].tolist())) > 1:
+                return False
+        return not any(
+            self.forbidden(np.asarray(group)[:, None], np.asarray(group)[None, :]).any() for group in groups
+        )
+
+    def swap_mask(self, group_a: list[int], group_b: list[int]) -> np.ndarray:
+        """
+        Finds the swaps between two groups that keep the constraints satisfied.
+        Args:
+            group_a (list[int]): Members of the first group.
+            group_b (list[int]): Members of the second group.
+        Returns:
+            np.ndarray: Boolean |A| x |B| matrix; entry (i, j) is True if group_a[i] and group_b[j] can be exchanged.
+        """
+        cross = self.forbidden(np.asarray(group_a)[:, None], np.asarray(group_b)[None, :])
+        # A user may join the other group if their only conflict there is the user leaving it.
+        a_conflicts = cross.sum(axis=1)[:, None] - cross
+        b_conflicts = cross.sum(axis=0)[None, :] - cross
+        free = ~self.locked[group_a][:, None] & ~self.locked[group_b][None, :]
+        return free & (a_conflicts == 0) & (b_conflicts == 0)
+
+    def move_mask(self, group_a: list[int], group_b: list[int]) -> np.ndarray:
+        """
+        Finds the users of a group that can move to another group while keeping the constraints satisfied.
+        Args:
+            group_a (list[int]): Members of the group they leave.
+            group_b (list[int]): Members of the group they join.
+        Returns:
+            np.ndarray: Boolean mask over group_a.
+        """
+        if not len(group_a) or not len(group_b):
+            return ~self.locked[group_a]
+        cross = self.forbidden(np.asarray(group_a)[:, None], np.asarray(group_b)[None, :])
+        return ~self.locked[group_a] & ~cross.any(axis=1)
+
+    def contract(self, sym: Affinity) -> Affinity:
+        """
+        Sums the affinities between the members of every pair of super-nodes.
+        Args:
+            sym (Affinity): The symmetrized affinity matrix or graph of the users.
+        Returns:
+            Affinity: The affinity matrix or graph of the super-nodes (dense or sparse like the input; the input
+                itself when there is no must-link).
+        """
+        if isinstance(sym, SparseAffinity):
+            rows, cols, weights = sym.entry_rows(), sym.indices, sym.data
+            upper = rows < cols
+            return SparseAffinity.from_triplets(
+                self.count, self.nodes[rows[upper]], self.nodes[cols[upper]], weights[upper]
+            )
+        if self.count == len(sym):
+            return sym
+        order = np.argsort(self.nodes, kind="stable")
+        starts = np.flatnonzero(np.diff(self.nodes[order], prepend=-1))
+        rows = np.add.reduceat(sym[np.ix_(order, order)], starts, axis=0, dtype=np.int64)
+        merged = np.add.reduceat(rows, starts, axis=1)
+        np.fill_diagonal(merged, 0)
+        return merged
+
+    @staticmethod
+    def __row(contracted: Affinity, node: int) -> np.ndarray:
+        """
+        Returns the affinities of a super-node with all the others.
+        Args:
+            contracted (Affinity): The affinity matrix or graph of the super-nodes.
+            node (int): The super-node.
+        Returns:
+            np.ndarray: A dense float row.
+        """
+        if isinstance(contracted, SparseAffinity):
+            row = np.zeros(contracted.size)
+            neighbors, weights = contracted.neighbors(node)
+            row[neighbors] = weights
+            return row
+        return contracted[node].astype(float)
+
+    def __exchange(self, placed: list[list[int]], free: np.ndarray, blocked: np.ndarray, room: int) -> Optional[int]:
+        """
+        Frees a place for the group being formed when no free super-node fits in it.
+        A super-node x of an earlier group that fits in the new group is replaced there by a free super-node
+        of the same size that fits in that earlier group.
+        Args:
+            placed (list[list[int]]): Super-nodes of the groups already formed, modified in place.
+            free (np.ndarray): Boolean mask of the super-nodes not placed yet, modified in place.
+            blocked (np.ndarray): Boolean mask of the super-nodes forbidden in the new group.
+            room (int): Number of places left in the new group.
+        Returns:
+            Optional[int]: The super-node x, which now has to join the new group, or None if no exchange exists.
+        """
+        for nodes in reversed(placed):
+            for x in nodes:
+                if blocked[x] or self.sizes[x] > room:
+                    continue
+                others = [node for node in nodes if node != x]
+                fits = free & (self.sizes == self.sizes[x]) & ~self.__blocked_by(others)
+                if fits.any():
+                    y = int(np.argmax(fits))
+                    nodes[nodes.index(x)] = y
+                    free[y] = False
+                    return x
+        return None
+
+    def greedy(
+        self,
+        sym: Affinity,
+        group_sizes: list[int],
+        rng: Optional[np.random.Generator] = None,
+        stats: Optional[ClusterStats] = None
+    ) -> list[list[int]]:
+        """
+        Forms the groups greedily over the super-nodes.
+        Every group is led by the largest free super-node that fits (then the best connected one), and is filled
+        with the feasible super-node that has the highest affinity with the group so far.
+        Args:
+            sym (Affinity): The symmetrized affinity matrix or graph of the users.
+            group_sizes (list[int]): Sizes of the groups to form, in order.
+            rng (Optional[np.random.Generator]): If given, affinities are randomly perturbed, which gives a
+                different start for multi-start clustering.
+            stats (Optional[ClusterStats]): If given, the leader and partner selections are timed.
+        Returns:
+            list[list[int]]: Groups of user indices.
+        Raises:
+            ValueError: If a super-node is larger than the groups, or if no group can take a super-node
+                without breaking the constraints.
+        """
+        if self.count and self.sizes.max() > max(group_sizes, default=0):
+            raise ValueError("A must-link set is larger than the groups.")
+        contracted = self.contract(sym)
+        if isinstance(contracted, SparseAffinity):
+            affinity = contracted.row_sums().astype(float)
+        else:
+            affinity = contracted.sum(axis=1).astype(float)
+        free = np.ones(self.count, dtype=bool)
+        placed = []
+
+        for capacity in group_sizes:
+            if not free.any():
+                break
+            if stats is not None:
+                start = time.perf_counter()
+            noise = 1.0 if rng is None else rng.uniform(1 - self.PERTURBATION, 1 + self.PERTURBATION, self.count)
+            candidates = np.flatnonzero(free & (self.sizes <= capacity))
+            if not len(candidates):
+                raise ValueError("The constraints cannot be satisfied with balanced groups.")
+            scores = (affinity * noise)[candidates]
+            leader = int(candidates[np.lexsort((-scores, -self.sizes[candidates]))[0]])
+
+            nodes, room = [leader], capacity - int(self.sizes[leader])
+            free[leader] = False
+            affinity -= Constraints.__row(contracted, leader)
+            link, blocked = Constraints.__row(contracted, leader), self.__blocked_by([leader])
+            if stats is not None:
+                selected = time.perf_counter()
+                stats.record("leaders", selected - start)
+            while room > 0:
+                feasible = free & ~blocked & (self.sizes <= room)
+                if feasible.any():
+                    node = int(np.argmax(np.where(feasible, link * noise, -np.inf)))
+                    free[node] = False
+                    affinity -= Constraints.__row(contracted, node)
+                else:
+                    was_free = free.copy()
+                    node = self.__exchange(placed, free, blocked, room)
+                    if node is None:
+                        raise ValueError("The constraints cannot be satisfied with balanced groups.")
+                    for replacement in np.flatnonzero(was_free & ~free).tolist():
+                        affinity -= Constraints.__row(contracted, replacement)
+                nodes.append(node)
+                room -= int(self.sizes[node])
+                link += Constraints.__row(contracted, node)
+                blocked[self.conflicts[node]] = True
+            if stats is not None:
+                stats.record("partners", time.perf_counter() - selected)
+            placed.append(nodes)
+
+        if free.any():
+            raise ValueError("The constraints cannot be satisfied with balanced groups.")
+        return [[user for node in nodes for user in self.members[node]] for nodes in placed]
@@ -0,0 +1,232 @@
+import time
+from typing import Optional
+
+import numpy as np
+from src.clustering.cancellation import CancellationToken
+from src.clustering.packed_affinity import PackedAffinity
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+class OptimalityProof:
+    """
+    Certificate attached to a clustering result.
+    `upper_bound` is a bound no partition can exceed; when `proved_optimal` is True the search space was
+    exhausted and `score` is the optimum (so score == upper_bound for the purposes of the caller).
+    """
+
+    def __init__(self, score: int, upper_bound: float, proved_optimal: bool, nodes: int = 0, pruned: int = 0) -> None:
+        """
+        Initializes the certificate.
+        Args:
+            score (int): Score of the returned partition.
+            upper_bound (float): Upper bound on the score of any balanced partition.
+            proved_optimal (bool): True if the branch-and-bound search completed.
+            nodes (int): Number of search nodes explored.
+            pruned (int): Number of search nodes cut by the bound.
+        Returns:
+            None
+        """
+        self.score = score
+        self.upper_bound = upper_bound
+        self.proved_optimal = proved_optimal
+        self.nodes = nodes
+        self.pruned = pruned
+
+    @property
+    def gap(self) -> float:
+        """
+        Returns the distance between the score and the best possible score.
+        Returns:
+            float: 0 for a proven optimum, otherwise upper_bound - score.
+        """
+        return 0.0 if self.proved_optimal else max(self.upper_bound - self.score, 0.0)
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the certificate.
+        Returns:
+            str: A string representation of the certificate.
+        """
+        status = "optimal" if self.proved_optimal else f"gap <= {self.gap:g}"
+        return f"OptimalityProof(score={self.score}, {status}, nodes={self.nodes}, pruned={self.pruned})"
+
+
+class ExactSolver:
+    """
+    Branch-and-bound search for the best balanced partition of a small class.
+    Symmetry is broken by always opening the next group with the lowest unassigned user and adding
+    members in increasing index order, so every partition is enumerated once.
+    A node is pruned when its score plus an upper bound built from the remaining row maxima
+    cannot beat the incumbent, which is seeded with a heuristic solution. Once every completion of a set of
+    unassigned users has been explored, the best value they can still add is remembered and reused
+    whenever the same set is reached through other groups.
+    """
+
+    @staticmethod
+    def __ranked_rows(sym: np.ndarray) -> list[list[tuple[int, int]]]:
+        """
+        Lists the non-zero mutual scores of every user, largest first.
+        Args:
+            sym (np.ndarray): The symmetrized affinity matrix.
+        Returns:
+            list[list[tuple[int, int]]]: For each user, (score, other user) pairs in decreasing score order.
+        """
+        ranked = []
+        for row in sym.tolist():
+            ranked.append(sorted(((score, j) for j, score in enumerate(row) if score > 0), reverse=True))
+        return ranked
+
+    @staticmethod
+    def __row_prefixes(ranked: list[list[tuple[int, int]]], users: list[int], depth: int) -> dict[int, list[int]]:
+        """
+        Computes, for every user, the sums of its largest mutual scores towards the given users.
+        Args:
+            ranked (list[list[tuple[int, int]]]): Output of __ranked_rows.
+            users (list[int]): Users still to be grouped.
+            depth (int): Largest number of values to sum.
+        Returns:
+            dict[int, list[int]]: prefix[v][k] is the sum of the k largest scores of v towards users.
+        """
+        mask = 0
+        for v in users:
+            mask |= 1 << v
+        prefixes = {}
+        for v in users:
+            row = [0]
+            for score, j in ranked[v]:
+                if len(row) > depth:
+                    break
+                if mask >> j & 1:
+                    row.append(row[-1] + score)
+            row.extend([row[-1]] * (depth + 1 - len(row)))
+            prefixes[v] = row
+        return prefixes
+
+    @staticmethod
+    def upper_bound(sym: np.ndarray | SparseAffinity | PackedAffinity, group_sizes: list[int]) -> float:
+        """
+        Computes the root bound: half the sum, over users, of their (max size - 1) largest mutual scores.
+        Args:
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph.
+            group_sizes (list[int]): Sizes of the groups to form.
+        Returns:
+            float: An upper bound on the score of any partition with these group sizes.
+        """
+        if not group_sizes:
+            return 0.0
+        depth = max(group_sizes) - 1
+        if isinstance(sym, SparseAffinity):
+            rows = (np.sort(sym.neighbors(i)[1])[::-1][:depth] for i in range(sym.size))
+            return sum(int(row.sum()) for row in rows) / 2
+        if isinstance(sym, PackedAffinity):
+            rows = (np.sort(sym.row(i))[::-1][:depth] for i in range(sym.size))
+            return sum(int(row.sum()) for row in rows) / 2
+        prefixes = ExactSolver.__row_prefixes(ExactSolver.__ranked_rows(sym), list(range(len(sym))), depth)
+        return sum(row[depth] for row in prefixes.values()) / 2
+
+    @staticmethod
+    def solve(
+        sym: np.ndarray,
+        group_sizes: list[int],
+        incumbent: list[list[int]],
+        time_limit: Optional[float] = None,
+        cancel: Optional[CancellationToken] = None
+    ) -> tuple[list[list[int]], int, OptimalityProof]:
+        """
+        Finds a partition with the given group sizes that maximizes the total mutual score.
+        Args:
+            sym (np.ndarray): The symmetrized affinity matrix (zero diagonal, non-negative).
+            group_sizes (list[int]): Sizes of the groups to form; they must sum to the number of users.
+            incumbent (list[list[int]]): A feasible partition used as the initial lower bound.
+            time_limit (Optional[float]): Wall-clock budget in seconds; when exceeded the best partition
+                found is returned without a proof of optimality.
+            cancel (Optional[CancellationToken]): Token stopping the search early.
+        Returns:
+            tuple[list[list[int]], int, OptimalityProof]: Best groups, their score and the certificate.
+        """
+        scores = sym.tolist()
+        ranked = ExactSolver.__ranked_rows(sym)
+        depth = max(group_sizes, default=1) - 1
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        remaining_sizes = {size: group_sizes.count(size) for size in set(group_sizes)}
+
+        best = {
+            "groups": [list(group) for group in incumbent],
+            "score": sum(int(sym[np.ix_(group, group)].sum()) for group in incumbent) // 2,
+        }
+        stats = {"nodes": 0, "pruned": 0, "aborted": False}
+        formed: list[list[int]] = []
+        completion_bounds: dict[tuple[int, tuple[int, ...]], float] = {}
+
+        def out_of_budget() -> bool:
+            if stats["nodes"] % 1024 == 1:
+                if (deadline is not None and time.perf_counter() > deadline) or (cancel is not None and cancel.cancelled):
+                    stats["aborted"] = True
+            return stats["aborted"]
+
+        def open_group(unassigned: list[int], score: int) -> None:
+            if not unassigned:
+                if score > best["score"]:
+                    best["groups"], best["score"] = [list(group) for group in formed], score
+                return
+            key = (sum(1 << v for v in unassigned), tuple(sorted(remaining_sizes.items())))
+            if score + completion_bounds.get(key, float("inf")) <= best["score"]:
+                stats["pruned"] += 1
+                return
+            prefixes = ExactSolver.__row_prefixes(ranked, unassigned, depth)
+            pool_bound = sum(prefixes[v][depth] for v in unassigned)
+            if score + pool_bound / 2 <= best["score"]:
+                stats["pruned"] += 1
+                return
+            leader, rest = unassigned[0], unassigned[1:]
+            for size in sorted(remaining_sizes, reverse=True):
+                if remaining_sizes[size] == 0:
+                    continue
+                remaining_sizes[size] -= 1
+                gains = [scores[leader][u] for u in rest]
+                extend([leader], size, rest, gains, 0, score, pool_bound - prefixes[leader][depth], prefixes)
+                remaining_sizes[size] += 1
+                if stats["aborted"]:
+                    return
+            # The subtree is exhausted: no completion of these users can beat the incumbent from here.
+            completion_bounds[key] = min(completion_bounds.get(key, float("inf")), best["score"] - score)
+
+        def extend(group, size, candidates, gains, start, score, pool_bound, prefixes) -> None:
+            stats["nodes"] += 1
+            if out_of_budget():
+                return
+            slots = size - len(group)
+            if slots == 0:
+                formed.append(group)
+                open_group(candidates, score)
+                formed.pop()
+                return
+
+            # gains[k] is the score candidates[k] would add to the open group; children are bounded
+            # before recursing, members being added in increasing index order.
+            open_bound = sum(prefixes[c][slots - 1] for c in group)
+            order = sorted(range(start, len(candidates) - slots + 1), key=lambda k: -gains[k])
+            for k in order:
+                v = candidates[k]
+                child_score = score + gains[k]
+                child_pool_bound = pool_bound - prefixes[v][depth]
+                if child_score + (child_pool_bound + open_bound + prefixes[v][slots - 1]) / 2 <= best["score"]:
+                    stats["pruned"] += 1
+                    continue
+                row = scores[v]
+                rest = candidates[:k] + candidates[k + 1:]
+                rest_gains = [gain + row[u] for gain, u in zip(gains[:k] + gains[k + 1:], rest)]
+                extend(group + [v], size, rest, rest_gains, k, child_score, child_pool_bound, prefixes)
+                if stats["aborted"]:
+                    return
+
+        open_group(list(range(len(sym))), 0)
+
+        proof = OptimalityProof(
+            best["score"],
+            ExactSolver.upper_bound(sym, group_sizes) if stats["aborted"] else best["score"],
+            not stats["aborted"],
+            stats["nodes"],
+            stats["pruned"],
+        )
+        return best["groups"], best["score"], proof
@@ -0,0 +1,230 @@
+import time
+from typing import Optional
+
+import numpy as np
+from src.clustering.constraints import Constraints
+from src.clustering.objectives import Objective
+from src.clustering.packed_affinity import PackedAffinity
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+class LocalSearch:
+    """
+    Kernighan-Lin style refinement of an existing partition.
+    Users are swapped between two groups (or moved from a group of size k + 1 to one of size k)
+    whenever it increases the total mutual score; group sizes are therefore preserved.
+    Each candidate is scored by its delta, computed from the mutual scores of the two groups only.
+    Another objective than the total score can be optimized by passing an Objective, which then scores
+    every candidate with its own O(group_size) delta. With Constraints, candidates that would split a
+    must-link set or join a cannot-link pair are masked out.
+    """
+
+    @staticmethod
+    def __block(sym: np.ndarray | SparseAffinity | PackedAffinity, rows: list[int], cols: list[int]) -> np.ndarray:
+        """
+        Extracts the mutual scores between two sets of users.
+        Args:
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph.
+            rows (list[int]): Indices of the users giving the rows of the block.
+            cols (list[int]): Indices of the users giving the columns of the block.
+        Returns:
+            np.ndarray: A len(rows) x len(cols) matrix of mutual scores.
+        """
+        if isinstance(sym, (SparseAffinity, PackedAffinity)):
+            return sym.block(rows, cols)
+        return sym[np.ix_(rows, cols)]
+
+    @staticmethod
+    def __improve_pair(
+        groups: list[list[int]],
+        a: int,
+        b: int,
+        sym: np.ndarray | SparseAffinity | PackedAffinity,
+        constraints: Optional[Constraints] = None
+    ) -> bool:
+        """
+        Applies the best improving swap or move between two groups, if any.
+        For a in A and b in B, swapping them changes the score by
+        S[b, A] + S[a, B] - S[a, A] - S[b, B] - 2 S[a, b], which is evaluated for all pairs at once
+        from the |A| x |B| cross block, i.e. in O(group_size) per candidate.
+        Args:
+            groups (list[list[int]]): The partition, modified in place.
+            a (int): Position of the first group.
+            b (int): Position of the second group.
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph.
+            constraints (Optional[Constraints]): Constraints the partition must keep satisfying.
+        Returns:
+            bool: True if the partition was improved.
+        """
+        group_a, group_b = groups[a], groups[b]
+        inner_a = LocalSearch.__block(sym, group_a, group_a).sum(axis=1)
+        inner_b = LocalSearch.__block(sym, group_b, group_b).sum(axis=1)
+        cross = LocalSearch.__block(sym, group_a, group_b)
+        a_to_b = cross.sum(axis=1)
+        b_to_a = cross.sum(axis=0)
+
+        swap = (b_to_a[None, :] - inner_a[:, None]) + (a_to_b[:, None] - inner_b[None, :]) - 2 * cross
+        if constraints is not None:
+            swap = np.where(constraints.swap_mask(group_a, group_b), swap, -np.inf)
+        i, j = np.unravel_index(np.argmax(swap), swap.shape)
+        best_delta, best_move = swap[i, j], ("swap", i, j)
+
+        if len(group_a) == len(group_b) + 1:
+            gains = a_to_b - inner_a
+            if constraints is not None:
+                gains = np.where(constraints.move_mask(group_a, group_b), gains, -np.inf)
+            k = int(np.argmax(gains))
+            if gains[k] > best_delta:
+                best_delta, best_move = gains[k], ("a_to_b", k, None)
+        elif len(group_b) == len(group_a) + 1:
+            gains = b_to_a - inner_b
+            if constraints is not None:
+                gains = np.where(constraints.move_mask(group_b, group_a), gains, -np.inf)
+            k = int(np.argmax(gains))
+            if gains[k] > best_delta:
+                best_delta, best_move = gains[k], ("b_to_a", k, None)
+
+        if best_delta <= 0:
+            return False
+
+        kind, i, j = best_move
+        if kind == "swap":
+            group_a[i], group_b[j] = group_b[j], group_a[i]
+        elif kind == "a_to_b":
+            group_b.append(group_a.pop(i))
+        else:
+            group_a.append(group_b.pop(i))
+        return True
+
+    @staticmethod
+    def __improve_pair_objective(
+        groups: list[list[int]],
+        a: int,
+        b: int,
+        objective: Objective,
+        constraints: Optional[Constraints] = None
+    ) -> bool:
+        """
+        Applies the best improving swap or move between two groups for an objective, if any.
+        Args:
+            groups (list[list[int]]): The partition bound to the objective, modified in place.
+            a (int): Position of the first group.
+            b (int): Position of the second group.
+            objective (Objective): The objective, bound to the partition.
+            constraints (Optional[Constraints]): Constraints the partition must keep satisfying.
+        Returns:
+            bool: True if the partition was improved.
+        """
+        group_a, group_b = groups[a], groups[b]
+        if constraints is not None:
+            swappable = constraints.swap_mask(group_a, group_b)
+        else:
+            swappable = np.ones((len(group_a), len(group_b)), dtype=bool)
+        best_delta, best_move = 0.0, None
+        for row, i in enumerate(group_a):
+            for column, j in enumerate(group_b):
+                if not swappable[row, column]:
+                    continue
+                delta = objective.swap_delta(i, j)
+                if delta > best_delta:
+                    best_delta, best_move = delta, (i, j)
+
+        if len(group_a) == len(group_b) + 1:
+            users, target = group_a, b
+        elif len(group_b) == len(group_a) + 1:
+            users, target = group_b, a
+        else:
+            users, target = [], None
+        if users and constraints is not None:
+            users = [i for i, movable in zip(users, constraints.move_mask(users, groups[target])) if movable]
+        for i in users:
+            delta = objective.move_delta(i, target)
+            if delta > best_delta:
+                best_delta, best_move = delta, (i, None)
+
+        if best_move is None:
+            return False
+        i, j = best_move
+        if j is None:
+            objective.move(i, target)
+        else:
+            objective.swap(i, j)
+        return True
+
+    @staticmethod
+    def __neighbor_groups(sym: np.ndarray | SparseAffinity | PackedAffinity, members: list[int], labels: np.ndarray) -> set[int]:
+        """
+        Finds the groups holding at least one user with a non-zero mutual score with a member.
+        With non-negative scores, swaps and moves between groups that share no such pair cannot improve
+        the partition (for the total score as for the objectives built from the same scores), so only these
+        groups need to be examined.
+        Args:
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph.
+            members (list[int]): Indices of the users of a group.
+            labels (np.ndarray): Group position of every user.
+        Returns:
+            set[int]: Positions of the connected groups.
+        """
+        if isinstance(sym, SparseAffinity):
+            connected = np.concatenate([sym.neighbors(i)[0] for i in members])
+        elif isinstance(sym, PackedAffinity):
+            connected = np.flatnonzero(sym.block(members, np.arange(sym.size)).any(axis=0))
+        else:
+            connected = np.flatnonzero(sym[members].any(axis=0))
+        return set(labels[connected].tolist())
+
+    @staticmethod
+    def refine(
+        groups: list[list[int]],
+        sym: np.ndarray | SparseAffinity | PackedAffinity,
+        max_iterations: int = 100,
+        time_limit: Optional[float] = None,
+        objective: Optional[Objective] = None,
+        constraints: Optional[Constraints] = None
+    ) -> list[list[int]]:
+        """
+        Improves a partition until no swap or move increases the score, or a budget is exhausted.
+        The first pass examines every pair of connected groups; later passes only revisit groups
+        that changed during the previous pass. Scores are expected to be non-negative.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices.
+            sym (np.ndarray | SparseAffinity | PackedAffinity): The symmetrized affinity matrix or graph.
+            max_iterations (int): Maximum number of passes.
+            time_limit (Optional[float]): Wall-clock budget in seconds, or None for no limit.
+            objective (Optional[Objective]): Objective to maximize instead of the total score of sym.
+            constraints (Optional[Constraints]): Constraints satisfied by the groups, which every change keeps.
+        Returns:
+            list[list[int]]: The refined groups; the input lists are not modified.
+        """
+        if objective is not None:
+            objective.bind(groups)
+            groups = objective.groups
+        else:
+            groups = [list(group) for group in groups]
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        labels = np.zeros(sum(len(group) for group in groups), dtype=np.intp)
+        for position, group in enumerate(groups):
+            labels[group] = position
+        pending = set(range(len(groups)))
+
+        for _ in range(max_iterations):
+            if not pending:
+                break
+            changed = set()
+            for a in sorted(pending):
+                for b in sorted(LocalSearch.__neighbor_groups(sym, groups[a], labels)):
+                    if b == a or (b in pending and b < a):
+                        continue
+                    if deadline is not None and time.perf_counter() > deadline:
+                        return [list(group) for group in groups]
+                    if objective is not None:
+                        improved = LocalSearch.__improve_pair_objective(groups, a, b, objective, constraints)
+                    else:
+                        improved = LocalSearch.__improve_pair(groups, a, b, sym, constraints)
+                    if improved:
+                        labels[groups[a]] = a
+                        labels[groups[b]] = b
+                        changed |= {a, b}
+            pending = changed
+
+        return [list(group) for group in groups]
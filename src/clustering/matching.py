@@ -0,0 +1,413 @@
+import time
+from typing import Optional
+
+import numpy as np
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+class PairMatching:
+    """
+    Optimal pairing engine used when groups have two members.
+    Pairs are a maximum-weight matching on the symmetrized affinity graph, computed with Edmonds'
+    blossom algorithm in Galil's O(n³) primal-dual formulation. With integer scores every dual
+    update stays integral, so the result is exact.
+    """
+
+    @staticmethod
+    def max_weight_matching(
+        edges: list[tuple[int, int, int]],
+        max_cardinality: bool = False,
+        deadline: Optional[float] = None
+    ) -> Optional[list[int]]:
+        """
+        Computes a maximum-weight matching of a general graph.
+        Args:
+            edges (list[tuple[int, int, int]]): Undirected edges (i, j, weight) with i != j and integer weights.
+            max_cardinality (bool): If True, only matchings of maximum cardinality are considered.
+            deadline (Optional[float]): time.perf_counter() value after which the search is abandoned; it is
+                checked before every augmentation stage.
+        Returns:
+            Optional[list[int]]: mate[v] is the vertex matched with v, or -1 if v is unmatched.
+                The list covers vertices 0..max vertex index appearing in edges. None if the deadline passed.
+        """
+        if not edges:
+            return []
+
+        edge_count = len(edges)
+        vertex_count = 1 + max(max(i, j) for i, j, _ in edges)
+        max_weight = max(0, max(weight for _, _, weight in edges))
+
+        # Edge k has endpoints 2k (edges[k][0]) and 2k + 1 (edges[k][1]).
+        endpoint = [edges[p // 2][p % 2] for p in range(2 * edge_count)]
+        neighbor_ends: list[list[int]] = [[] for _ in range(vertex_count)]
+        for k, (i, j, _) in enumerate(edges):
+            neighbor_ends[i].append(2 * k + 1)
+            neighbor_ends[j].append(2 * k)
+
+        mate = vertex_count * [-1]
+        # Vertices are 0..n-1, non-trivial blossoms n..2n-1. Labels: 0 free, 1 S (outer), 2 T (inner).
+        label = (2 * vertex_count) * [0]
+        label_end = (2 * vertex_count) * [-1]
+        in_blossom = list(range(vertex_count))
+        blossom_parent = (2 * vertex_count) * [-1]
+        blossom_children: list = (2 * vertex_count) * [None]
+        blossom_base = list(range(vertex_count)) + vertex_count * [-1]
+        blossom_endpoints: list = (2 * vertex_count) * [None]
+        best_edge = (2 * vertex_count) * [-1]
+        blossom_best_edges: list = (2 * vertex_count) * [None]
+        unused_blossoms = list(range(vertex_count, 2 * vertex_count))
+        dual = vertex_count * [max_weight] + vertex_count * [0]
+        allowed = edge_count * [False]
+        queue: list[int] = []
+
+        def slack(k: int) -> int:
+            i, j, weight = edges[k]
+            return dual[i] + dual[j] - 2 * weight
+
+        def leaves(b: int):
+            if b < vertex_count:
+                yield b
+            else:
+                for child in blossom_children[b]:
+                    if child < vertex_count:
+                        yield child
+                    else:
+                        yield from leaves(child)
+
+        def assign_label(w: int, t: int, p: int) -> None:
+            b = in_blossom[w]
+            label[w] = label[b] = t
+            label_end[w] = label_end[b] = p
+            best_edge[w] = best_edge[b] = -1
+            if t == 1:
+                queue.extend(leaves(b))
+            elif t == 2:
+                base = blossom_base[b]
+                assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+        def scan_blossom(v: int, w: int) -> int:
+            # Walks up the alternating trees from v and w; returns the base of a new blossom or -1.
+            path = []
+            base = -1
+            while v != -1 or w != -1:
+                b = in_blossom[v]
+                if label[b] & 4:
+                    base = blossom_base[b]
+                    break
+                path.append(b)
+                label[b] = 5
+                if label_end[b] == -1:
+                    v = -1
+                else:
+                    v = endpoint[label_end[b]]
+                    b = in_blossom[v]
+                    v = endpoint[label_end[b]]
+                if w != -1:
+                    v, w = w, v
+            for b in path:
+                label[b] = 1
+            return base
+
+        def add_blossom(base: int, k: int) -> None:
+            v, w, _ = edges[k]
+            base_blossom = in_blossom[base]
+            bv = in_blossom[v]
+            bw = in_blossom[w]
+            b = unused_blossoms.pop()
+            blossom_base[b] = base
+            blossom_parent[b] = -1
+            blossom_parent[base_blossom] = b
+            blossom_children[b] = path = []
+            blossom_endpoints[b] = ends = []
+            while bv != base_blossom:
+                blossom_parent[bv] = b
+                path.append(bv)
+                ends.append(label_end[bv])
+                v = endpoint[label_end[bv]]
+                bv = in_blossom[v]
+            path.append(base_blossom)
+            path.reverse()
+            ends.reverse()
+            ends.append(2 * k)
+            while bw != base_blossom:
+                blossom_parent[bw] = b
+                path.append(bw)
+                ends.append(label_end[bw] ^ 1)
+                w = endpoint[label_end[bw]]
+                bw = in_blossom[w]
+            label[b] = 1
+            label_end[b] = label_end[base_blossom]
+            dual[b] = 0
+            for v in leaves(b):
+                if label[in_blossom[v]] == 2:
+                    queue.append(v)
+                in_blossom[v] = b
+
+            best_edge_to = (2 * vertex_count) * [-1]
+            for bv in path:
+                if blossom_best_edges[bv] is None:
+                    edge_lists = [[p // 2 for p in neighbor_ends[v]] for v in leaves(bv)]
+                else:
+                    edge_lists = [blossom_best_edges[bv]]
+                for edge_list in edge_lists:
+                    for k in edge_list:
+                        i, j, _ = edges[k]
+                        if in_blossom[j] == b:
+                            i, j = j, i
+                        bj = in_blossom[j]
+                        if bj != b and label[bj] == 1 and (best_edge_to[bj] == -1 or slack(k) < slack(best_edge_to[bj])):
+                            best_edge_to[bj] = k
+                blossom_best_edges[bv] = None
+                best_edge[bv] = -1
+            blossom_best_edges[b] = [k for k in best_edge_to if k != -1]
+            best_edge[b] = -1
+            for k in blossom_best_edges[b]:
+                if best_edge[b] == -1 or slack(k) < slack(best_edge[b]):
+                    best_edge[b] = k
+
+        def expand_blossom(b: int, end_stage: bool) -> None:
+            for s in blossom_children[b]:
+                blossom_parent[s] = -1
+                if s < vertex_count:
+                    in_blossom[s] = s
+                elif end_stage and dual[s] == 0:
+                    expand_blossom(s, end_stage)
+                else:
+                    for v in leaves(s):
+                        in_blossom[v] = s
+            if not end_stage and label[b] == 2:
+                # Relabel the children along the even-length path from the entry child to the base.
+                entry_child = in_blossom[endpoint[label_end[b] ^ 1]]
+                j = blossom_children[b].index(entry_child)
+                if j & 1:
+                    j -= len(blossom_children[b])
+                    step, trick = 1, 0
+                else:
+                    step, trick = -1, 1
+                p = label_end[b]
+                while j != 0:
+                    label[endpoint[p ^ 1]] = 0
+                    label[endpoint[blossom_endpoints[b][j - trick] ^ trick ^ 1]] = 0
+                    assign_label(endpoint[p ^ 1], 2, p)
+                    allowed[blossom_endpoints[b][j - trick] // 2] = True
+                    j += step
+                    p = blossom_endpoints[b][j - trick] ^ trick
+                    allowed[p // 2] = True
+                    j += step
+                bv = blossom_children[b][j]
+                label[endpoint[p ^ 1]] = label[bv] = 2
+                label_end[endpoint[p ^ 1]] = label_end[bv] = p
+                best_edge[bv] = -1
+                j += step
+                while blossom_children[b][j] != entry_child:
+                    bv = blossom_children[b][j]
+                    if label[bv] == 1:
+                        j += step
+                        continue
+                    reached = -1
+                    for v in leaves(bv):
+                        if label[v] != 0:
+                            reached = v
+                            break
+                    if reached != -1:
+                        label[reached] = 0
+                        label[endpoint[mate[blossom_base[bv]]]] = 0
+                        assign_label(reached, 2, label_end[reached])
+                    j += step
+            label[b] = label_end[b] = -1
+            blossom_children[b] = blossom_endpoints[b] = None
+            blossom_base[b] = -1
+            blossom_best_edges[b] = None
+            best_edge[b] = -1
+            unused_blossoms.append(b)
+
+        def augment_blossom(b: int, v: int) -> None:
+            # Swaps matched/unmatched edges inside blossom b so that v becomes its base.
+            t = v
+            while blossom_parent[t] != b:
+                t = blossom_parent[t]
+            if t >= vertex_count:
+                augment_blossom(t, v)
+            i = j = blossom_children[b].index(t)
+            if i & 1:
+                j -= len(blossom_children[b])
+                step, trick = 1, 0
+            else:
+                step, trick = -1, 1
+            while j != 0:
+                j += step
+                t = blossom_children[b][j]
+                p = blossom_endpoints[b][j - trick] ^ trick
+                if t >= vertex_count:
+                    augment_blossom(t, endpoint[p])
+                j += step
+                t = blossom_children[b][j]
+                if t >= vertex_count:
+                    augment_blossom(t, endpoint[p ^ 1])
+                mate[endpoint[p]] = p ^ 1
+                mate[endpoint[p ^ 1]] = p
+            blossom_children[b] = blossom_children[b][i:] + blossom_children[b][:i]
+            blossom_endpoints[b] = blossom_endpoints[b][i:] + blossom_endpoints[b][:i]
+            blossom_base[b] = blossom_base[blossom_children[b][0]]
+
+        def augment_matching(k: int) -> None:
+            v, w, _ = edges[k]
+            for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+                while True:
+                    bs = in_blossom[s]
+                    if bs >= vertex_count:
+                        augment_blossom(bs, s)
+                    mate[s] = p
+                    if label_end[bs] == -1:
+                        break
+                    t = endpoint[label_end[bs]]
+                    bt = in_blossom[t]
+                    s = endpoint[label_end[bt]]
+                    j = endpoint[label_end[bt] ^ 1]
+                    if bt >= vertex_count:
+                        augment_blossom(bt, j)
+                    mate[j] = label_end[bt]
+                    p = label_end[bt] ^ 1
+
+        for _ in range(vertex_count):
+            # Each stage either augments the matching or proves it optimal.
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            label[:] = (2 * vertex_count) * [0]
+            best_edge[:] = (2 * vertex_count) * [-1]
+            blossom_best_edges[vertex_count:] = vertex_count * [None]
+            allowed[:] = edge_count * [False]
+            queue[:] = []
+            for v in range(vertex_count):
+                if mate[v] == -1 and label[in_blossom[v]] == 0:
+                    assign_label(v, 1, -1)
+
+            augmented = False
+            while True:
+                while queue and not augmented:
+                    v = queue.pop()
+                    for p in neighbor_ends[v]:
+                        k = p // 2
+                        w = endpoint[p]
+                        if in_blossom[v] == in_blossom[w]:
+                            continue
+                        if not allowed[k]:
+                            k_slack = slack(k)
+                            if k_slack <= 0:
+                                allowed[k] = True
+                        if allowed[k]:
+                            if label[in_blossom[w]] == 0:
+                                assign_label(w, 2, p ^ 1)
+                            elif label[in_blossom[w]] == 1:
+                                base = scan_blossom(v, w)
+                                if base >= 0:
+                                    add_blossom(base, k)
+                                else:
+                                    augment_matching(k)
+                                    augmented = True
+                                    break
+                            elif label[w] == 0:
+                                label[w] = 2
+                                label_end[w] = p ^ 1
+                        elif label[in_blossom[w]] == 1:
+                            b = in_blossom[v]
+                            if best_edge[b] == -1 or k_slack < slack(best_edge[b]):
+                                best_edge[b] = k
+                        elif label[w] == 0:
+                            if best_edge[w] == -1 or k_slack < slack(best_edge[w]):
+                                best_edge[w] = k
+
+                if augmented:
+                    break
+
+                # No augmenting path with tight edges: pick the largest dual update that keeps feasibility.
+                delta_type = -1
+                delta = delta_edge = delta_blossom = None
+                if not max_cardinality:
+                    delta_type = 1
+                    delta = min(dual[:vertex_count])
+                for v in range(vertex_count):
+                    if label[in_blossom[v]] == 0 and best_edge[v] != -1:
+                        d = slack(best_edge[v])
+                        if delta_type == -1 or d < delta:
+                            delta, delta_type, delta_edge = d, 2, best_edge[v]
+                for b in range(2 * vertex_count):
+                    if blossom_parent[b] == -1 and label[b] == 1 and best_edge[b] != -1:
+                        d = slack(best_edge[b]) // 2
+                        if delta_type == -1 or d < delta:
+                            delta, delta_type, delta_edge = d, 3, best_edge[b]
+                for b in range(vertex_count, 2 * vertex_count):
+                    if (blossom_base[b] >= 0 and blossom_parent[b] == -1 and label[b] == 2
+                            and (delta_type == -1 or dual[b] < delta)):
+                        delta, delta_type, delta_blossom = dual[b], 4, b
+                if delta_type == -1:
+                    delta_type = 1
+                    delta = max(0, min(dual[:vertex_count]))
+
+                for v in range(vertex_count):
+                    if label[in_blossom[v]] == 1:
+                        dual[v] -= delta
+                    elif label[in_blossom[v]] == 2:
+                        dual[v] += delta
+                for b in range(vertex_count, 2 * vertex_count):
+                    if blossom_base[b] >= 0 and blossom_parent[b] == -1:
+                        if label[b] == 1:
+                            dual[b] += delta
+                        elif label[b] == 2:
+                            dual[b] -= delta
+
+                if delta_type == 1:
+                    break
+                elif delta_type == 2:
+                    allowed[delta_edge] = True
+                    i, j, _ = edges[delta_edge]
+                    if label[in_blossom[i]] == 0:
+                        i, j = j, i
+                    queue.append(i)
+                elif delta_type == 3:
+                    allowed[delta_edge] = True
+                    i, j, _ = edges[delta_edge]
+                    queue.append(i)
+                else:
+                    expand_blossom(delta_blossom, False)
+
+            if not augmented:
+                break
+            for b in range(vertex_count, 2 * vertex_count):
+                if blossom_parent[b] == -1 and blossom_base[b] >= 0 and label[b] == 1 and dual[b] == 0:
+                    expand_blossom(b, True)
+
+        return [endpoint[m] if m >= 0 else -1 for m in mate]
+
+    @staticmethod
+    def pair(sym: np.ndarray | SparseAffinity, deadline: Optional[float] = None) -> Optional[list[list[int]]]:
+        """
+        Splits users into pairs maximizing the total mutual score.
+        Only positive scores are given to the matching; users it leaves unmatched are paired in index order,
+        which adds no score, and with an odd number of users the last one forms a group of one,
+        as __compute_balanced_group_sizes does for a group size of 2.
+        Args:
+            sym (np.ndarray | SparseAffinity): The symmetrized affinity matrix or graph (non-negative scores).
+            deadline (Optional[float]): time.perf_counter() value after which the matching is abandoned.
+        Returns:
+            Optional[list[list[int]]]: Pairs of user indices, followed by the single leftover user if any, or None
+                if the deadline passed.
+        """
+        if isinstance(sym, SparseAffinity):
+            size = sym.size
+            rows, cols, weights = sym.entry_rows(), sym.indices, sym.data
+        else:
+            size = len(sym)
+            rows, cols = np.nonzero(sym)
+            weights = sym[rows, cols]
+        upper = (rows < cols) & (weights > 0)
+        edges = list(zip(rows[upper].tolist(), cols[upper].tolist(), weights[upper].tolist()))
+
+        mate = PairMatching.max_weight_matching(edges, deadline=deadline)
+        if mate is None:
+            return None
+        mate += [-1] * (size - len(mate))
+        groups = [[i, j] for i, j in enumerate(mate) if i < j]
+        leftovers = [i for i, j in enumerate(mate) if j == -1]
+        groups += [leftovers[k:k + 2] for k in range(0, len(leftovers), 2)]
+        return groups
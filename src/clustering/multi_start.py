@@ -0,0 +1,203 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+from src.clustering.constraints import Constraints
+from src.clustering.objectives import Objective, Objectives
+from src.clustering.packed_affinity import PackedAffinity
+from src.clustering.shared_arrays import SharedArrays
+from src.clustering.sparse_affinity import SparseAffinity
+
+Affinity = np.ndarray | SparseAffinity | PackedAffinity
+Solver = Callable[[Affinity, Optional[np.random.Generator]], tuple[list[list[int]], int]]
+
+_worker_state: dict = {}
+
+
+class MultiStart:
+    """
+    Runs several independent starts of a clustering solver and keeps the best partition.
+    Start 0 is deterministic; every other start receives its own random generator.
+    With several workers, the starts run in a process pool and the affinity data, the directed scores of the
+    objective and the constraint arrays are shared through shared memory, so they are copied once per machine
+    instead of pickled per task. The solvers themselves are sent once per worker; tasks only carry a seed.
+    """
+
+    @staticmethod
+    def __to_arrays(sym: Affinity) -> dict[str, np.ndarray]:
+        """
+        Splits an affinity matrix or graph into plain arrays that can be shared.
+        Args:
+            sym (Affinity): The symmetrized affinity matrix or graph.
+        Returns:
+            dict[str, np.ndarray]: Arrays by name.
+        """
+        if isinstance(sym, SparseAffinity):
+            return {"indptr": sym.indptr, "indices": sym.indices, "data": sym.data}
+        if isinstance(sym, PackedAffinity):
+            return {"packed": sym.data, "size": np.array([sym.size])}
+        return {"sym": sym}
+
+    @staticmethod
+    def _from_arrays(arrays: dict[str, np.ndarray]) -> Affinity:
+        """
+        Rebuilds an affinity matrix or graph from the arrays produced by __to_arrays.
+        Args:
+            arrays (dict[str, np.ndarray]): Arrays by name.
+        Returns:
+            Affinity: The symmetrized affinity matrix or graph.
+        """
+        if "sym" in arrays:
+            return arrays["sym"]
+        if "packed" in arrays:
+            return PackedAffinity(int(arrays["size"][0]), arrays["packed"])
+        return SparseAffinity(len(arrays["indptr"]) - 1, arrays["indptr"], arrays["indices"], arrays["data"])
+
+    @staticmethod
+    def __extra_arrays(objective: Optional[Objective], constraints: Optional[Constraints]) -> dict[str, np.ndarray]:
+        """
+        Lists the arrays of the objective and constraints that are shared with the workers.
+        Args:
+            objective (Optional[Objective]): Objective passed to every start, or None.
+            constraints (Optional[Constraints]): Constraints passed to every start, or None.
+        Returns:
+            dict[str, np.ndarray]: Arrays by name.
+        """
+        arrays = {}
+        if objective is not None:
+            arrays["objective"] = objective.directed
+        if constraints is not None:
+            arrays["nodes"], arrays["separated"] = constraints.nodes, constraints.separated
+        return arrays
+
+    @staticmethod
+    def _attach_worker(
+        handles: dict[str, tuple[str, tuple[int, ...], str]],
+        solvers: list[Callable],
+        objective: Optional[str],
+        count: Optional[int]
+    ) -> None:
+        """
+        Process pool initializer: maps the shared data and receives the solvers once per worker.
+        Args:
+            handles (dict[str, tuple[str, tuple[int, ...], str]]): Shared memory handles.
+            solvers (list[Callable]): The distinct solvers of the run.
+            objective (Optional[str]): Name of the objective rebuilt from the shared directed scores, or None.
+            count (Optional[int]): Number of super-nodes of the constraints rebuilt from the shared arrays, or None.
+        Returns:
+            None
+        """
+        arrays, blocks = SharedArrays.attach(handles)
+        extras = {}
+        if objective is not None:
+            extras["objective"] = Objectives.create(objective, arrays.pop("objective"))
+        if count is not None:
+            extras["constraints"] = Constraints(arrays.pop("nodes"), count, arrays.pop("separated"))
+        _worker_state["blocks"] = blocks
+        _worker_state["sym"] = MultiStart._from_arrays(arrays)
+        _worker_state["solvers"] = solvers
+        _worker_state["extras"] = extras
+
+    @staticmethod
+    def _run_worker_start(solver: int, seed: Optional[np.random.SeedSequence]) -> tuple[list[list[int]], int]:
+        """
+        Runs one start inside a pool worker against the shared data.
+        Args:
+            solver (int): Position of the solver among those received by the worker.
+            seed (Optional[np.random.SeedSequence]): Seed of the start, or None for the deterministic start.
+        Returns:
+            tuple[list[list[int]], int]: Groups and score of the start.
+        """
+        rng = None if seed is None else np.random.default_rng(seed)
+        return _worker_state["solvers"][solver](_worker_state["sym"], rng, **_worker_state["extras"])
+
+    @staticmethod
+    def run(
+        solve: Solver,
+        sym: Affinity,
+        restarts: int,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        objective: Optional[Objective] = None,
+        constraints: Optional[Constraints] = None
+    ) -> tuple[list[list[int]], int]:
+        """
+        Runs `restarts` starts of `solve` and returns the best one.
+        Args:
+            solve (Solver): Picklable callable taking the affinity and an optional random generator.
+            sym (Affinity): The symmetrized affinity matrix or graph.
+            restarts (int): Number of starts, including the deterministic one.
+            workers (int): Number of worker processes; 1 runs every start in the current process.
+            seed (Optional[int]): Seed of the random starts, for reproducible results.
+            objective (Optional[Objective]): Objective passed to every start as the `objective` keyword; with
+                several workers it is rebuilt in each worker from its shared directed scores.
+            constraints (Optional[Constraints]): Constraints passed to every start as the `constraints` keyword;
+                with several workers they are rebuilt in each worker from their shared arrays.
+        Returns:
+            tuple[list[list[int]], int]: Groups and score of the best start (earliest start on ties).
+        """
+        seeds = [None] + np.random.SeedSequence(seed).spawn(max(restarts, 1) - 1)
+        results = MultiStart.__execute([solve] * len(seeds), seeds, sym, workers, objective, constraints)
+        best = max(range(len(results)), key=lambda k: (results[k][1], -k))
+        return results[best]
+
+    @staticmethod
+    def map(solvers: list[Callable], sym: Affinity, workers: int = 1) -> list:
+        """
+        Runs the deterministic start of several solvers against the same affinity data.
+        Args:
+            solvers (list[Callable]): Picklable callables taking the affinity and an optional random generator.
+            sym (Affinity): The symmetrized affinity matrix or graph.
+            workers (int): Number of worker processes; 1 runs every solver in the current process.
+        Returns:
+            list: The result of every solver, in order.
+        """
+        return MultiStart.__execute(solvers, [None] * len(solvers), sym, workers)
+
+    @staticmethod
+    def __execute(
+        solvers: list[Callable],
+        seeds: list[Optional[np.random.SeedSequence]],
+        sym: Affinity,
+        workers: int,
+        objective: Optional[Objective] = None,
+        constraints: Optional[Constraints] = None
+    ) -> list:
+        """
+        Runs solvers with their seeds, in a process pool sharing the affinity data when workers > 1.
+        Args:
+            solvers (list[Callable]): Picklable solvers.
+            seeds (list[Optional[np.random.SeedSequence]]): Seed of every run, or None for a deterministic run.
+            sym (Affinity): The symmetrized affinity matrix or graph.
+            workers (int): Number of worker processes.
+            objective (Optional[Objective]): Objective passed to every run, or None.
+            constraints (Optional[Constraints]): Constraints passed to every run, or None.
+        Returns:
+            list: The result of every run, in order.
+        """
+        if workers <= 1 or len(solvers) == 1:
+            extras = {
+                name: value for name, value in (("objective", objective), ("constraints", constraints))
+                if value is not None
+            }
+            return [
+                solve(sym, None if s is None else np.random.default_rng(s), **extras)
+                for solve, s in zip(solvers, seeds)
+            ]
+
+        distinct = list({id(solve): solve for solve in solvers}.values())
+        first_seen: dict[int, int] = {}
+        positions = [first_seen.setdefault(id(solve), len(first_seen)) for solve in solvers]
+        arrays = {**MultiStart.__to_arrays(sym), **MultiStart.__extra_arrays(objective, constraints)}
+        with SharedArrays(arrays) as shared:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(solvers)),
+                initializer=MultiStart._attach_worker,
+                initargs=(
+                    shared.handles,
+                    distinct,
+                    None if objective is None else objective.name,
+                    None if constraints is None else constraints.count
+                )
+            ) as pool:
+                return list(pool.map(MultiStart._run_worker_start, positions, seeds))
@@ -0,0 +1,546 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from typing import Optional
+
+import numpy as np
+
+
+class Objective(ABC):
+    """
+    Base class of the clustering objectives. Every objective is maximized.
+    An objective is built from the directed score matrix and evaluates whole partitions with vectorized
+    np.ix_ sub-matrix sums. Engines that improve a partition step by step first bind the objective to it,
+    then ask for the change caused by a swap or a move (in O(group_size)) and report the applied changes.
+    Objectives that are a sum over the pairs of a group expose their symmetric pair weights, so the engines
+    working on a symmetrized matrix (greedy, matching, exact search, ...) can optimize them directly; they
+    also derive those weights from the preference triplets, so that no dense matrix is needed to build them.
+    """
+
+    name = ""
+
+    def __init__(self, directed: np.ndarray) -> None:
+        """
+        Initializes the objective.
+        Args:
+            directed (np.ndarray): Directed scores; directed[i, j] is the score given by user i to user j.
+        Returns:
+            None
+        """
+        self.directed = directed
+        self.groups: list[list[int]] = []
+        self.labels = np.zeros(len(directed), dtype=np.intp)
+
+    @property
+    def weights(self) -> Optional[np.ndarray]:
+        """
+        Returns the symmetric pair weights of a pairwise objective.
+        Returns:
+            Optional[np.ndarray]: The weights, or None if the objective is not a sum over pairs.
+        """
+        return None
+
+    @abstractmethod
+    def evaluate(self, groups: list[list[int]]) -> int:
+        """
+        Evaluates a whole partition.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices.
+        Returns:
+            int: Value of the objective.
+        """
+
+    def bind(self, groups: list[list[int]]) -> None:
+        """
+        Binds the objective to a partition, which is then changed through swap and move.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices; they are copied.
+        Returns:
+            None
+        """
+        self.groups = [list(group) for group in groups]
+        for position, group in enumerate(self.groups):
+            self.labels[group] = position
+
+    @abstractmethod
+    def swap_delta(self, a: int, b: int) -> float:
+        """
+        Computes the change of the objective if two users of different groups are exchanged.
+        Args:
+            a (int): Index of the first user.
+            b (int): Index of the second user.
+        Returns:
+            float: The change (positive when the objective improves).
+        """
+
+    @abstractmethod
+    def move_delta(self, a: int, target: int) -> float:
+        """
+        Computes the change of the objective if a user moves to another group.
+        Args:
+            a (int): Index of the user.
+            target (int): Position of the destination group.
+        Returns:
+            float: The change (positive when the objective improves).
+        """
+
+    def swap(self, a: int, b: int) -> None:
+        """
+        Exchanges two users of different groups in the bound partition.
+        Args:
+            a (int): Index of the first user.
+            b (int): Index of the second user.
+        Returns:
+            None
+        """
+        group_a, group_b = self.labels[a], self.labels[b]
+        members_a, members_b = self.groups[group_a], self.groups[group_b]
+        members_a[members_a.index(a)] = b
+        members_b[members_b.index(b)] = a
+        self.labels[a], self.labels[b] = group_b, group_a
+
+    def move(self, a: int, target: int) -> None:
+        """
+        Moves a user to another group of the bound partition.
+        Args:
+            a (int): Index of the user.
+            target (int): Position of the destination group.
+        Returns:
+            None
+        """
+        self.groups[self.labels[a]].remove(a)
+        self.groups[target].append(a)
+        self.labels[a] = target
+
+
+class PairwiseObjective(Objective):
+    """
+    Objective equal to a constant plus the sum, over every group, of the symmetric weights of its pairs.
+    """
+
+    def __init__(self, directed: np.ndarray, weights: np.ndarray, offset: int = 0) -> None:
+        """
+        Initializes the objective.
+        Args:
+            directed (np.ndarray): Directed scores.
+            weights (np.ndarray): Symmetric pair weights with a zero diagonal.
+            offset (int): Constant added to the sum of the weights.
+        Returns:
+            None
+        """
+        super().__init__(directed)
+        self.__weights = weights
+        self.offset = offset
+
+    @property
+    def weights(self) -> np.ndarray:
+        """
+        Returns the symmetric pair weights.
+        Returns:
+            np.ndarray: The weights.
+        """
+        return self.__weights
+
+    @staticmethod
+    @abstractmethod
+    def pair_triplets(
+        rows: np.ndarray,
+        cols: np.ndarray,
+        scores: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Derives the weights from the directed scores in COO form, in O(nnz).
+        Args:
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, int]: Directed weights in COO form, whose symmetrized
+                sums (weight[i, j] + weight[j, i], zero diagonal) are the pair weights, and the offset.
+        """
+
+    def evaluate(self, groups: list[list[int]]) -> int:
+        """
+        Evaluates a whole partition from the np.ix_ blocks of the weights.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices.
+        Returns:
+            int: Value of the objective.
+        """
+        return self.offset + sum(int(self.__weights[np.ix_(group, group)].sum()) for group in groups) // 2
+
+    def swap_delta(self, a: int, b: int) -> float:
+        """
+        Computes W[b, A] + W[a, B] - W[a, A] - W[b, B] - 2 W[a, b] in O(group_size).
+        Args:
+            a (int): Index of the first user.
+            b (int): Index of the second user.
+        Returns:
+            float: The change of the objective.
+        """
+        members_a, members_b = self.groups[self.labels[a]], self.groups[self.labels[b]]
+        row_a, row_b = self.__weights[a], self.__weights[b]
+        return float(
+            row_b[members_a].sum() + row_a[members_b].sum()
+            - row_a[members_a].sum() - row_b[members_b].sum() - 2 * row_a[b]
+        )
+
+    def move_delta(self, a: int, target: int) -> float:
+        """
+        Computes W[a, B] - W[a, A] in O(group_size).
+        Args:
+            a (int): Index of the user.
+            target (int): Position of the destination group.
+        Returns:
+            float: The change of the objective.
+        """
+        row = self.__weights[a]
+        return float(row[self.groups[target]].sum() - row[self.groups[self.labels[a]]].sum())
+
+
+class SumObjective(PairwiseObjective):
+    """
+    Total affinity: the sum over all groups of the scores the members gave to each other.
+    """
+
+    name = "sum"
+
+    def __init__(self, directed: np.ndarray) -> None:
+        """
+        Initializes the objective.
+        Args:
+            directed (np.ndarray): Directed scores.
+        Returns:
+            None
+        """
+        weights = directed + directed.T
+        np.fill_diagonal(weights, 0)
+        super().__init__(directed, weights)
+
+    @staticmethod
+    def pair_triplets(
+        rows: np.ndarray,
+        cols: np.ndarray,
+        scores: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Keeps the directed scores as they are.
+        Args:
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, int]: The same triplets and a zero offset.
+        """
+        return rows, cols, scores, 0
+
+
+class EnvyObjective(PairwiseObjective):
+    """
+    Unhonored picks: minus the number of (picker, picked) pairs whose members ended up in different groups.
+    A pick is any positive score; a value of 0 means that every pick was honored.
+    """
+
+    name = "envy"
+
+    def __init__(self, directed: np.ndarray) -> None:
+        """
+        Initializes the objective.
+        Args:
+            directed (np.ndarray): Directed scores.
+        Returns:
+            None
+        """
+        picks = (directed > 0).astype(np.int64)
+        np.fill_diagonal(picks, 0)
+        super().__init__(directed, picks + picks.T, -int(picks.sum()))
+
+    @staticmethod
+    def pair_triplets(
+        rows: np.ndarray,
+        cols: np.ndarray,
+        scores: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Turns every pick (positive score to another user) into a weight of 1.
+        Args:
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, int]: The picks with unit weights, and minus their count.
+        """
+        picked = (scores > 0) & (rows != cols)
+        count = int(np.count_nonzero(picked))
+        return rows[picked], cols[picked], np.ones(count, dtype=np.int64), -count
+
+
+class MaximinObjective(Objective):
+    """
+    Worst-off student satisfaction, where the satisfaction of a student is the sum of the scores they gave
+    to the members of their group. Deltas break ties on the minimum, scaled below 1/2, first with the number
+    of students at the minimum and then with the total affinity, so that engines can cross the plateaus where
+    several students share the minimum and keep improving the others when the worst-off one cannot be helped.
+    """
+
+    name = "maximin"
+
+    def __init__(self, directed: np.ndarray) -> None:
+        """
+        Initializes the objective.
+        Args:
+            directed (np.ndarray): Directed scores.
+        Returns:
+            None
+        """
+        super().__init__(directed)
+        self.satisfaction = np.zeros(len(directed), dtype=np.int64)
+        self.minima: list[int] = []
+        self.__counts: list[int] = []
+        self.__ranking: list[tuple[int, int]] = []
+        self.__count_scale = 2.0 * (len(directed) + 1)
+        self.__total_scale = self.__count_scale * (2 * float(np.abs(directed).sum()) + 1)
+
+    def evaluate(self, groups: list[list[int]]) -> int:
+        """
+        Evaluates a whole partition from the row sums of the np.ix_ blocks of the directed scores.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices.
+        Returns:
+            int: Lowest satisfaction over all students (0 without students).
+        """
+        return min((int(self.directed[np.ix_(group, group)].sum(axis=1).min()) for group in groups if group), default=0)
+
+    def bind(self, groups: list[list[int]]) -> None:
+        """
+        Binds the objective to a partition and computes the satisfaction of every student.
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices; they are copied.
+        Returns:
+            None
+        """
+        super().bind(groups)
+        self.minima, self.__counts = [], []
+        for group in self.groups:
+            self.satisfaction[group] = self.directed[np.ix_(group, group)].sum(axis=1)
+            minimum, count = MaximinObjective.__lowest(self.satisfaction[group])
+            self.minima.append(minimum)
+            self.__counts.append(count)
+        self.__ranking = sorted((minimum, position) for position, minimum in enumerate(self.minima))
+
+    @staticmethod
+    def __lowest(satisfaction: np.ndarray) -> tuple[int, int]:
+        """
+        Finds the lowest satisfaction of a group and how many members have it.
+        Args:
+            satisfaction (np.ndarray): Satisfaction of the members.
+        Returns:
+            tuple[int, int]: The lowest satisfaction (a very large value for an empty group) and its count.
+        """
+        if not len(satisfaction):
+            return int(np.iinfo(np.int64).max), 0
+        minimum = int(satisfaction.min())
+        return minimum, int((satisfaction == minimum).sum())
+
+    def __others_minimum(self, excluded: tuple[int, ...]) -> int:
+        """
+        Returns the lowest group minimum outside some groups, in O(1).
+        Args:
+            excluded (tuple[int, ...]): Positions of the groups to ignore (at most two).
+        Returns:
+            int: The lowest minimum of the other groups, or a very large value if there is none.
+        """
+        for minimum, position in self.__ranking[:len(excluded) + 1]:
+            if position not in excluded:
+                return minimum
+        return int(np.iinfo(np.int64).max)
+
+    def __delta(self, changes: list[tuple[int, list[int], np.ndarray]]) -> float:
+        """
+        Combines the new satisfactions of the changed groups into the change of the objective.
+        Args:
+            changes (list[tuple[int, list[int], np.ndarray]]): Position, new members and new satisfactions
+                of every changed group.
+        Returns:
+            float: The change of the minimum, plus the tie-breaking changes scaled below 1/2.
+        """
+        old_minimum = self.__ranking[0][0] if self.__ranking else 0
+        new_minimum = self.__others_minimum(tuple(position for position, _, _ in changes))
+        total_change = 0
+        for position, members, satisfaction in changes:
+            if len(members):
+                new_minimum = min(new_minimum, int(satisfaction.min()))
+            total_change += int(satisfaction.sum()) - int(self.satisfaction[self.groups[position]].sum())
+        delta = float(new_minimum - old_minimum) + total_change / self.__total_scale
+
+        if new_minimum == old_minimum:
+            count_change = sum(
+                int((satisfaction == old_minimum).sum())
+                - (self.__counts[position] if self.minima[position] == old_minimum else 0)
+                for position, _, satisfaction in changes
+            )
+            delta -= count_change / self.__count_scale
+        return delta
+
+    def __swapped(self, a: int, b: int) -> list[tuple[int, list[int], np.ndarray]]:
+        """
+        Computes the new satisfactions of the two groups of a swap in O(group_size).
+        Args:
+            a (int): Index of the first user.
+            b (int): Index of the second user.
+        Returns:
+            list[tuple[int, list[int], np.ndarray]]: Position, new members and new satisfactions of both groups.
+        """
+        changes = []
+        for leaving, joining in ((a, b), (b, a)):
+            position = int(self.labels[leaving])
+            stay = [user for user in self.groups[position] if user != leaving]
+            satisfaction = np.append(
+                self.satisfaction[stay] - self.directed[stay, leaving] + self.directed[stay, joining],
+                self.directed[joining, stay].sum()
+            )
+            changes.append((position, stay + [joining], satisfaction))
+        return changes
+
+    def __moved(self, a: int, target: int) -> list[tuple[int, list[int], np.ndarray]]:
+        """
+        Computes the new satisfactions of the two groups of a move in O(group_size).
+        Args:
+            a (int): Index of the user.
+            target (int): Position of the destination group.
+        Returns:
+            list[tuple[int, list[int], np.ndarray]]: Position, new members and new satisfactions of both groups.
+        """
+        source = int(self.labels[a])
+        stay = [user for user in self.groups[source] if user != a]
+        joined = self.groups[target]
+        return [
+            (source, stay, self.satisfaction[stay] - self.directed[stay, a]),
+            (target, joined + [a], np.append(
+                self.satisfaction[joined] + self.directed[joined, a], self.directed[a, joined].sum()
+            )),
+        ]
+
+    def swap_delta(self, a: int, b: int) -> float:
+        """
+        Computes the change of the objective if two users of different groups are exchanged.
+        Args:
+            a (int): Index of the first user.
+            b (int): Index of the second user.
+        Returns:
+            float: The change of the minimum, plus the tie-breaking changes scaled below 1/2.
+        """
+        return self.__delta(self.__swapped(a, b))
+
+    def move_delta(self, a: int, target: int) -> float:
+        """
+        Computes the change of the objective if a user moves to another group.
+        Args:
+            a (int): Index of the user.
+            target (int): Position of the destination group.
+        Returns:
+            float: The change of the minimum, plus the tie-breaking changes scaled below 1/2.
+        """
+        return self.__delta(self.__moved(a, target))
+
+    def __apply(self, changes: list[tuple[int, list[int], np.ndarray]]) -> None:
+        """
+        Stores the new satisfactions, group minima and counts of the changed groups.
+        Args:
+            changes (list[tuple[int, list[int], np.ndarray]]): Position, new members and new satisfactions
+                of every changed group.
+        Returns:
+            None
+        """
+        for position, members, satisfaction in changes:
+            self.satisfaction[members] = satisfaction
+            self.__ranking.pop(bisect_left(self.__ranking, (self.minima[position], position)))
+            self.minima[position], self.__counts[position] = MaximinObjective.__lowest(satisfaction)
+            insort(self.__ranking, (self.minima[position], position))
+
+    def swap(self, a: int, b: int) -> None:
+        """
+        Exchanges two users of different groups and updates the satisfactions.
+        Args:
+            a (int): Index of the first user.
+            b (int): Index of the second user.
+        Returns:
+            None
+        """
+        changes = self.__swapped(a, b)
+        super().swap(a, b)
+        self.__apply(changes)
+
+    def move(self, a: int, target: int) -> None:
+        """
+        Moves a user to another group and updates the satisfactions.
+        Args:
+            a (int): Index of the user.
+            target (int): Position of the destination group.
+        Returns:
+            None
+        """
+        changes = self.__moved(a, target)
+        super().move(a, target)
+        self.__apply(changes)
+
+
+class Objectives:
+    """
+    Registry of the available objectives, by name.
+    """
+
+    REGISTRY: dict[str, type[Objective]] = {
+        SumObjective.name: SumObjective,
+        MaximinObjective.name: MaximinObjective,
+        EnvyObjective.name: EnvyObjective,
+    }
+
+    @staticmethod
+    def names() -> tuple[str, ...]:
+        """
+        Lists the registered objectives.
+        Returns:
+            tuple[str, ...]: Their names.
+        """
+        return tuple(Objectives.REGISTRY)
+
+    @staticmethod
+    def register(objective: type[Objective]) -> type[Objective]:
+        """
+        Registers an objective under its name; usable as a class decorator.
+        Args:
+            objective (type[Objective]): The objective class.
+        Returns:
+            type[Objective]: The same class.
+        """
+        Objectives.REGISTRY[objective.name] = objective
+        return objective
+
+    @staticmethod
+    def lookup(name: str) -> type[Objective]:
+        """
+        Returns the class of a registered objective.
+        Args:
+            name (str): Name of the objective.
+        Returns:
+            type[Objective]: The objective class.
+        Raises:
+            ValueError: If the objective is unknown.
+        """
+        if name not in Objectives.REGISTRY:
+            raise ValueError(f"Unknown clustering objective: {name}")
+        return Objectives.REGISTRY[name]
+
+    @staticmethod
+    def create(name: str, directed: np.ndarray) -> Objective:
+        """
+        Instantiates a registered objective.
+        Args:
+            name (str): Name of the objective.
+            directed (np.ndarray): Directed scores.
+        Returns:
+            Objective: The objective.
+        Raises:
+            ValueError: If the objective is unknown.
+        """
+        return Objectives.lookup(name)(directed)
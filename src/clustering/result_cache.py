@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from src.clustering.exact import OptimalityProof
+
+CachedResult = tuple[list[list[int]], int, Optional[OptimalityProof]]
+
+
+class ResultCache:
+    """
+    Memoizes clustering results by a fingerprint of the preference matrix and of the clustering options.
+    Results are kept in index space (groups of user indices), so a hit only has to map the indices back
+    to the current users. An in-memory LRU tier answers repeated requests of the same process; an optional
+    on-disk tier (one JSON file per result, typically next to the JSON store) survives restarts and is
+    bounded by its total size, evicting the least recently used files first.
+    """
+
+    MAX_ENTRIES = 128
+    MAX_DISK_BYTES = 16 * 1024 * 1024
+    DIRECTORY_NAME = "cluster_cache"
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = MAX_DISK_BYTES
+    ) -> None:
+        """
+        Initializes an empty cache.
+        Args:
+            max_entries (int): Maximum number of results kept in memory.
+            directory (Optional[str]): Directory of the on-disk tier, or None to keep results in memory only.
+            max_disk_bytes (int): Maximum total size of the files of the on-disk tier.
+        Returns:
+            None
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.__entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self.__lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def beside(store_filename: str, max_entries: int = MAX_ENTRIES, max_disk_bytes: int = MAX_DISK_BYTES) -> "ResultCache":
+        """
+        Creates a cache whose on-disk tier lives in the directory of a JSON store.
+        Args:
+            store_filename (str): Path of the JSON store file.
+            max_entries (int): Maximum number of results kept in memory.
+            max_disk_bytes (int): Maximum total size of the files of the on-disk tier.
+        Returns:
+            ResultCache: The cache.
+        """
+        directory = os.path.join(os.path.dirname(os.path.abspath(store_filename)), ResultCache.DIRECTORY_NAME)
+        return ResultCache(max_entries, directory, max_disk_bytes)
+
+    @staticmethod
+    def fingerprint(size: int, rows: np.ndarray, cols: np.ndarray, scores: np.ndarray, **options) -> str:
+        """
+        Computes the content hash of a preference matrix and of the options that influence the result.
+        The preferences are hashed in canonical (row, col) order, so the fingerprint only depends on the matrix.
+        Args:
+            size (int): Number of users.
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+            **options: Clustering options (group size, method, ...); their values must be JSON-serializable.
+        Returns:
+            str: Hexadecimal digest.
+        """
+        order = np.lexsort((cols, rows))
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(np.int64(size).tobytes())
+        for array in (rows, cols):
+            digest.update(np.ascontiguousarray(array[order], dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(scores[order], dtype=np.float64).tobytes())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        """
+        Looks up a result, first in memory and then on disk.
+        Args:
+            key (str): Fingerprint of the request.
+        Returns:
+            Optional[CachedResult]: Groups of user indices, total score and optimality proof (or None),
+                or None on a miss.
+        """
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                return self.__entries[key]
+
+        result = self.__read(key)
+        if result is not None:
+            self.__remember(key, result)
+        return result
+
+    def put(self, key: str, groups: list[list[int]], score: int, proof: Optional[OptimalityProof] = None) -> None:
+        """
+        Stores a result in every tier.
+        Args:
+            key (str): Fingerprint of the request.
+            groups (list[list[int]]): Groups of user indices.
+            score (int): Total affinity score.
+            proof (Optional[OptimalityProof]): Optimality proof of the result, if any.
+        Returns:
+            None
+        """
+        result = ([list(map(int, group)) for group in groups], int(score), proof)
+        self.__remember(key, result)
+        if self.directory is not None:
+            self.__write(key, result)
+            self.__evict_files()
+
+    def clear(self) -> None:
+        """
+        Removes every result from memory and from disk.
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__entries.clear()
+        for path, _, _ in self.__files():
+            os.remove(path)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of results kept in memory.
+        Returns:
+            int: Number of in-memory entries.
+        """
+        return len(self.__entries)
+
+    def __remember(self, key: str, result: CachedResult) -> None:
+        """
+        Inserts a result in the in-memory tier, evicting the least recently used ones.
+        Args:
+            key (str): Fingerprint of the request.
+            result (CachedResult): The result to keep.
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__entries[key] = result
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def __path(self, key: str) -> str:
+        """
+        Returns the file of a result in the on-disk tier.
+        Args:
+            key (str): Fingerprint of the request.
+        Returns:
+            str: Path of the JSON file.
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def __read(self, key: str) -> Optional[CachedResult]:
+        """
+        Reads a result from the on-disk tier and marks it as recently used.
+        Args:
+            key (str): Fingerprint of the request.
+        Returns:
+            Optional[CachedResult]: The result, or None if it is not on disk or unreadable.
+        """
+        if self.directory is None:
+            return None
+        path = self.__path(key)
+        try:
+            with open(path, "r") as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        proof = OptimalityProof(**entry["proof"]) if entry.get("proof") is not None else None
+        return entry["groups"], entry["score"], proof
+
+    def __write(self, key: str, result: CachedResult) -> None:
+        """
+        Writes a result to the on-disk tier atomically.
+        Args:
+            key (str): Fingerprint of the request.
+            result (CachedResult): The result to write.
+        Returns:
+            None
+        """
+        groups, score, proof = result
+        entry = {"groups": groups, "score": score, "proof": None if proof is None else proof.__dict__}
+        path = self.__path(key)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(entry, file)
+        os.replace(temporary, path)
+
+    def __files(self) -> list[tuple[str, float, int]]:
+        """
+        Lists the files of the on-disk tier.
+        Returns:
+            list[tuple[str, float, int]]: Path, last use time and size of every file, least recently used first.
+        """
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_mtime, stat.st_size))
+        return sorted(files, key=lambda file: file[1])
+
+    def __evict_files(self) -> None:
+        """
+        Deletes the least recently used files until the on-disk tier fits in max_disk_bytes.
+        Returns:
+            None
+        """
+        files = self.__files()
+        total = sum(size for _, _, size in files)
+        for path, _, size in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
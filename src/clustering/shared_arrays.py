@@ -0,0 +1,67 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedArrays:
+    """
+    Copies NumPy arrays into named shared memory blocks so worker processes can map them without pickling.
+    The owner creates the blocks and must close them (or use the instance as a context manager);
+    workers attach to them through the picklable `handles`.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        """
+        Allocates one shared memory block per array and copies the data into it.
+        Args:
+            arrays (dict[str, np.ndarray]): Arrays to share, by name.
+        Returns:
+            None
+        """
+        self.blocks: list[shared_memory.SharedMemory] = []
+        self.handles: dict[str, tuple[str, tuple[int, ...], str]] = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.handles[name] = (block.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(
+        handles: dict[str, tuple[str, tuple[int, ...], str]]
+    ) -> tuple[dict[str, np.ndarray], list[shared_memory.SharedMemory]]:
+        """
+        Maps shared arrays created by another process.
+        The returned blocks must be kept alive as long as the arrays are used.
+        Args:
+            handles (dict[str, tuple[str, tuple[int, ...], str]]): The `handles` of a SharedArrays instance.
+        Returns:
+            tuple[dict[str, np.ndarray], list[shared_memory.SharedMemory]]:
+                Read-only array views by name, and the underlying memory blocks.
+        """
+        arrays, blocks = {}, []
+        for name, (block_name, shape, dtype) in handles.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            arrays[name] = array
+            blocks.append(block)
+        return arrays, blocks
+
+    def close(self) -> None:
+        """
+        Releases and unlinks every shared memory block.
+        Returns:
+            None
+        """
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
@@ -0,0 +1,173 @@
+import numpy as np
+
+
+class SparseAffinity:
+    """
+    Compressed sparse row (CSR) representation of the symmetrized affinity graph.
+    Entry (i, j) holds the mutual score matrix[i][j] + matrix[j][i]; the diagonal and zero scores are not stored.
+    Memory and traversal costs are proportional to the number of non-zero entries instead of n².
+    """
+
+    def __init__(self, size: int, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray) -> None:
+        """
+        Initializes the graph from raw CSR arrays.
+        Args:
+            size (int): Number of users (rows and columns).
+            indptr (np.ndarray): Row pointer array of length size + 1.
+            indices (np.ndarray): Column index of each stored entry, sorted within each row.
+            data (np.ndarray): Mutual score of each stored entry.
+        Returns:
+            None
+        """
+        self.size = size
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @staticmethod
+    def from_triplets(size: int, rows: np.ndarray, cols: np.ndarray, scores: np.ndarray) -> "SparseAffinity":
+        """
+        Builds the symmetrized graph from COO-style (row, col, score) preference arrays.
+        Args:
+            size (int): Number of users.
+            rows (np.ndarray): Index of the user giving each score.
+            cols (np.ndarray): Index of the user receiving each score.
+            scores (np.ndarray): Score given by rows[k] to cols[k].
+        Returns:
+            SparseAffinity: The symmetrized CSR graph.
+        """
+        keep = (rows != cols) & (scores != 0)
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        sym_rows = np.concatenate((rows, cols)).astype(np.int64)
+        sym_cols = np.concatenate((cols, rows)).astype(np.int64)
+        keys, inverse = np.unique(sym_rows * size + sym_cols, return_inverse=True)
+        data = np.bincount(inverse.ravel(), weights=np.concatenate((scores, scores)), minlength=len(keys))
+        data = np.rint(data).astype(np.int64)
+
+        nonzero = data != 0
+        keys, data = keys[nonzero], data[nonzero]
+        entry_rows = keys // size if size else keys
+        indices = (keys % size if size else keys).astype(np.intp)
+        indptr = np.zeros(size + 1, dtype=np.intp)
+        np.cumsum(np.bincount(entry_rows, minlength=size), out=indptr[1:])
+
+        return SparseAffinity(size, indptr, indices, data)
+
+    @property
+    def nnz(self) -> int:
+        """
+        Returns the number of stored (non-zero) entries.
+        Returns:
+            int: Number of stored entries, counting (i, j) and (j, i) separately.
+        """
+        return len(self.data)
+
+    def neighbors(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the users connected to a user and the corresponding mutual scores.
+        Args:
+            i (int): Index of the user.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Neighbor indices (ascending) and their mutual scores.
+        """
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def block(self, rows: list[int], cols: list[int]) -> np.ndarray:
+        """
+        Extracts the dense sub-matrix of mutual scores between two sets of users.
+        Args:
+            rows (list[int]): Indices of the users giving the rows of the block.
+            cols (list[int]): Indices of the users giving the columns of the block.
+        Returns:
+            np.ndarray: A len(rows) x len(cols) matrix of mutual scores.
+        """
+        cols = np.asarray(cols, dtype=np.intp)
+        block = np.zeros((len(rows), len(cols)), dtype=np.int64)
+        for k, i in enumerate(rows):
+            neighbors, weights = self.neighbors(i)
+            if len(neighbors) == 0:
+                continue
+            positions = np.minimum(np.searchsorted(neighbors, cols), len(neighbors) - 1)
+            found = neighbors[positions] == cols
+            block[k, found] = weights[positions[found]]
+        return block
+
+    def subgraph(self, users: list[int]) -> "SparseAffinity":
+        """
+        Extracts the graph induced by a subset of users, renumbered in the given order.
+        The cost is proportional to the number of entries in the rows of these users.
+        Args:
+            users (list[int]): Indices of the users to keep; user users[k] becomes k.
+        Returns:
+            SparseAffinity: The induced graph.
+        """
+        users = np.asarray(users, dtype=np.intp)
+        local = np.full(self.size, -1, dtype=np.intp)
+        local[users] = np.arange(len(users))
+
+        lengths = np.diff(self.indptr)[users]
+        starts = np.repeat(self.indptr[users] - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        positions = starts + np.arange(lengths.sum(), dtype=np.intp)
+        rows = np.repeat(np.arange(len(users)), lengths)
+        cols = local[self.indices[positions]]
+        keep = cols >= 0
+        rows, cols, data = rows[keep], cols[keep], self.data[positions][keep]
+
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(len(users) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows, minlength=len(users)), out=indptr[1:])
+        return SparseAffinity(len(users), indptr, cols[order], data[order])
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        """
+        Multiplies the mutual score matrix by a vector in O(nnz).
+        Args:
+            vector (np.ndarray): Vector of length size.
+        Returns:
+            np.ndarray: The product, as a float vector of length size.
+        """
+        return np.bincount(self.entry_rows(), weights=self.data * vector[self.indices], minlength=self.size)
+
+    def to_dense(self) -> np.ndarray:
+        """
+        Expands the graph into a dense symmetrized affinity matrix.
+        Returns:
+            np.ndarray: The size x size matrix of mutual scores.
+        """
+        dense = np.zeros((self.size, self.size), dtype=np.int64)
+        dense[self.entry_rows(), self.indices] = self.data
+        return dense
+
+    def entry_rows(self) -> np.ndarray:
+        """
+        Expands the row pointer array into the row index of every stored entry.
+        Returns:
+            np.ndarray: Array of length nnz giving the row of each entry.
+        """
+        return np.repeat(np.arange(self.size), np.diff(self.indptr))
+
+    def row_sums(self) -> np.ndarray:
+        """
+        Computes the total mutual score of every user with all other users.
+        Returns:
+            np.ndarray: Array of length size with the bidirectional affinity of each user.
+        """
+        sums = np.bincount(self.entry_rows(), weights=self.data, minlength=self.size)
+        return np.rint(sums).astype(np.int64)
+
+    def score_groups(self, groups: list[list[int]]) -> int:
+        """
+        Computes the total mutual score inside a partition in O(nnz).
+        Args:
+            groups (list[list[int]]): Groups given as lists of user indices.
+        Returns:
+            int: Sum over all groups of the mutual scores of every pair of members.
+        """
+        labels = np.full(self.size, -1, dtype=np.intp)
+        for label, group in enumerate(groups):
+            labels[group] = label
+        entry_rows = self.entry_rows()
+        same = (labels[entry_rows] == labels[self.indices]) & (labels[entry_rows] >= 0)
+        return int(self.data[same].sum()) // 2
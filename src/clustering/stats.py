@@ -0,0 +1,113 @@
+import time
+import tracemalloc
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Iterator, Optional
+
+
+class ClusterStats:
+    """
+    Wall time and call counts of the phases of a clustering run, and the peak memory it allocated.
+    Engines only time their phases when they are given a ClusterStats, so a run without one makes no timing
+    call at all. The glue between phases (validation, formatting, process pools) is not attributed to any phase,
+    so the phase times add up to less than `total_seconds`.
+    Used as a context manager, the instance measures the whole run and traces the memory with tracemalloc,
+    which it starts (and stops) unless it is already running.
+    """
+
+    PHASES = (
+        "build", "sizes", "leaders", "partners", "scoring", "refinement", "annealing", "matching", "exact", "proof"
+    )
+
+    def __init__(self) -> None:
+        """
+        Initializes empty statistics.
+        Returns:
+            None
+        """
+        self.seconds: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.total_seconds = 0.0
+        self.peak_memory = 0
+        self.__started = 0.0
+        self.__baseline = 0
+        self.__owns_tracing = False
+
+    def record(self, phase: str, seconds: float, calls: int = 1) -> None:
+        """
+        Adds the time spent in a phase.
+        Args:
+            phase (str): Name of the phase, usually one of PHASES.
+            seconds (float): Wall time spent in the phase.
+            calls (int): Number of times the phase ran.
+        Returns:
+            None
+        """
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """
+        Times the enclosed block as one call of a phase.
+        Args:
+            phase (str): Name of the phase.
+        Returns:
+            Iterator[None]: The context of the block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    @staticmethod
+    def measure(stats: Optional["ClusterStats"], phase: str) -> AbstractContextManager:
+        """
+        Times a block as a phase of the given statistics, if any.
+        Args:
+            stats (Optional[ClusterStats]): The statistics of the run, or None when they are not collected.
+            phase (str): Name of the phase.
+        Returns:
+            AbstractContextManager: A context timing the block, or doing nothing when stats is None.
+        """
+        return nullcontext() if stats is None else stats.phase(phase)
+
+    def as_dict(self) -> dict:
+        """
+        Summarizes the statistics in plain types, e.g. for a JSON report.
+        Returns:
+            dict: Total time, peak memory in bytes and, for every phase that ran, its time and number of calls.
+        """
+        return {
+            "total_seconds": self.total_seconds,
+            "peak_memory": self.peak_memory,
+            "phases": {name: {"seconds": self.seconds[name], "calls": self.calls[name]} for name in self.seconds},
+        }
+
+    def __enter__(self) -> "ClusterStats":
+        self.__owns_tracing = not tracemalloc.is_tracing()
+        if self.__owns_tracing:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        self.__baseline = tracemalloc.get_traced_memory()[0]
+        self.__started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.total_seconds = time.perf_counter() - self.__started
+        self.peak_memory = max(tracemalloc.get_traced_memory()[1] - self.__baseline, 0)
+        if self.__owns_tracing:
+            tracemalloc.stop()
+
+    def __repr__(self) -> str:
+        """
+        Returns a readable summary of the statistics.
+        Returns:
+            str: The summary, with the phases in decreasing order of time.
+        """
+        phases = ", ".join(
+            f"{name}={self.seconds[name]:.3f}s/{self.calls[name]}"
+            for name in sorted(self.seconds, key=self.seconds.get, reverse=True)
+        )
+        return f"ClusterStats(total={self.total_seconds:.3f}s, peak_memory={self.peak_memory}B, {phases})"
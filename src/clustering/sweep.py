@@ -0,0 +1,57 @@
+class SweepResult:
+    """
+    One row of a group-size sweep: the grouping obtained for a group size and how good it is.
+    The satisfaction of a student is the number of points they gave to the members of their own group.
+    """
+
+    def __init__(self, group_size: int, groups: list[list], score: int, group_minimums: list[int], runtime: float) -> None:
+        """
+        Initializes the row of a sweep.
+        Args:
+            group_size (int): The evaluated group size.
+            groups (list[list]): Groups of users obtained for this size.
+            score (int): Total affinity score of the groups.
+            group_minimums (list[int]): Lowest student satisfaction of every group.
+            runtime (float): Time spent clustering for this size, in seconds.
+        Returns:
+            None
+        """
+        self.group_size = group_size
+        self.groups = groups
+        self.score = score
+        self.group_minimums = group_minimums
+        self.runtime = runtime
+
+    @property
+    def min_satisfaction(self) -> int:
+        """
+        Returns the satisfaction of the worst-off student.
+        Returns:
+            int: Lowest satisfaction over all groups (0 without groups).
+        """
+        return min(self.group_minimums, default=0)
+
+    def as_row(self) -> dict:
+        """
+        Summarizes the result as a table row.
+        Returns:
+            dict: Group size, number of groups, score, worst-off satisfaction and runtime.
+        """
+        return {
+            "group_size": self.group_size,
+            "groups": len(self.groups),
+            "score": self.score,
+            "min_satisfaction": self.min_satisfaction,
+            "runtime": self.runtime,
+        }
+
+    def __repr__(self) -> str:
+        """
+        Returns a readable summary of the row.
+        Returns:
+            str: The summary.
+        """
+        return (
+            f"SweepResult(group_size={self.group_size}, score={self.score}, "
+            f"min_satisfaction={self.min_satisfaction}, runtime={self.runtime:.3f}s)"
+        )
@@ -1,19 +1,24 @@
 import uuid
+from typing import Optional
+
 from src.domain.user import User
 
 
 class Group:
     """
     Represents a group of users.
-    Each group has a unique identifier and can contain multiple users.
+    Each group has a unique identifier, can contain multiple users and may belong to the vote it was generated for.
     """
-    def __init__(self) -> None:
+    def __init__(self, vote_id: Optional[str] = None) -> None:
         """
         Initializes a new group with a unique identifier.
+        Args:
+            vote_id (Optional[str]): ID of the vote the group was generated for, if any.
         Returns:
             None
         """
         self.id = str(uuid.uuid4())
+        self.vote_id = vote_id
         self.users: list[User] = []
 
     def add_user(self, user: User) -> None:
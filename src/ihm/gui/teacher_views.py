@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from src.domain.vote import Vote
+from src.service.algo_service import AlgoService
 from datetime import datetime, timedelta
-import random
+import os
+import threading
 
 class TeacherViews:
+    # Below this many votes, clustering in-process is faster than starting worker processes
+    PARALLEL_MIN_VOTES = 4
+    POLL_MS = 100
+
     def __init__(self, parent, main_window, username):
         self.main_window = main_window
         self.username = username
@@ -62,7 +68,8 @@ class TeacherViews:
 
         ttk.Button(self.vote_tab, text="Create Vote", command=self.create_vote).pack(pady=5)
         # Generate groups button and results in vote tab
-        ttk.Button(self.vote_tab, text="Generate Groups", command=self.generate_groups).pack(pady=20)
+        self.generate_button = ttk.Button(self.vote_tab, text="Generate Groups", command=self.generate_groups)
+        self.generate_button.pack(pady=20)
         self.result_text = tk.Text(self.vote_tab, height=8, state=tk.DISABLED)
         self.result_text.pack(fill=tk.BOTH, expand=True, padx=20)
 
@@ -105,35 +112,60 @@ class TeacherViews:
     
     def generate_groups(self):
         # Get all votes
-        votes = self.main_window.storage_service.get_all_votes()
+        storage_service = self.main_window.storage_service
+        votes = storage_service.get_all_votes()
         if not votes:
             messagebox.showerror("Error", "No votes found")
             return
-        
-        # Use first vote
-        vote_id, vote_data = list(votes.items())[0]
-        
-        # Get students
-        users = self.main_window.storage_service.get_all_users()
-        students = [u['username'] for u in users.values() if u.get('status') == 'student']
-        
-        if not students:
-            messagebox.showerror("Error", "No students found")
+
+        # Read the votes here, cluster them on a background thread so that the window stays responsive,
+        # then save the groups from this thread once they are ready (the storage is not thread-safe)
+        algo_service = AlgoService({}, storage_service)
+        jobs, errors = algo_service.collect_votes(list(votes))
+        workers = min(os.cpu_count() or 1, len(jobs)) if len(jobs) >= self.PARALLEL_MIN_VOTES else 1
+        outcome = {}
+
+        def solve():
+            try:
+                outcome["results"] = AlgoService.solve_votes(jobs, storage_service.result_cache, workers)
+            except Exception as error:
+                outcome["error"] = error
+
+        worker = threading.Thread(target=solve, daemon=True)
+        self.generate_button.config(state=tk.DISABLED)
+        self.show_results("Generating groups...\n")
+        worker.start()
+        self.result_text.after(self.POLL_MS, self.finish_generation, worker, outcome, algo_service, votes, errors)
+
+    def finish_generation(self, worker, outcome, algo_service, votes, errors):
+        if worker.is_alive():
+            self.result_text.after(self.POLL_MS, self.finish_generation, worker, outcome, algo_service, votes, errors)
             return
-        
-        # Simple random grouping
-        random.shuffle(students)
-        group_size = vote_data.get('group_size', 3)
-        groups = [students[i:i+group_size] for i in range(0, len(students), group_size)]
-        
-        # Save groups
-        self.main_window.storage_service.save_generated_group(vote_id, groups)
-        
+        self.generate_button.config(state=tk.NORMAL)
+        if "error" in outcome:
+            self.show_results("")
+            messagebox.showerror("Error", f"Group generation failed: {outcome['error']}")
+            return
+
+        # Save all the groups at once
+        results, failures = outcome["results"]
+        errors.update(failures)
+        algo_service.save_results(results)
+
         # Display results
+        lines = []
+        for vote_id, groups in results.items():
+            lines.append(f"{votes[vote_id].get('title', vote_id)}:\n")
+            for i, group in enumerate(groups, 1):
+                lines.append(f"  Group {i}: {', '.join(group)}\n")
+        for vote_id, error in errors.items():
+            lines.append(f"{votes.get(vote_id, {}).get('title', vote_id)}: {error}\n")
+        self.show_results("".join(lines))
+
+        messagebox.showinfo("Success", "Groups generated!")
+
+    def show_results(self, text):
         self.result_text.config(state=tk.NORMAL)
         self.result_text.delete(1.0, tk.END)
-        for i, group in enumerate(groups, 1):
-            self.result_text.insert(tk.END, f"Group {i}: {', '.join(group)}\n")
+        self.result_text.insert(tk.END, text)
         self.result_text.config(state=tk.DISABLED)
-        
-        messagebox.showinfo("Success", "Groups generated!")
\ No newline at end of file
@@ -1,5 +1,12 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+from src.clustering.affinity_matrix import AffinityMatrix
 from src.clustering.clustering import Clustering
+from src.clustering.result_cache import CachedResult, ResultCache
+from src.domain.group import Group
 from src.domain.user import User
+from src.service.storage_service import StorageService
 
 
 class AlgoService:
@@ -8,17 +15,19 @@ class AlgoService:
     It uses the Clustering class to perform user clustering based on weighted preferences.
     """
 
-    def __init__(self, preferences: dict[User, dict[User, int]]):
+    def __init__(self, preferences: dict[User, dict[User, int]], storage_service: Optional[StorageService] = None):
         """
         Initializes the AlgoService with user preferences.
         Args:
-            preferences (dict[User, dict[User, int]]): 
+            preferences (dict[User, dict[User, int]]):
                 A dictionary where each key is a User, and the value is a dict of other Users
                 associated with a numeric weight indicating preference strength.
+            storage_service (Optional[StorageService]): Storage of the votes, needed by cluster_votes.
         """
         self.preferences = preferences
+        self.storage_service = storage_service
         self.clustering = Clustering()
-        
+
     def cluster_users(self, group_size: int) -> list[list[User]]:
         """
         Clusters users based on their preferences into groups of a specified size.
@@ -27,4 +36,164 @@ class AlgoService:
         Returns:
             list[list[User]]: A list of user groups, each containing users clustered together.
         """
-        return self.clustering.cluster_users(self.preferences, group_size)
\ No newline at end of file
+        return self.clustering.cluster_users(self.preferences, group_size)
+
+    @staticmethod
+    def _cluster_vote(
+        matrix: AffinityMatrix,
+        group_size: int,
+        options: dict[str, Any],
+        key: str
+    ) -> tuple[list[list[str]], Optional[CachedResult]]:
+        """
+        Clusters the students of a vote; picklable so that it can run in worker processes.
+        The vote is clustered against an empty cache whose entry is returned for the calling process to store,
+        so that results cut short by a time budget stay out of the shared cache as they do in-process.
+        Args:
+            matrix (AffinityMatrix): The maintained affinity matrix of the vote.
+            group_size (int): Desired number of students per group.
+            options (dict[str, Any]): Keyword arguments of Clustering.cluster.
+            key (str): Cache key of the request (Clustering.cache_key).
+        Returns:
+            tuple[list[list[str]], Optional[CachedResult]]: Groups of usernames, and the cache entry or None.
+        Raises:
+            ValueError: If the vote cannot be clustered (e.g. no fair division of its students).
+        """
+        cache = ResultCache()
+        groups = Clustering.cluster(matrix, group_size, **options, cache=cache)[0]
+        return groups, cache.get(key)
+
+    def cluster_votes(
+        self,
+        vote_ids: list[str],
+        workers: int = 1,
+        **options
+    ) -> tuple[dict[str, list[list[str]]], dict[str, Exception]]:
+        """
+        Generates the groups of several votes at once, e.g. when closing a term.
+        The votes are loaded with a single storage read (collect_votes) and clustered from the affinity matrices
+        maintained by the storage service, in parallel by `workers` processes (solve_votes); all the resulting
+        groups are saved with a single write (save_results), replacing the groups previously generated for these
+        votes. A vote that is missing or cannot be clustered is reported without stopping the others.
+        Results are kept in the result cache of the storage service, so clustering votes whose preferences and
+        options did not change again (e.g. a repeated "Generate Groups") returns without solving them.
+        Args:
+            vote_ids (list[str]): IDs of the votes to cluster.
+            workers (int): Number of worker processes; 1 clusters every vote in the current process.
+            **options: Keyword arguments passed to Clustering.cluster (e.g. refine=True).
+        Returns:
+            tuple[dict[str, list[list[str]]], dict[str, Exception]]: Groups of usernames by vote ID, and the error
+                of every vote that could not be clustered.
+        Raises:
+            ValueError: If the service has no storage.
+        """
+        jobs, errors = self.collect_votes(vote_ids)
+        results, failures = AlgoService.solve_votes(jobs, self.storage_service.result_cache, workers, **options)
+        errors.update(failures)
+        self.save_results(results)
+        return results, errors
+
+    def collect_votes(self, vote_ids: list[str]) -> tuple[dict[str, tuple[AffinityMatrix, int]], dict[str, Exception]]:
+        """
+        Loads the votes to cluster with a single storage read and gets their maintained affinity matrices.
+        Args:
+            vote_ids (list[str]): IDs of the votes to cluster.
+        Returns:
+            tuple[dict[str, tuple[AffinityMatrix, int]], dict[str, Exception]]: The matrix and group size of every
+                vote to cluster, and the error of every vote that is missing or has no valid group size.
+        Raises:
+            ValueError: If the service has no storage.
+        """
+        if self.storage_service is None:
+            raise ValueError("Clustering stored votes requires a storage service.")
+        votes = self.storage_service.get_all_votes()
+        jobs, errors = {}, {}
+        for vote_id in dict.fromkeys(vote_ids):
+            if vote_id not in votes:
+                errors[vote_id] = KeyError(f"Vote not found: {vote_id}")
+                continue
+            try:
+                group_size = int(votes[vote_id]["group_size"])
+            except (KeyError, TypeError, ValueError) as error:
+                errors[vote_id] = error
+                continue
+            matrix = self.storage_service.get_affinity_matrix(vote_id)
+            matrix.triplets()
+            jobs[vote_id] = (matrix, group_size)
+        return jobs, errors
+
+    @staticmethod
+    def solve_votes(
+        jobs: dict[str, tuple[AffinityMatrix, int]],
+        cache: ResultCache,
+        workers: int = 1,
+        **options
+    ) -> tuple[dict[str, list[list[str]]], dict[str, Exception]]:
+        """
+        Clusters the votes returned by collect_votes without accessing the storage, so that it can run outside
+        the thread owning the storage (e.g. off the GUI thread). With several workers and votes, the cache is
+        read and filled by the calling process and only the misses are sent to the worker processes.
+        Args:
+            jobs (dict[str, tuple[AffinityMatrix, int]]): The matrix and group size of every vote.
+            cache (ResultCache): Cache of previous results (thread-safe).
+            workers (int): Number of worker processes; 1 clusters every vote in the current process.
+            **options: Keyword arguments passed to Clustering.cluster.
+        Returns:
+            tuple[dict[str, list[list[str]]], dict[str, Exception]]: Groups of usernames by vote ID, and the error
+                of every vote that could not be clustered.
+        """
+        results, errors = {}, {}
+        pending = dict(jobs)
+        keys = {}
+        if workers > 1 and len(pending) > 1:
+            for vote_id, (matrix, group_size) in jobs.items():
+                try:
+                    keys[vote_id] = Clustering.cache_key(matrix, group_size, **options)
+                except Exception as error:
+                    errors[vote_id] = error
+                    del pending[vote_id]
+                    continue
+                cached = cache.get(keys[vote_id])
+                if cached is not None:
+                    results[vote_id] = [[matrix.usernames[i] for i in group] for group in cached[0]]
+                    del pending[vote_id]
+
+        if workers <= 1 or len(pending) <= 1:
+            for vote_id, (matrix, group_size) in pending.items():
+                try:
+                    results[vote_id] = Clustering.cluster(matrix, group_size, **options, cache=cache)[0]
+                except Exception as error:
+                    errors[vote_id] = error
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                futures = {
+                    vote_id: pool.submit(AlgoService._cluster_vote, matrix, group_size, options, keys[vote_id])
+                    for vote_id, (matrix, group_size) in pending.items()
+                }
+                for vote_id, future in futures.items():
+                    try:
+                        results[vote_id], entry = future.result()
+                    except Exception as error:
+                        errors[vote_id] = error
+                        continue
+                    if entry is not None:
+                        cache.put(keys[vote_id], *entry)
+        return results, errors
+
+    def save_results(self, results: dict[str, list[list[str]]]) -> None:
+        """
+        Saves the groups generated for several votes with a single storage write, replacing the groups
+        previously generated for these votes.
+        Args:
+            results (dict[str, list[list[str]]]): Groups of usernames by vote ID.
+        Returns:
+            None
+        """
+        generated = []
+        for vote_id, groups in results.items():
+            for usernames in groups:
+                group = Group(vote_id)
+                group.users = usernames
+                generated.append(group)
+        if results:
+            self.storage_service.save_generated_groups(generated, list(results))
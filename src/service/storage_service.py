@@ -1,25 +1,63 @@
+from contextlib import AbstractContextManager
 from typing import Optional, Dict, Any
+from src.clustering.affinity_matrix import AffinityMatrix
+from src.clustering.result_cache import ResultCache
 from src.domain.group import Group
 from src.domain.user import User
 from src.domain.vote import Vote
 from src.storage.storage_json import StorageJSON
+from src.storage.storage_sqlite import StorageSQLite
 
 
 class StorageService:
     """
-    Service class that acts as a wrapper over the storage layer (StorageJSON).
+    Service class that acts as a wrapper over the storage layer (StorageJSON or StorageSQLite).
     It provides high-level methods for user, vote, and group data management.
     """
 
-    def __init__(self, filename: str = "data.json") -> None:
+    SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+    SQLITE_SCHEME = "sqlite://"
+
+    def __init__(self, filename: str = "data.json", wal: bool = False) -> None:
         """
-        Initializes the storage service with the provided JSON file.
+        Initializes the storage service with the provided JSON file or SQLite database.
         Args:
-            filename (str): Path to the JSON file for persistent storage.
+            filename (str): Path to the JSON file for persistent storage, or to a SQLite database (see open_storage).
+            wal (bool): Whether the JSON storage appends changes to a write-ahead log instead of rewriting the file.
         Returns:
             None
         """
-        self.storage = StorageJSON(filename)
+        self.storage = StorageService.open_storage(filename, wal)
+        self.affinity_matrices: Dict[str, AffinityMatrix] = {}
+        self.result_cache = ResultCache()
+
+    @staticmethod
+    def open_storage(filename: str, wal: bool = False) -> StorageJSON | StorageSQLite:
+        """
+        Opens the storage backend matching a filename or URL.
+        Args:
+            filename (str): A "sqlite://" URL ("sqlite:///relative.db", "sqlite:////absolute.db", or "sqlite://" for
+                an in-memory database), a path ending with one of SQLITE_SUFFIXES, or the path of a JSON file.
+            wal (bool): Write-ahead-log mode of the JSON storage (SQLite databases always use their own WAL mode).
+        Returns:
+            StorageJSON | StorageSQLite: The storage.
+        """
+        if filename.startswith(StorageService.SQLITE_SCHEME):
+            path = filename[len(StorageService.SQLITE_SCHEME):]
+            path = path[1:] if path.startswith("/") else path
+            return StorageSQLite(path or ":memory:")
+        if filename.lower().endswith(StorageService.SQLITE_SUFFIXES):
+            return StorageSQLite(filename)
+        return StorageJSON(filename, wal)
+
+    def batch(self) -> AbstractContextManager:
+        """
+        Groups the changes of a block into a single storage write, e.g. when creating a whole class of students.
+        Usage: `with storage_service.batch(): ...`. The changes are discarded if the block raises.
+        Returns:
+            AbstractContextManager: The context of the block.
+        """
+        return self.storage.batch()
 
     def is_user_exist(self, username: str) -> bool:
         """
@@ -42,6 +80,16 @@ class StorageService:
         return self.storage.get_user_by_username(username)
 
 
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves a user's stored data based on their email address.
+        Args:
+            email (str): The email address of the user.
+        Returns:
+            Optional[Dict[str, Any]]: A dictionary of user data or None if not found.
+        """
+        return self.storage.get_user_by_email(email)
+
     def get_all_users(self) -> Dict[str, Any]:
         """
         Retrieves all users from storage.
@@ -91,11 +139,48 @@ class StorageService:
         """
         self.storage.save_vote(vote.id, vote.__dict__)
         
-    def update_vote_preferences(self, vote_id: str, new_preferences: dict):
-        if vote_id in self.votes:
-            self.votes[vote_id].preferennces = new_preferences
-            self.save_votes()
-            
+    def update_vote_preferences(self, vote_id: str, new_preferences: dict) -> None:
+        """
+        Stores the preferences of a vote and applies the changed submissions to its affinity matrix.
+        Args:
+            vote_id (str): The ID of the vote.
+            new_preferences (dict): Points given by each username to other usernames.
+        Returns:
+            None
+        """
+        vote = self.get_vote(vote_id)
+        if vote is None:
+            return
+        previous = vote.get("preferennces", {})
+        vote["preferennces"] = new_preferences
+        self.storage.save_vote(vote_id, vote)
+
+        matrix = self.affinity_matrices.get(vote_id)
+        if matrix is not None:
+            for username, preferences in new_preferences.items():
+                if previous.get(username) != preferences:
+                    matrix.submit(username, preferences)
+            for username in previous.keys() - new_preferences.keys():
+                matrix.submit(username, {})
+
+    def get_affinity_matrix(self, vote_id: str) -> Optional[AffinityMatrix]:
+        """
+        Returns the affinity matrix of a vote, built from the stored preferences on first use and
+        then kept up to date by update_vote_preferences.
+        Args:
+            vote_id (str): The ID of the vote.
+        Returns:
+            Optional[AffinityMatrix]: The matrix, or None if the vote does not exist.
+        """
+        matrix = self.affinity_matrices.get(vote_id)
+        if matrix is None:
+            vote = self.get_vote(vote_id)
+            if vote is None:
+                return None
+            matrix = AffinityMatrix.from_preferences(vote.get("preferennces") or {}, vote.get("eligible_students"))
+            self.affinity_matrices[vote_id] = matrix
+        return matrix
+
     def get_vote_by_title(self, title: str):
         for vote in self.votes.values():
             if vote.title == title:
@@ -110,8 +195,7 @@ class StorageService:
         Returns:
             Optional[Dict[str, Any]]: The vote data if found, otherwise None.
         """
-        votes = self.storage.get_votes()
-        return votes.get(vote_id)
+        return self.storage.get_vote_by_id(vote_id)
 
     def get_all_votes(self) -> Dict[str, Any]:
         """
@@ -128,6 +212,7 @@ class StorageService:
             vote (Vote): The vote object with updated data.
         """
         self.storage.save_vote(vote.id, vote.__dict__)
+        self.affinity_matrices.pop(vote.id, None)
 
     def delete_vote(self, vote_id: str) -> None:
         """
@@ -138,6 +223,7 @@ class StorageService:
             None
         """
         self.storage.delete_vote(vote_id)
+        self.affinity_matrices.pop(vote_id, None)
 
 
     def save_generated_group(self, groups: Group) -> None:
@@ -148,6 +234,20 @@ class StorageService:
         """
         self.storage.save_group(groups.id, groups.__dict__)
 
+    def save_generated_groups(self, groups: list[Group], vote_ids: Optional[list[str]] = None) -> None:
+        """
+        Saves the groups generated for several votes with a single storage write.
+        Args:
+            groups (list[Group]): The generated groups, tagged with their vote.
+            vote_ids (Optional[list[str]]): Votes whose previously generated groups are replaced; by default the
+                votes of the given groups.
+        Returns:
+            None
+        """
+        if vote_ids is None:
+            vote_ids = [group.vote_id for group in groups]
+        self.storage.save_groups({group.id: group.__dict__ for group in groups}, vote_ids)
+
     def get_group_by_id(self, group: Group) -> Optional[Dict[str, Any]]:
         """
         Retrieves group data associated with a vote.
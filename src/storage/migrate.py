@@ -0,0 +1,50 @@
+import json
+import sys
+
+from src.storage.storage_json import StorageJSON
+from src.storage.storage_sqlite import StorageSQLite
+
+
+def migrate(json_filename: str, sqlite_filename: str) -> dict[str, int]:
+    """
+    Imports the users, votes and groups of a StorageJSON file into a SQLite database.
+    The write-ahead log of the JSON file, if any, is replayed first. Running it again updates the imported entries.
+    Args:
+        json_filename (str): Path of the JSON file (e.g. data.json).
+        sqlite_filename (str): Path of the database, created if needed.
+    Returns:
+        dict[str, int]: Number of imported entries by category.
+    Raises:
+        FileNotFoundError: If the JSON file does not exist.
+        json.JSONDecodeError: If the JSON file is not valid.
+    """
+    # StorageJSON resets an invalid file, which must not happen to the file being migrated.
+    with open(json_filename, 'r') as f:
+        json.load(f)
+    source = StorageJSON(json_filename, wal=True)
+    document = {'users': source.get_users(), 'votes': source.get_votes(), 'groups': source.get_groups()}
+    storage = StorageSQLite(sqlite_filename)
+    try:
+        return storage.import_document(document)
+    finally:
+        storage.close()
+
+
+def main(argv: list[str]) -> int:
+    """
+    Command-line entry point: `python -m src.storage.migrate data.json data.db`.
+    Args:
+        argv (list[str]): The JSON file and the database file.
+    Returns:
+        int: 0 on success, 2 on a usage error.
+    """
+    if len(argv) != 2:
+        print("usage: python -m src.storage.migrate <data.json> <database.db>")
+        return 2
+    counts = migrate(argv[0], argv[1])
+    print(", ".join(f"{count} {category}" for category, count in counts.items()) + f" imported into {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,6 +1,8 @@
 import os
 import json
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
 from datetime import datetime
 
 from src.domain.owner import Owner
@@ -12,13 +14,32 @@ from src.domain.user import User
 class StorageJSON:
     """
     A class to manage persistent JSON-based storage for users, votes, and groups.
+    The parsed document is cached in memory: it is reloaded only when the modification time, size or inode of the
+    file changes (e.g. another process wrote it), and our own writes update it in place. The cached document is the
+    only copy of the data: the category getters (get_users, get_votes, get_groups) and get_users_by_role return it
+    through read-only views without copying, and their records must not be modified. The single-entry getters
+    (get_vote_by_id, get_group_by_id, get_user_by_email, get_user_by_username) copy the one record they return, so
+    callers may modify it without changing the store until they save it.
+    By default every change rewrites the whole file. In write-ahead-log mode, every change is instead appended as
+    one JSON line to `<filename>.log`, which is replayed over the file (the snapshot) when the store is loaded, and
+    compacted into a new snapshot written with an atomic rename every COMPACT_EVERY changes. A crash can then
+    only lose the line being appended, which is dropped at the next load. An existing log is replayed whatever the
+    mode, so a store opened without the write-ahead log still sees the changes of a run that used it; it then
+    compacts the log into the snapshot before rewriting the file.
+    Changes made inside `with storage.batch():` are buffered and committed together when the block exits.
+    Users are indexed by username, role (status) and email; the indexes are rebuilt whenever the document is loaded
+    and updated by every change, so lookups do not scan the users. Usernames and emails are assumed unique.
     """
 
-    def __init__(self, filename: str) -> None:
+    COMPACT_EVERY = 1000
+
+    def __init__(self, filename: str, wal: bool = False) -> None:
         """
         Initializes the storage file. Creates an empty JSON structure if the file is missing or corrupted.
         Args:
             filename (str): The path to the JSON file where data will be stored.
+            wal (bool): Whether to use the write-ahead-log mode. The log of a previous run is replayed in both
+                modes, and compacted into the snapshot when the mode is off.
         Returns:
             None
         Raises:
@@ -26,17 +47,26 @@ class StorageJSON:
             json.JSONDecodeError: If the file is not a valid JSON.
         """
         self.filename = filename
+        self.wal = wal
+        self.log_filename = filename + '.log'
+        self._document: Optional[Dict[str, Any]] = None
+        self._signature: Optional[tuple] = None
+        self._logged_changes = 0
+        self._batch: Optional[list[Dict[str, Any]]] = None
+        self._usernames: Dict[str, str] = {}
+        self._emails: Dict[str, str] = {}
+        self._roles: Dict[str, Dict[str, None]] = {}
         if not os.path.exists(self.filename):
             with open(self.filename, 'w') as f:
                 json.dump({}, f)
-        else:
-            with open(self.filename, 'r+') as f:
-                try:
-                    json.load(f)
-                except json.JSONDecodeError:
-                    f.seek(0)
-                    json.dump({}, f)
-                    f.truncate()
+        try:
+            self._load()
+        except json.JSONDecodeError:
+            with open(self.filename, 'w') as f:
+                json.dump({}, f)
+            self._load()
+        if not self.wal and os.path.exists(self.log_filename):
+            self.compact()
 
     def save_user(self, user_id: str, user_data: Any) -> None:
         """
@@ -49,11 +79,11 @@ class StorageJSON:
         """
         self._save_entry('users', user_id, user_data)
 
-    def get_users(self) -> Dict[str, Any]:
+    def get_users(self) -> Mapping[str, Any]:
         """
         Returns all stored users.
         Returns:
-            Dict[str, Any]: A dictionary of user IDs mapped to their data.
+            Mapping[str, Any]: A read-only view of the user IDs mapped to their data.
         """
         return self._get_category('users')
     
@@ -63,12 +93,22 @@ class StorageJSON:
         Args:
             role (str): The role to filter users by (e.g., "student", "teacher", "owner").
         Returns:
-            Dict[str, Any]: A dictionary of user IDs mapped to their data for the specified role.
+            Dict[str, Any]: The data of the users with the specified role (records of the cached document, not to
+                be modified).
         """
-        users = self._get_category('users')
-        return [
-            user for user in users.values() if user["status"] == role
-        ]
+        users = self._read().get('users', {})
+        return [users[user_id] for user_id in self._roles.get(role, {})]
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored data of a user by email, or None if not found.
+        Args:
+            email (str): The email address of the user to find.
+        Returns:
+            Optional[Dict[str, Any]]: The user data if found, otherwise None.
+        """
+        users = self._read().get('users', {})
+        return StorageJSON._copy(users.get(self._emails.get(email)))
 
     def save_vote(self, vote_id: str, vote_data: Any) -> None:
         """
@@ -81,11 +121,11 @@ class StorageJSON:
         """
         self._save_entry('votes', vote_id, vote_data)
 
-    def get_votes(self) -> Dict[str, Any]:
+    def get_votes(self) -> Mapping[str, Any]:
         """
         Returns all stored votes.
         Returns:
-            Dict[str, Any]: A dictionary of vote IDs mapped to their data.
+            Mapping[str, Any]: A read-only view of the vote IDs mapped to their data.
         """
         return self._get_category('votes')
 
@@ -97,13 +137,43 @@ class StorageJSON:
         Returns:
             Optional[Dict[str, Any]]: The vote data if found, otherwise None.
         """
-        return self.get_votes().get(vote_id)
+        return self._get_entry('votes', vote_id)
+
+    def save_group(self, group_id: str, group_data: Any) -> None:
+        """
+        Saves or updates a group by ID.
+        Args:
+            group_id (str): Unique identifier for the group.
+            group_data (Any): Data associated with the group, can be a dict or any serializable object.
+        Returns:
+            None
+        """
+        self._save_entry('groups', group_id, group_data)
 
-    def get_groups(self) -> Dict[str, Any]:
+    def save_groups(self, groups: Dict[str, Any], replaced_votes: Iterable[str] = ()) -> None:
+        """
+        Saves several groups with a single write.
+        Args:
+            groups (Dict[str, Any]): Data of every group by group ID.
+            replaced_votes (Iterable[str]): IDs of votes whose previously generated groups are removed first.
+        Returns:
+            None
+        """
+        replaced_votes = set(replaced_votes)
+        stale = [
+            group_id for group_id, group in self._read().get('groups', {}).items()
+            if isinstance(group, dict) and group.get('vote_id') in replaced_votes and group_id not in groups
+        ]
+        self._apply_changes(
+            [StorageJSON._delete_change('groups', group_id) for group_id in stale]
+            + [StorageJSON._save_change('groups', group_id, group) for group_id, group in groups.items()]
+        )
+
+    def get_groups(self) -> Mapping[str, Any]:
         """
         Returns all stored groups.
         Returns:
-            Dict[str, Any]: A dictionary of group IDs mapped to their data.
+            Mapping[str, Any]: A read-only view of the group IDs mapped to their data.
         """
         return self._get_category('groups')
 
@@ -115,7 +185,7 @@ class StorageJSON:
         Returns:
             Optional[Dict[str, Any]]: The group data if found, otherwise None.
         """
-        return self.get_groups().get(group_id)
+        return self._get_entry('groups', group_id)
 
     def get_user_by_username(self, username: str) -> (User, str):
         """
@@ -125,29 +195,86 @@ class StorageJSON:
         Returns:
             User: The user if found, otherwise None.
         """
-        users = self.get_users()
-        valid_user = None
-        for user in users.values():
-            if user['username'] == username:
-                if user["status"] == 'student':
-                    valid_user = Student(firstname=user["firstname"], lastname=user["lastname"], username=user["username"], email=user["email"], status=user["status"], id=user["id"], passwords=user["password_hashes"])
-                elif user["status"] == 'teacher':
-                    valid_user = Teacher(firstname=user["firstname"], lastname=user["lastname"], username=user["username"], email=user["email"], status=user["status"], id=user["id"], passwords=user["password_hashes"])
-                elif user["status"] == 'owner':
-                    valid_user = Owner(firstname=user["firstname"], lastname=user["lastname"], username=user["username"], email=user["email"], status=user["status"], id=user["id"],  passwords=user["password_hashes"])
-                return (valid_user, valid_user.status)
+        users = self._read().get('users', {})
+        user = StorageJSON._copy(users.get(self._usernames.get(username)))
+        if user is not None:
+            valid_user = StorageJSON.user_from_data(user)
+            return (valid_user, valid_user.status)
         return (None, None)
 
-    def _get_category(self, category: str) -> Dict[str, Any]:
+    @staticmethod
+    def user_from_data(user: Dict[str, Any]) -> Optional[User]:
+        """
+        Builds the domain object of a stored user from its role.
+        Args:
+            user (Dict[str, Any]): The stored user data.
+        Returns:
+            Optional[User]: A Student, Teacher or Owner, or None for an unknown role.
+        """
+        valid_user = None
+        if user["status"] == 'student':
+            valid_user = Student(firstname=user["firstname"], lastname=user["lastname"], username=user["username"], email=user["email"], status=user["status"], id=user["id"], passwords=user["password_hashes"])
+        elif user["status"] == 'teacher':
+            valid_user = Teacher(firstname=user["firstname"], lastname=user["lastname"], username=user["username"], email=user["email"], status=user["status"], id=user["id"], passwords=user["password_hashes"])
+        elif user["status"] == 'owner':
+            valid_user = Owner(firstname=user["firstname"], lastname=user["lastname"], username=user["username"], email=user["email"], status=user["status"], id=user["id"],  passwords=user["password_hashes"])
+        return valid_user
+
+    @staticmethod
+    def serialize(obj: Any) -> Any:
+        """
+        Converts an entry to JSON-compatible data, as stored by both storage backends.
+        Args:
+            obj (Any): The entry, possibly containing datetimes or objects.
+        Returns:
+            Any: The entry with datetimes as ISO strings and objects as dicts of their attributes.
+        """
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        elif isinstance(obj, dict):
+            return {k: StorageJSON.serialize(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [StorageJSON.serialize(item) for item in obj]
+        elif hasattr(obj, '__dict__'):
+            return StorageJSON.serialize(obj.__dict__)
+        return obj
+
+    def _get_category(self, category: str) -> Mapping[str, Any]:
         """
-        Returns all entries in a given category (users, votes, groups).
+        Returns all entries in a given category (users, votes, groups), without copying them.
         Args:
             category (str): The category to retrieve (e.g., 'users', 'votes', 'groups').
         Returns:
-            Dict[str, Any]: A dictionary of entries in the specified category.
+            Mapping[str, Any]: A read-only view of the entries of the cached document in the specified category.
         """
         data = self._read()
-        return data.get(category, {})
+        return MappingProxyType(data.get(category, {}))
+
+    def _get_entry(self, category: str, entry_id: str) -> Optional[Any]:
+        """
+        Returns one entry of a category, without copying the rest of the category.
+        Args:
+            category (str): The category of the entry (e.g., 'users', 'votes', 'groups').
+            entry_id (str): Unique identifier for the entry.
+        Returns:
+            Optional[Any]: A copy of the entry, or None if not found.
+        """
+        return StorageJSON._copy(self._read().get(category, {}).get(entry_id))
+
+    @staticmethod
+    def _copy(data: Any) -> Any:
+        """
+        Copies JSON data (nested dicts and lists), so that the cached document cannot be modified through it.
+        Args:
+            data (Any): The data to copy.
+        Returns:
+            Any: An equal copy sharing no dict or list with the data.
+        """
+        if isinstance(data, dict):
+            return {key: StorageJSON._copy(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [StorageJSON._copy(item) for item in data]
+        return data
 
     def _save_entry(self, category: str, entry_id: str, entry_data: Any) -> None:
         """
@@ -159,43 +286,332 @@ class StorageJSON:
         Returns:
             None
         """
-        def serialize(obj: Any) -> Any:
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            elif isinstance(obj, dict):
-                return {k: serialize(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [serialize(item) for item in obj]
-            elif hasattr(obj, '__dict__'):
-                return serialize(obj.__dict__)
-            return obj
+        self._apply_changes([StorageJSON._save_change(category, entry_id, entry_data)])
+
+    @staticmethod
+    def _save_change(category: str, entry_id: str, entry_data: Any) -> Dict[str, Any]:
+        """
+        Describes the saving of an entry, as stored in the log.
+        Args:
+            category (str): The category of the entry.
+            entry_id (str): Unique identifier for the entry.
+            entry_data (Any): Data associated with the entry.
+        Returns:
+            Dict[str, Any]: The change.
+        """
+        return {'op': 'save', 'category': category, 'id': entry_id, 'data': StorageJSON.serialize(entry_data)}
+
+    @staticmethod
+    def _delete_change(category: str, entry_id: str) -> Dict[str, Any]:
+        """
+        Describes the deletion of an entry, as stored in the log.
+        Args:
+            category (str): The category of the entry.
+            entry_id (str): Unique identifier for the entry.
+        Returns:
+            Dict[str, Any]: The change.
+        """
+        return {'op': 'delete', 'category': category, 'id': entry_id}
+
+    @staticmethod
+    def _apply(data: Dict[str, Any], change: Dict[str, Any]) -> None:
+        """
+        Applies a change to a document. Applying a change twice has no further effect, so the log can be replayed
+        over a snapshot that already contains some of its changes.
+        Args:
+            data (Dict[str, Any]): The document, modified in place.
+            change (Dict[str, Any]): A change built by _save_change or _delete_change, or a committed batch of
+                such changes.
+        Returns:
+            None
+        """
+        if change['op'] == 'save':
+            data.setdefault(change['category'], {})[change['id']] = change['data']
+        elif change['op'] == 'batch':
+            for nested in change['changes']:
+                StorageJSON._apply(data, nested)
+        else:
+            data.get(change['category'], {}).pop(change['id'], None)
 
+    def _apply_changes(self, changes: list[Dict[str, Any]]) -> None:
+        """
+        Applies changes to the document and persists them, by appending them to the log in write-ahead-log mode
+        and by rewriting the file otherwise. Inside a batch, they are only buffered.
+        Args:
+            changes (list[Dict[str, Any]]): The changes, in order.
+        Returns:
+            None
+        """
         data = self._read()
-        if category not in data:
-            data[category] = {}
+        if self._batch is not None or not self.wal:
+            for change in changes:
+                self._apply_indexed(data, change)
+            if self._batch is not None:
+                self._batch.extend(changes)
+            else:
+                self._write(data)
+            return
 
-        data[category][entry_id] = serialize(entry_data)
-        self._write(data)
+        self._append(changes)
+        for change in changes:
+            self._apply_indexed(data, change)
+        self._logged(len(changes))
 
-    def _read(self) -> Dict[str, Any]:
+    def _apply_indexed(self, data: Dict[str, Any], change: Dict[str, Any]) -> None:
+        """
+        Applies a change to the cached document and updates the user indexes.
+        Args:
+            data (Dict[str, Any]): The cached document, modified in place.
+            change (Dict[str, Any]): A change built by _save_change or _delete_change.
+        Returns:
+            None
+        """
+        if change['category'] != 'users':
+            StorageJSON._apply(data, change)
+            return
+        previous = data.get('users', {}).get(change['id'])
+        StorageJSON._apply(data, change)
+        current = change['data'] if change['op'] == 'save' else None
+        self._reindex_user(
+            data.get('users', {}), change['id'],
+            previous if isinstance(previous, dict) else None, current if isinstance(current, dict) else None
+        )
+
+    def _reindex_user(
+        self,
+        users: Dict[str, Any],
+        user_id: str,
+        previous: Optional[Dict[str, Any]],
+        current: Optional[Dict[str, Any]]
+    ) -> None:
+        """
+        Moves a user from the index entries of its previous data to those of its current data. Entries whose key
+        did not change are left in place, so the users of a role stay in the order of the document.
+        Args:
+            users (Dict[str, Any]): The users of the cached document, with the change applied.
+            user_id (str): Unique identifier for the user.
+            previous (Optional[Dict[str, Any]]): The stored user data before the change, or None for a new user.
+            current (Optional[Dict[str, Any]]): The stored user data after the change, or None for a deleted user.
+        Returns:
+            None
+        """
+        for index, field in ((self._usernames, 'username'), (self._emails, 'email')):
+            old, new = (previous or {}).get(field), (current or {}).get(field)
+            if old != new and index.get(old) == user_id:
+                del index[old]
+            if new is not None:
+                index.setdefault(new, user_id)
+        old, new = (previous or {}).get('status'), (current or {}).get('status')
+        if old == new:
+            return
+        self._roles.get(old, {}).pop(user_id, None)
+        if new is None:
+            return
+        if previous is None:
+            # A new user is the last one of the document.
+            self._roles.setdefault(new, {})[user_id] = None
+        else:
+            self._roles[new] = {
+                other_id: None for other_id, user in users.items()
+                if isinstance(user, dict) and user.get('status') == new
+            }
+
+    def _rebuild_indexes(self) -> None:
+        """
+        Rebuilds the user indexes from the cached document.
+        Returns:
+            None
+        """
+        self._usernames, self._emails, self._roles = {}, {}, {}
+        users = (self._document or {}).get('users', {})
+        for user_id, user in users.items():
+            if isinstance(user, dict):
+                self._reindex_user(users, user_id, None, user)
+
+    def _logged(self, count: int) -> None:
+        """
+        Records that changes were appended to the log, and compacts it when it grew long enough.
+        Args:
+            count (int): Number of appended changes.
+        Returns:
+            None
+        """
+        self._signature = self._current_signature()
+        self._logged_changes += count
+        if self._logged_changes >= self.COMPACT_EVERY:
+            self.compact()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Buffers the saves and deletes of the enclosed block and commits them with a single write when it exits:
+        the file is replaced atomically (temporary file, fsync, rename), or in write-ahead-log mode the changes
+        are appended as one log line, which a crash drops as a whole. If the block raises, the changes are
+        discarded. Reads inside the block see the buffered changes; nested batches join the outer one.
+        Returns:
+            Iterator[None]: The context of the block.
+        """
+        if self._batch is not None:
+            yield
+            return
+        self._read()
+        self._batch = []
+        try:
+            yield
+        except BaseException:
+            self._batch = None
+            self.invalidate()
+            raise
+        changes, self._batch = self._batch, None
+        if not changes:
+            return
+        if not self.wal:
+            self._write(self._document)
+            return
+        try:
+            self._append([{'op': 'batch', 'changes': changes}])
+        except Exception:
+            self.invalidate()
+            raise
+        self._logged(len(changes))
+
+    def _append(self, changes: list[Dict[str, Any]]) -> None:
+        """
+        Appends changes to the log, one JSON line each, and flushes them to disk.
+        Args:
+            changes (list[Dict[str, Any]]): The changes.
+        Returns:
+            None
         """
-        Reads the JSON file and returns its content as a dictionary.
+        lines = ''.join(json.dumps(change) + '\n' for change in changes)
+        with open(self.log_filename, 'a') as log:
+            log.write(lines)
+            log.flush()
+            os.fsync(log.fileno())
+
+    def compact(self) -> None:
+        """
+        Writes the current document as the new snapshot and empties the log (removes it when the write-ahead-log
+        mode is off).
         Returns:
-            Dict[str, Any]: The content of the JSON file.
+            None
+        """
+        self._write(self._read())
+
+    @staticmethod
+    def _file_signature(stat: os.stat_result) -> tuple[int, int, int]:
+        """
+        Identifies a version of the file.
+        Args:
+            stat (os.stat_result): Status of the file.
+        Returns:
+            tuple[int, int, int]: Modification time in nanoseconds, size and inode.
+        """
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _current_signature(self) -> tuple:
+        """
+        Identifies the current version of the stored data.
+        Returns:
+            tuple: Signature of the file, paired with the signature of the log (None without log).
+        """
+        snapshot = StorageJSON._file_signature(os.stat(self.filename))
+        if not os.path.exists(self.log_filename):
+            return snapshot, None
+        return snapshot, StorageJSON._file_signature(os.stat(self.log_filename))
+
+    def _load(self) -> None:
+        """
+        Parses the file and replays the log over it, if there is one.
+        An incomplete last line, left by a crash during an append, is dropped from the log.
+        Returns:
+            None
         """
         with open(self.filename, 'r') as f:
-            return json.load(f)
+            snapshot = StorageJSON._file_signature(os.fstat(f.fileno()))
+            document = json.load(f)
+
+        changes, log_signature = 0, None
+        if os.path.exists(self.log_filename):
+            with open(self.log_filename, 'r+b') as log:
+                replayed = 0
+                for line in log:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        change = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    StorageJSON._apply(document, change)
+                    replayed += len(line)
+                    changes += len(change['changes']) if change['op'] == 'batch' else 1
+                if replayed < os.fstat(log.fileno()).st_size:
+                    log.truncate(replayed)
+                log_signature = StorageJSON._file_signature(os.fstat(log.fileno()))
+        self._document, self._signature = document, (snapshot, log_signature)
+        self._logged_changes = changes
+        self._rebuild_indexes()
+
+    def _read(self) -> Dict[str, Any]:
+        """
+        Returns the content of the JSON file, parsing it only if it changed since it was last read or written.
+        Returns:
+            Dict[str, Any]: The content of the JSON file (the cached document).
+        """
+        if self._document is None or (self._batch is None and self._current_signature() != self._signature):
+            self._load()
+        return self._document
 
     def _write(self, data: Dict[str, Any]) -> None:
         """
-        Writes the given data to the JSON file.
+        Writes the given data to the JSON file, which becomes the cached document.
+        The file is replaced atomically; the log, whose changes the data includes, is then emptied (or removed
+        when the write-ahead-log mode is off).
         Args:
             data (Dict[str, Any]): The data to write to the file.
         Returns:
             None
         """
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=4)
+        try:
+            self._replace_file(data)
+            if self.wal:
+                open(self.log_filename, 'w').close()
+            elif os.path.exists(self.log_filename):
+                os.remove(self.log_filename)
+        except Exception:
+            self.invalidate()
+            raise
+        if data is not self._document:
+            self._document = data
+            self._rebuild_indexes()
+        self._signature = self._current_signature()
+        self._logged_changes = 0
+
+    def _replace_file(self, data: Dict[str, Any]) -> None:
+        """
+        Writes the data to a temporary file, flushes it to disk and renames it over the JSON file, so that the
+        file always holds either the old or the new content.
+        Args:
+            data (Dict[str, Any]): The data to write.
+        Returns:
+            None
+        """
+        content = json.dumps(data, indent=4)
+        temporary = self.filename + '.tmp'
+        with open(temporary, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.filename)
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached document, so that the next read parses the file again.
+        Returns:
+            None
+        """
+        self._document = None
+        self._signature = None
 
     def delete_user(self, user_id: str) -> None:
         """
@@ -238,8 +654,7 @@ class StorageJSON:
         """
         data = self._read()
         if category in data and entry_id in data[category]:
-            del data[category][entry_id]
-            self._write(data)
+            self._apply_changes([StorageJSON._delete_change(category, entry_id)])
 
 
 
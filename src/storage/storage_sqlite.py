@@ -0,0 +1,325 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from src.domain.user import User
+from src.storage.storage_json import StorageJSON
+
+
+class StorageSQLite:
+    """
+    SQLite storage for users, votes, and groups, with the same methods as StorageJSON.
+    Every entry is stored as its serialized JSON data, next to indexed columns for the lookups (username, email
+    and role of users, vote of groups), so changing one entry writes one row instead of the whole database.
+    The database runs in WAL mode, so several processes (e.g. GUI instances) can read while one writes.
+    Entries are returned in insertion order, as by StorageJSON.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS users ("
+        "id TEXT PRIMARY KEY, username TEXT, email TEXT, status TEXT, data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS users_username ON users (username)",
+        "CREATE INDEX IF NOT EXISTS users_email ON users (email)",
+        "CREATE INDEX IF NOT EXISTS users_status ON users (status)",
+        "CREATE TABLE IF NOT EXISTS votes (id TEXT PRIMARY KEY, data TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS groups (id TEXT PRIMARY KEY, vote_id TEXT, data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS groups_vote ON groups (vote_id)",
+    )
+    SAVE_USER = (
+        "INSERT INTO users (id, username, email, status, data) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (id) DO UPDATE SET username = excluded.username, email = excluded.email, "
+        "status = excluded.status, data = excluded.data"
+    )
+    SAVE_VOTE = "INSERT INTO votes (id, data) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET data = excluded.data"
+    SAVE_GROUP = (
+        "INSERT INTO groups (id, vote_id, data) VALUES (?, ?, ?) "
+        "ON CONFLICT (id) DO UPDATE SET vote_id = excluded.vote_id, data = excluded.data"
+    )
+
+    def __init__(self, filename: str) -> None:
+        """
+        Opens (and creates if needed) the database.
+        Args:
+            filename (str): The path to the database file, or ":memory:".
+        Returns:
+            None
+        Raises:
+            sqlite3.DatabaseError: If the file is not a SQLite database.
+        """
+        self.filename = filename
+        self._connection = sqlite3.connect(filename, timeout=10, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._depth = 0
+        with self.batch():
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        Returns:
+            None
+        """
+        self._connection.close()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Runs the saves and deletes of the enclosed block in one transaction, committed when it exits and rolled
+        back if it raises. Nested batches join the outer one.
+        Returns:
+            Iterator[None]: The context of the block.
+        """
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self._connection.execute("BEGIN IMMEDIATE")
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        else:
+            self._connection.execute("COMMIT")
+        finally:
+            self._depth = 0
+
+    @staticmethod
+    def _user_row(user_id: str, user_data: Any) -> tuple:
+        """
+        Builds the row of a user.
+        Args:
+            user_id (str): Unique identifier for the user.
+            user_data (Any): Data associated with the user, can be a dict or any serializable object.
+        Returns:
+            tuple: The values of the users columns.
+        """
+        data = StorageJSON.serialize(user_data)
+        fields = data if isinstance(data, dict) else {}
+        return user_id, fields.get('username'), fields.get('email'), fields.get('status'), json.dumps(data)
+
+    @staticmethod
+    def _group_row(group_id: str, group_data: Any) -> tuple:
+        """
+        Builds the row of a group.
+        Args:
+            group_id (str): Unique identifier for the group.
+            group_data (Any): Data associated with the group, can be a dict or any serializable object.
+        Returns:
+            tuple: The values of the groups columns.
+        """
+        data = StorageJSON.serialize(group_data)
+        vote_id = data.get('vote_id') if isinstance(data, dict) else None
+        return group_id, vote_id, json.dumps(data)
+
+    def _entries(self, query: str, parameters: tuple = ()) -> Dict[str, Any]:
+        """
+        Runs a query selecting (id, data) rows.
+        Args:
+            query (str): The query.
+            parameters (tuple): Its parameters.
+        Returns:
+            Dict[str, Any]: The parsed data of every row by ID.
+        """
+        return {entry_id: json.loads(data) for entry_id, data in self._connection.execute(query, parameters)}
+
+    def _entry(self, query: str, parameters: tuple) -> Optional[Dict[str, Any]]:
+        """
+        Runs a query selecting the data of at most one row.
+        Args:
+            query (str): The query.
+            parameters (tuple): Its parameters.
+        Returns:
+            Optional[Dict[str, Any]]: The parsed data, or None if no row matches.
+        """
+        row = self._connection.execute(query, parameters).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def save_user(self, user_id: str, user_data: Any) -> None:
+        """
+        Saves or updates a user by ID.
+        Args:
+            user_id (str): Unique identifier for the user.
+            user_data (Any): Data associated with the user, can be a dict or any serializable object.
+        Returns:
+            None
+        """
+        self._connection.execute(self.SAVE_USER, StorageSQLite._user_row(user_id, user_data))
+
+    def get_users(self) -> Dict[str, Any]:
+        """
+        Returns all stored users.
+        Returns:
+            Dict[str, Any]: A dictionary of user IDs mapped to their data.
+        """
+        return self._entries("SELECT id, data FROM users ORDER BY rowid")
+
+    def get_users_by_role(self, role: str) -> list[Dict[str, Any]]:
+        """
+        Returns all stored users filtered by their role.
+        Args:
+            role (str): The role to filter users by (e.g., "student", "teacher", "owner").
+        Returns:
+            list[Dict[str, Any]]: The data of the users with this role.
+        """
+        return list(self._entries("SELECT id, data FROM users WHERE status = ? ORDER BY rowid", (role,)).values())
+
+    def get_user_by_username(self, username: str) -> (User, str):
+        """
+        Returns a user by username, or None if not found.
+        Args:
+            username (str): The username of the user to find.
+        Returns:
+            User: The user if found, otherwise None.
+        """
+        user = self._entry("SELECT data FROM users WHERE username = ? ORDER BY rowid LIMIT 1", (username,))
+        if user is not None:
+            valid_user = StorageJSON.user_from_data(user)
+            return (valid_user, valid_user.status)
+        return (None, None)
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored data of a user by email, or None if not found.
+        Args:
+            email (str): The email address of the user to find.
+        Returns:
+            Optional[Dict[str, Any]]: The user data if found, otherwise None.
+        """
+        return self._entry("SELECT data FROM users WHERE email = ? ORDER BY rowid LIMIT 1", (email,))
+
+    def save_vote(self, vote_id: str, vote_data: Any) -> None:
+        """
+        Saves or updates a vote by ID.
+        Args:
+            vote_id (str): Unique identifier for the vote.
+            vote_data (Any): Data associated with the vote, can be a dict or any serializable object.
+        Returns:
+            None
+        """
+        self._connection.execute(self.SAVE_VOTE, (vote_id, json.dumps(StorageJSON.serialize(vote_data))))
+
+    def get_votes(self) -> Dict[str, Any]:
+        """
+        Returns all stored votes.
+        Returns:
+            Dict[str, Any]: A dictionary of vote IDs mapped to their data.
+        """
+        return self._entries("SELECT id, data FROM votes ORDER BY rowid")
+
+    def get_vote_by_id(self, vote_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a vote by ID, or None if not found.
+        Args:
+            vote_id (str): Unique identifier for the vote.
+        Returns:
+            Optional[Dict[str, Any]]: The vote data if found, otherwise None.
+        """
+        return self._entry("SELECT data FROM votes WHERE id = ?", (vote_id,))
+
+    def save_group(self, group_id: str, group_data: Any) -> None:
+        """
+        Saves or updates a group by ID.
+        Args:
+            group_id (str): Unique identifier for the group.
+            group_data (Any): Data associated with the group, can be a dict or any serializable object.
+        Returns:
+            None
+        """
+        self._connection.execute(self.SAVE_GROUP, StorageSQLite._group_row(group_id, group_data))
+
+    def save_groups(self, groups: Dict[str, Any], replaced_votes: Iterable[str] = ()) -> None:
+        """
+        Saves several groups in one transaction.
+        Args:
+            groups (Dict[str, Any]): Data of every group by group ID.
+            replaced_votes (Iterable[str]): IDs of votes whose previously generated groups are removed first.
+        Returns:
+            None
+        """
+        with self.batch():
+            self._connection.executemany(
+                "DELETE FROM groups WHERE vote_id = ?", [(vote_id,) for vote_id in set(replaced_votes)]
+            )
+            self._connection.executemany(
+                self.SAVE_GROUP, [StorageSQLite._group_row(group_id, group) for group_id, group in groups.items()]
+            )
+
+    def get_groups(self) -> Dict[str, Any]:
+        """
+        Returns all stored groups.
+        Returns:
+            Dict[str, Any]: A dictionary of group IDs mapped to their data.
+        """
+        return self._entries("SELECT id, data FROM groups ORDER BY rowid")
+
+    def get_group_by_id(self, group_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a group by ID, or None if not found.
+        Args:
+            group_id (str): Unique identifier for the group.
+        Returns:
+            Optional[Dict[str, Any]]: The group data if found, otherwise None.
+        """
+        return self._entry("SELECT data FROM groups WHERE id = ?", (group_id,))
+
+    def delete_user(self, user_id: str) -> None:
+        """
+        Deletes a user by ID.
+        Args:
+            user_id (str): Unique identifier for the user to delete.
+        Returns:
+            None
+        """
+        self._connection.execute("DELETE FROM users WHERE id = ?", (user_id,))
+
+    def delete_vote(self, vote_id: str) -> None:
+        """
+        Deletes a vote by ID.
+        Args:
+            vote_id (str): Unique identifier for the vote to delete.
+        Returns:
+            None
+        """
+        self._connection.execute("DELETE FROM votes WHERE id = ?", (vote_id,))
+
+    def delete_group(self, group_id: str) -> None:
+        """
+        Deletes a group by ID.
+        Args:
+            group_id (str): Unique identifier for the group to delete.
+        Returns:
+            None
+        """
+        self._connection.execute("DELETE FROM groups WHERE id = ?", (group_id,))
+
+    def import_document(self, document: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Imports the content of a StorageJSON file in one transaction; existing entries with the same IDs are
+        replaced.
+        Args:
+            document (Dict[str, Any]): The parsed JSON document, with its users, votes and groups categories.
+        Returns:
+            Dict[str, int]: Number of imported entries by category.
+        """
+        users = document.get('users', {})
+        votes = document.get('votes', {})
+        groups = document.get('groups', {})
+        with self.batch():
+            self._connection.executemany(
+                self.SAVE_USER, [StorageSQLite._user_row(user_id, user) for user_id, user in users.items()]
+            )
+            self._connection.executemany(
+                self.SAVE_VOTE, [(vote_id, json.dumps(vote)) for vote_id, vote in votes.items()]
+            )
+            self._connection.executemany(
+                self.SAVE_GROUP, [StorageSQLite._group_row(group_id, group) for group_id, group in groups.items()]
+            )
+        return {'users': len(users), 'votes': len(votes), 'groups': len(groups)}
@@ -0,0 +1,41 @@
+import unittest
+from src.benchmark.generators import PreferenceGenerator
+
+
+class TestPreferenceGenerator(unittest.TestCase):
+    def test_budget_spends_every_point(self):
+        preferences = PreferenceGenerator.budget(30, points=10, picks=3, seed=1)
+        self.assertEqual(len(preferences), 30)
+        for user, points in preferences.items():
+            self.assertEqual(len(points), 3)
+            self.assertEqual(sum(points.values()), 10)
+            self.assertNotIn(user, points)
+
+    def test_friends_mostly_pick_their_circle(self):
+        preferences = PreferenceGenerator.friends(100, circle_size=5, loyalty=1.0, seed=2)
+        users = list(preferences)
+        for i, user in enumerate(users):
+            for friend in preferences[user]:
+                self.assertEqual(users.index(friend) // 5, i // 5)
+
+    def test_density_controls_the_number_of_scores(self):
+        preferences = PreferenceGenerator.density(200, 0.1, seed=3)
+        count = sum(len(points) for points in preferences.values())
+        self.assertAlmostEqual(count / (200 * 199), 0.1, delta=0.01)
+
+    def test_generators_are_reproducible(self):
+        for name in PreferenceGenerator.GENERATORS:
+            first = PreferenceGenerator.create(name, 20, seed=4)
+            second = PreferenceGenerator.create(name, 20, seed=4)
+            self.assertEqual(
+                [sorted((v.username, s) for v, s in p.items()) for p in first.values()],
+                [sorted((v.username, s) for v, s in p.items()) for p in second.values()],
+            )
+
+    def test_unknown_generator_raises(self):
+        with self.assertRaises(ValueError):
+            PreferenceGenerator.create("uniform", 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from src.benchmark.report import BenchmarkReport
+from src.benchmark.runner import BenchmarkResult
+
+
+class TestBenchmarkReport(unittest.TestCase):
+    def setUp(self):
+        self.baseline = [
+            BenchmarkResult("budget", 100, "greedy", 1.0, 300, 1000),
+            BenchmarkResult("budget", 100, "refine", 2.0, 350, 1000),
+            BenchmarkResult("budget", 100, "anneal", 0.001, 360, 1000),
+        ]
+
+    def test_write_and_read_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("run.csv", "run.json"):
+                path = os.path.join(directory, name)
+                BenchmarkReport.write(self.baseline, path)
+                rows = [r.as_row() for r in BenchmarkReport.read(path)]
+                self.assertEqual(rows, [r.as_row() for r in self.baseline])
+
+    def test_read_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            BenchmarkReport.read("missing.json")
+
+    def test_compare_flags_regressions(self):
+        current = [
+            BenchmarkResult("budget", 100, "greedy", 1.1, 300, 1000),
+            BenchmarkResult("budget", 100, "refine", 3.0, 340, 1500),
+            BenchmarkResult("budget", 100, "anneal", 0.005, 360, 1000),
+            BenchmarkResult("budget", 1000, "greedy", 9.0, 3000, 9000),
+        ]
+        regressions = BenchmarkReport.compare(self.baseline, current)
+        self.assertEqual(
+            [(r.key[2], r.metric) for r in regressions],
+            [("refine", "seconds"), ("refine", "peak_memory"), ("refine", "score")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
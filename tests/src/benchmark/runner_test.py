@@ -0,0 +1,28 @@
+import unittest
+from src.benchmark.runner import BenchmarkResult, BenchmarkRunner
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+    def test_run_measures_every_supported_case(self):
+        results = BenchmarkRunner.run(sizes=(12, 40), methods=("greedy", "exact"), repeats=2)
+        self.assertEqual([r.key for r in results], [
+            ("budget", 12, "greedy"), ("budget", 12, "exact"), ("budget", 40, "greedy"),
+        ])
+        for result in results:
+            self.assertGreater(result.seconds, 0)
+            self.assertGreater(result.peak_memory, 0)
+        self.assertGreaterEqual(results[1].score, results[0].score)
+
+    def test_result_round_trips_through_rows(self):
+        result = BenchmarkResult("friends", 100, "refine", 0.5, 321, 2048)
+        self.assertEqual(result.throughput, 200)
+        row = {name: str(value) for name, value in result.as_row().items()}
+        self.assertEqual(BenchmarkResult.from_row(row).as_row(), result.as_row())
+
+    def test_unknown_method_raises(self):
+        with self.assertRaises(ValueError):
+            BenchmarkRunner.run(sizes=(10,), methods=("quantum",))
+
+
+if __name__ == "__main__":
+    unittest.main()
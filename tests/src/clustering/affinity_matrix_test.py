@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from src.clustering.affinity_matrix import AffinityMatrix
+
+
+class TestAffinityMatrix(unittest.TestCase):
+    def setUp(self):
+        self.preferences = {
+            "alice": {"bob": 6, "carol": 4},
+            "bob": {"alice": 3, "dave": 7},
+            "carol": {"alice": 10},
+        }
+
+    def test_from_preferences_builds_symmetric_scores(self):
+        matrix = AffinityMatrix.from_preferences(self.preferences, ["dave"])
+        self.assertEqual(matrix.usernames, ["dave", "alice", "bob", "carol"])
+        self.assertEqual(matrix.symmetric().tolist(), [
+            [0, 0, 7, 0],
+            [0, 0, 9, 14],
+            [7, 9, 0, 0],
+            [0, 14, 0, 0],
+        ])
+
+    def test_submit_applies_row_delta(self):
+        matrix = AffinityMatrix.from_preferences(self.preferences)
+        matrix.submit("alice", {"carol": 2, "alice": 5, "erin": 8})
+        expected = AffinityMatrix.from_preferences(
+            {**self.preferences, "alice": {"carol": 2, "erin": 8}}, ["alice", "bob", "carol", "dave", "erin"]
+        )
+        self.assertEqual(matrix.usernames, expected.usernames)
+        self.assertEqual(matrix.symmetric().tolist(), expected.symmetric().tolist())
+        self.assertEqual(matrix.preferences_of("alice"), {"carol": 2, "erin": 8})
+
+    def test_growth_keeps_existing_scores(self):
+        matrix = AffinityMatrix()
+        for k in range(40):
+            matrix.submit(f"user{k}", {f"user{k - 1}": 1} if k else {})
+        sym = matrix.symmetric()
+        self.assertEqual(sym.shape, (40, 40))
+        self.assertEqual(int(sym.sum()), 2 * 39)
+        self.assertTrue(np.array_equal(np.diag(sym, 1), np.ones(39)))
+
+    def test_symmetric_is_derived_on_demand(self):
+        matrix = AffinityMatrix.from_preferences(self.preferences)
+        sym = matrix.symmetric()
+        self.assertEqual(sym.dtype, np.int8)
+        matrix.submit("carol", {"bob": 1})
+        self.assertEqual(int(sym[matrix.index("bob"), matrix.index("carol")]), 0)
+        self.assertEqual(int(matrix.symmetric()[matrix.index("bob"), matrix.index("carol")]), 1)
+
+    def test_triplets_are_kept_until_the_next_submission(self):
+        matrix = AffinityMatrix.from_preferences(self.preferences)
+        rows, _, scores = matrix.triplets()
+        self.assertIs(matrix.triplets()[0], rows)
+        with self.assertRaises(ValueError):
+            scores[0] = 1
+        matrix.intern("erin")
+        self.assertIs(matrix.triplets()[0], rows)
+        matrix.submit("erin", {"alice": 2})
+        self.assertEqual(len(matrix.triplets()[0]), len(rows) + 1)
+
+    def test_memory_grows_with_preferences(self):
+        matrix = AffinityMatrix()
+        for k in range(100000):
+            matrix.submit(f"user{k}", {f"user{(k + 1) % 100000}": 3})
+        rows, cols, scores = matrix.triplets()
+        self.assertEqual((matrix.size, len(scores)), (100000, 100000))
+
+    def test_triplets_list_directed_scores(self):
+        matrix = AffinityMatrix.from_preferences(self.preferences)
+        rows, cols, scores = matrix.triplets()
+        triplets = {(matrix.usernames[i], matrix.usernames[j], int(s)) for i, j, s in zip(rows, cols, scores)}
+        self.assertEqual(triplets, {(u, v, p) for u, points in self.preferences.items() for v, p in points.items()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import unittest
+import numpy as np
+from src.clustering.annealing import SimulatedAnnealing
+from src.clustering.cancellation import CancellationToken
+from src.clustering.constraints import Constraints
+from src.clustering.objectives import MaximinObjective
+
+
+def partition_score(groups, sym):
+    return int(sum(sym[np.ix_(g, g)].sum() for g in groups)) // 2
+
+
+class TestSimulatedAnnealing(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        matrix = rng.integers(1, 6, size=(24, 24)) * (rng.random((24, 24)) < 0.2)
+        np.fill_diagonal(matrix, 0)
+        self.matrix = matrix
+        self.sym = matrix + matrix.T
+        self.groups = [list(range(i, i + 4)) for i in range(0, 20, 4)] + [[20, 21], [22, 23]]
+
+    def test_run_keeps_sizes_and_does_not_lower_score(self):
+        annealer = SimulatedAnnealing(self.sym, self.groups, seed=1)
+        groups, score = annealer.run(time_limit=5.0, max_iterations=200)
+        self.assertEqual([len(g) for g in groups], [len(g) for g in self.groups])
+        self.assertEqual(sorted(u for g in groups for u in g), list(range(24)))
+        self.assertEqual(score, partition_score(groups, self.sym))
+        self.assertGreaterEqual(score, partition_score(self.groups, self.sym))
+
+    def test_same_seed_gives_same_result(self):
+        first = SimulatedAnnealing(self.sym, self.groups, seed=3).run(time_limit=5.0, max_iterations=100)
+        second = SimulatedAnnealing(self.sym, self.groups, seed=3).run(time_limit=5.0, max_iterations=100)
+        self.assertEqual(first, second)
+
+    def test_cancelled_token_returns_initial_partition(self):
+        token = CancellationToken()
+        token.cancel()
+        groups, score = SimulatedAnnealing(self.sym, self.groups).run(time_limit=60.0, cancel=token)
+        self.assertEqual(groups, self.groups)
+        self.assertEqual(score, partition_score(self.groups, self.sym))
+
+    def test_best_can_be_read_while_running(self):
+        annealer = SimulatedAnnealing(self.sym, self.groups, seed=2)
+        token = CancellationToken()
+        worker = threading.Thread(target=annealer.run, kwargs={"time_limit": 60.0, "cancel": token})
+        worker.start()
+        groups, score = annealer.best()
+        token.cancel()
+        worker.join(timeout=10)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(score, partition_score(groups, self.sym))
+
+    def test_run_with_objective_reports_its_value(self):
+        objective = MaximinObjective(self.matrix)
+        initial = objective.evaluate(self.groups)
+        groups, score = SimulatedAnnealing(self.sym, self.groups, seed=0, objective=objective).run(max_iterations=50)
+        self.assertEqual(score, objective.evaluate(groups))
+        self.assertGreaterEqual(score, initial)
+        self.assertEqual(sorted(len(g) for g in groups), sorted(len(g) for g in self.groups))
+
+    def test_run_keeps_constraints(self):
+        constraints = Constraints.compile(24, [[0, 1, 2]], [[4, 8], [5, 12], [20, 22]])
+        groups, _ = SimulatedAnnealing(self.sym, self.groups, seed=0, constraints=constraints).run(max_iterations=50)
+        self.assertTrue(constraints.satisfied(groups))
+        self.assertEqual(sorted(len(g) for g in groups), sorted(len(g) for g in self.groups))
+
+    def test_single_group_is_returned_unchanged(self):
+        groups, _ = SimulatedAnnealing(self.sym[:3, :3], [[0, 1, 2]]).run(time_limit=1.0)
+        self.assertEqual(groups, [[0, 1, 2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,16 @@
+import unittest
+from src.clustering.cancellation import CancellationToken
+
+
+class TestCancellationToken(unittest.TestCase):
+    def test_token_starts_not_cancelled(self):
+        self.assertFalse(CancellationToken().cancelled)
+
+    def test_cancel_sets_flag(self):
+        token = CancellationToken()
+        token.cancel()
+        self.assertTrue(token.cancelled)
+
+
+if __name__ == "__main__":
+    unittest.main()
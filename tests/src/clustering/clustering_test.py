@@ -1,5 +1,11 @@
+import random
+import tracemalloc
 import unittest
+from unittest.mock import patch
+from src.clustering.affinity_matrix import AffinityMatrix
 from src.clustering.clustering import Clustering
+from src.clustering.result_cache import ResultCache
+from src.clustering.stats import ClusterStats
 from src.domain.user import User
 
 
@@ -90,6 +96,319 @@ class TestClustering(unittest.TestCase):
             manual_score += Clustering._Clustering__score_group(indices, matrix)
         self.assertEqual(total_score, manual_score)
 
+    def test_build_affinity_matrix_maps_preferences_to_indices(self):
+        outsider = User("Zoe", "Solo", "zsolo", "zoe@example.com")
+        prefs = {
+            self.users[0]: {self.users[1]: 4, outsider: 9},
+            self.users[1]: {self.users[0]: 2},
+        }
+        matrix, user_list = Clustering._Clustering__build_affinity_matrix(prefs)
+        self.assertEqual(user_list, [self.users[0], self.users[1]])
+        self.assertEqual(matrix.tolist(), [[0, 4], [2, 0]])
+
+    def test_greedy_groupings_are_stable(self):
+        expected = {
+            3: ([[4, 1, 6], [2, 3, 0], [8, 7], [5, 9]], 74),
+            4: ([[4, 1, 6, 5], [2, 3, 0], [8, 7, 9]], 99),
+        }
+        for group_size, (indices, score) in expected.items():
+            groups, total_score = Clustering.cluster(self.preferences, group_size=group_size)
+            self.assertEqual(groups, [[self.users[i] for i in group] for group in indices])
+            self.assertEqual(total_score, score)
+
+    def test_sparse_backend_matches_dense_backend(self):
+        for group_size in (2, 3, 4):
+            dense = Clustering.cluster(self.preferences, group_size=group_size, backend="dense")
+            sparse = Clustering.cluster(self.preferences, group_size=group_size, backend="sparse")
+            self.assertEqual(dense, sparse)
+
+    def test_sparse_backend_matches_dense_backend_on_ties(self):
+        for seed in range(3):
+            rng = random.Random(seed)
+            users = [User(str(i), "", f"user{i}", "") for i in range(200)]
+            preferences = {
+                u: {users[j]: rng.randint(1, 3) for j in rng.sample(range(200), 3) if j != i}
+                for i, u in enumerate(users)
+            }
+            for group_size, refine in ((3, False), (4, False), (4, True)):
+                options = {"group_size": group_size, "refine": refine}
+                dense = Clustering.cluster(preferences, backend="dense", **options)
+                self.assertEqual(dense, Clustering.cluster(preferences, backend="sparse", **options))
+
+    def test_dense_matrix_uses_compact_dtype(self):
+        matrix, _ = Clustering._Clustering__build_affinity_matrix(self.preferences)
+        self.assertEqual(matrix.dtype.itemsize, 1)
+
+    def test_packed_backend_matches_dense_backend(self):
+        for options in ({}, {"refine": True}, {"restarts": 3, "seed": 1}, {"with_proof": True}):
+            self.assertEqual(
+                Clustering.cluster(self.preferences, group_size=3, backend="packed", **options)[:2],
+                Clustering.cluster(self.preferences, group_size=3, backend="dense", **options)[:2]
+            )
+        _, score = Clustering.cluster(self.preferences, group_size=2, backend="packed")
+        self.assertEqual(score, Clustering.cluster(self.preferences, group_size=2, backend="dense")[1])
+
+    def test_auto_backend_uses_density_threshold(self):
+        dense = Clustering.cluster(self.preferences, group_size=3, backend="dense")
+        self.assertEqual(Clustering.cluster(self.preferences, group_size=3, density_threshold=1.0), dense)
+        self.assertEqual(Clustering.cluster(self.preferences, group_size=3, density_threshold=0.0), dense)
+
+    def test_refine_does_not_lower_score(self):
+        for backend in ("dense", "sparse"):
+            _, greedy_score = Clustering.cluster(self.preferences, group_size=3, backend=backend)
+            groups, refined_score = Clustering.cluster(self.preferences, group_size=3, backend=backend, refine=True)
+            self.assertGreaterEqual(refined_score, greedy_score)
+            self.assertEqual(sorted(len(g) for g in groups), [2, 2, 3, 3])
+
+    def test_restarts_keep_best_start(self):
+        _, greedy_score = Clustering.cluster(self.preferences, group_size=3)
+        groups, score = Clustering.cluster(self.preferences, group_size=3, restarts=16, seed=0)
+        self.assertGreaterEqual(score, greedy_score)
+        self.assertEqual(Clustering.cluster(self.preferences, group_size=3, restarts=16, seed=0), (groups, score))
+
+    def test_anneal_method_does_not_lower_score(self):
+        _, greedy_score = Clustering.cluster(self.preferences, group_size=3)
+        groups, score = Clustering.cluster(self.preferences, group_size=3, method="anneal", time_limit=0.2, seed=0)
+        self.assertGreaterEqual(score, greedy_score)
+        self.assertEqual(sorted(len(g) for g in groups), [2, 2, 3, 3])
+
+    def test_exact_method_proves_optimality(self):
+        _, greedy_score = Clustering.cluster(self.preferences, group_size=3)
+        groups, score, proof = Clustering.cluster(self.preferences, group_size=3, method="exact", with_proof=True)
+        self.assertGreaterEqual(score, greedy_score)
+        self.assertTrue(proof.proved_optimal)
+        self.assertEqual(proof.score, score)
+        self.assertEqual(sorted(len(g) for g in groups), [2, 2, 3, 3])
+
+    def test_exact_method_has_a_default_budget(self):
+        with patch.object(Clustering, "EXACT_TIME_LIMIT", 0.0):
+            groups, score, proof = Clustering.cluster(self.preferences, group_size=3, method="exact", with_proof=True)
+        self.assertFalse(proof.proved_optimal)
+        self.assertGreaterEqual(proof.upper_bound, score)
+        self.assertEqual(sorted(len(g) for g in groups), [2, 2, 3, 3])
+
+    def test_exact_method_rejects_large_classes(self):
+        users = [User(str(i), "", f"user{i}", "") for i in range(Clustering.EXACT_MAX_USERS + 1)]
+        with self.assertRaises(ValueError):
+            Clustering.cluster({u: {} for u in users}, group_size=3, method="exact")
+
+    def test_heuristic_proof_gives_upper_bound(self):
+        _, score, proof = Clustering.cluster(self.preferences, group_size=3, with_proof=True)
+        self.assertFalse(proof.proved_optimal)
+        self.assertGreaterEqual(proof.upper_bound, score)
+
+    def test_pairs_are_optimal(self):
+        _, exact_score = Clustering.cluster(self.preferences, group_size=2, method="exact")
+        groups, score, proof = Clustering.cluster(self.preferences, group_size=2, with_proof=True)
+        self.assertEqual(score, exact_score)
+        self.assertTrue(proof.proved_optimal)
+        self.assertEqual([len(g) for g in groups], [2] * 5)
+
+    def test_large_pair_classes_fall_back_to_greedy(self):
+        with patch.object(Clustering, "MATCHING_MAX_USERS", 4):
+            groups, score, proof = Clustering.cluster(
+                self.preferences, group_size=2, decompose=False, with_proof=True
+            )
+        self.assertEqual([len(g) for g in groups], [2] * 5)
+        self.assertFalse(proof.proved_optimal)
+        self.assertGreaterEqual(proof.upper_bound, score)
+        self.assertGreater(score, 0)
+
+    def test_pairs_are_matched_per_component(self):
+        users = [User(str(i), "", f"user{i}", "") for i in range(160)]
+        preferences = {u: {users[(i // 80) * 80 + (i + k) % 80]: k for k in (1, 2, 3)} for i, u in enumerate(users)}
+        _, optimal = Clustering.cluster(preferences, group_size=2)
+        with patch.object(Clustering, "MATCHING_MAX_USERS", 100):
+            groups, score = Clustering.cluster(preferences, group_size=2)
+        self.assertEqual(score, optimal)
+        self.assertEqual([len(g) for g in groups], [2] * 80)
+
+    def test_decomposition_keeps_balanced_groups(self):
+        users = [User(str(i), "", f"user{i}", "") for i in range(150)]
+        preferences = {u: {users[(i // 75) * 75 + (i + k) % 75]: k for k in (1, 2, 3)} for i, u in enumerate(users)}
+        for decompose in (True, False):
+            groups, score = Clustering.cluster(preferences, group_size=4, decompose=decompose)
+            self.assertEqual(sorted(len(g) for g in groups), [3, 3] + [4] * 36)
+            self.assertEqual(len({u for g in groups for u in g}), 150)
+            self.assertGreater(score, 0)
+
+    def test_cache_answers_repeated_requests(self):
+        cache = ResultCache()
+        first = Clustering.cluster(self.preferences, group_size=3, cache=cache)
+        with patch.object(Clustering, "_solve_start", side_effect=AssertionError("cache miss")):
+            self.assertEqual(Clustering.cluster(self.preferences, group_size=3, cache=cache), first)
+            with self.assertRaises(AssertionError):
+                Clustering.cluster(self.preferences, group_size=4, cache=cache)
+        proof = Clustering.cluster(self.preferences, group_size=3, with_proof=True, cache=cache)[2]
+        self.assertEqual(Clustering.cluster(self.preferences, group_size=3, with_proof=True, cache=cache)[2], proof)
+
+    def test_cache_key_covers_the_engine_choice(self):
+        cache = ResultCache()
+        Clustering.cluster(self.preferences, group_size=3, cache=cache)
+        self.assertIsNotNone(cache.get(Clustering.cache_key(self.preferences, group_size=3, workers=4)))
+        keys = {
+            Clustering.cache_key(self.preferences, group_size=3),
+            Clustering.cache_key(self.preferences, group_size=3, backend="sparse"),
+            Clustering.cache_key(self.preferences, group_size=3, density_threshold=0.5),
+        }
+        self.assertEqual(len(keys), 3)
+
+    def test_cache_skips_time_limited_results(self):
+        cache = ResultCache()
+        options = [
+            {"method": "anneal", "time_limit": 0.01},
+            {"method": "exact"},
+            {"refine": True, "refine_time_limit": 0.0},
+            {"group_size": 2, "time_limit": 0.0, "refine_time_limit": 0.0},
+        ]
+        with patch.object(Clustering, "EXACT_TIME_LIMIT", 0.0):
+            for request in options:
+                request = {"group_size": 3, **request}
+                Clustering.cluster(self.preferences, cache=cache, **request)
+                self.assertIsNone(cache.get(Clustering.cache_key(self.preferences, **request)), request)
+        Clustering.cluster(self.preferences, group_size=3, refine=True, refine_time_limit=60.0, cache=cache)
+        self.assertIsNotNone(cache.get(
+            Clustering.cache_key(self.preferences, group_size=3, refine=True, refine_time_limit=60.0)
+        ))
+
+    def test_cluster_reads_affinity_matrix(self):
+        matrix = AffinityMatrix.from_preferences({
+            user.username: {other.username: points for other, points in choices.items()}
+            for user, choices in self.preferences.items()
+        })
+        for group_size in (2, 3, 4):
+            groups, score = Clustering.cluster(self.preferences, group_size=group_size)
+            self.assertEqual(Clustering.cluster(matrix, group_size=group_size),
+                             ([[user.username for user in group] for group in groups], score))
+
+    def test_recluster_without_change_keeps_groups(self):
+        groups, score = Clustering.cluster(self.preferences, group_size=3)
+        self.assertEqual(Clustering.recluster(groups, [], self.preferences), (groups, score))
+
+    def test_recluster_handles_departures_and_arrivals(self):
+        groups, _ = Clustering.cluster(self.preferences, group_size=3)
+        departed = self.users[9]
+        preferences = {u: {v: p for v, p in choices.items() if v != departed}
+                       for u, choices in self.preferences.items() if u != departed}
+        repaired, score = Clustering.recluster(groups, [departed], preferences)
+        self.assertEqual(sorted(len(g) for g in repaired), [3, 3, 3])
+        self.assertEqual(sorted(u.username for g in repaired for u in g), sorted(u.username for u in preferences))
+        self.assertIn(groups[0], repaired)
+        self.assertEqual(score, Clustering.recluster(repaired, [], preferences)[1])
+
+        newcomer = User("Zoe", "Solo", "zsolo", "zoe@example.com")
+        preferences[newcomer] = {self.users[4]: 10}
+        repaired, _ = Clustering.recluster(repaired, [newcomer], preferences, group_size=3)
+        self.assertEqual(sorted(len(g) for g in repaired), [2, 2, 3, 3])
+        self.assertIn(newcomer, [u for g in repaired for u in g])
+
+    def test_sweep_matches_individual_runs(self):
+        table = Clustering.sweep(self.preferences, [2, 3, 4])
+        self.assertEqual([row.group_size for row in table], [2, 3, 4])
+        for row in table:
+            groups, score = Clustering.cluster(self.preferences, group_size=row.group_size)
+            self.assertEqual((row.groups, row.score), (groups, score))
+            self.assertGreaterEqual(row.runtime, 0)
+            for group, minimum in zip(row.groups, row.group_minimums):
+                satisfaction = [sum(self.preferences[u].get(v, 0) for v in group) for u in group]
+                self.assertEqual(minimum, min(satisfaction))
+
+    def test_sweep_supports_every_backend(self):
+        expected = [(row.groups, row.score) for row in Clustering.sweep(self.preferences, [2, 3])]
+        for backend in ("dense", "sparse", "packed"):
+            table = Clustering.sweep(self.preferences, [2, 3], backend=backend)
+            self.assertEqual([(row.groups, row.score) for row in table], expected)
+
+    def test_sweep_rejects_exact_method(self):
+        with self.assertRaises(ValueError):
+            Clustering.sweep(self.preferences, [3], method="exact")
+
+    def test_envy_objective_counts_unhonored_picks(self):
+        groups, score = Clustering.cluster(self.preferences, group_size=3, objective="envy")
+        label = {u: k for k, g in enumerate(groups) for u in g}
+        unhonored = sum(1 for u, picks in self.preferences.items() for v in picks if label[u] != label[v])
+        self.assertEqual(score, -unhonored)
+        for backend in ("sparse", "packed"):
+            _, backend_score = Clustering.cluster(self.preferences, group_size=3, objective="envy", backend=backend)
+            self.assertEqual(backend_score, score)
+
+    def test_sparse_envy_does_not_build_dense_matrices(self):
+        users = [User(str(i), "", f"user{i}", "") for i in range(3000)]
+        preferences = {u: {users[(i + k) % 3000]: k for k in (1, 2, 3)} for i, u in enumerate(users)}
+        tracemalloc.start()
+        Clustering.cluster(preferences, group_size=4, objective="envy", backend="sparse")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, 3000 * 3000)
+
+    def test_maximin_objective_raises_worst_satisfaction(self):
+        groups, _ = Clustering.cluster(self.preferences, group_size=3)
+        greedy_minimum = min(sum(self.preferences[u].get(v, 0) for v in g) for g in groups for u in g)
+        groups, score = Clustering.cluster(
+            self.preferences, group_size=3, objective="maximin", method="anneal", time_limit=0.2, seed=0
+        )
+        self.assertEqual(score, min(sum(self.preferences[u].get(v, 0) for v in g) for g in groups for u in g))
+        self.assertGreaterEqual(score, greedy_minimum)
+        self.assertEqual(sorted(len(g) for g in groups), [2, 2, 3, 3])
+
+    def test_maximin_objective_rejects_exact_method(self):
+        with self.assertRaises(ValueError):
+            Clustering.cluster(self.preferences, group_size=3, objective="maximin", method="exact")
+
+    def test_constraints_are_respected(self):
+        must_link = [[self.users[0], self.users[9]], [self.users[4], self.users[5]]]
+        cannot_link = [[self.users[0], self.users[1]], [self.users[2], self.users[3]]]
+        for options in ({}, {"refine": True}, {"method": "anneal", "time_limit": 0.1, "seed": 0}, {"restarts": 3}):
+            groups, _ = Clustering.cluster(
+                self.preferences, group_size=3, must_link=must_link, cannot_link=cannot_link, **options
+            )
+            label = {u: k for k, g in enumerate(groups) for u in g}
+            self.assertEqual(label[self.users[0]], label[self.users[9]])
+            self.assertEqual(label[self.users[4]], label[self.users[5]])
+            self.assertNotEqual(label[self.users[0]], label[self.users[1]])
+            self.assertNotEqual(label[self.users[2]], label[self.users[3]])
+            self.assertEqual(sorted(len(g) for g in groups), [2, 2, 3, 3])
+
+    def test_constrained_pairs(self):
+        groups, _ = Clustering.cluster(self.preferences, group_size=2, must_link=[[self.users[0], self.users[7]]])
+        self.assertIn([self.users[0], self.users[7]], [sorted(g, key=self.users.index) for g in groups])
+
+    def test_contradictory_constraints_raise(self):
+        with self.assertRaises(ValueError):
+            Clustering.cluster(
+                self.preferences, group_size=3,
+                must_link=[[self.users[0], self.users[1]]], cannot_link=[[self.users[1], self.users[0]]]
+            )
+        with self.assertRaises(ValueError):
+            Clustering.cluster(self.preferences, group_size=3, must_link=[self.users[:4]])
+        with self.assertRaises(ValueError):
+            Clustering.cluster(self.preferences, group_size=3, must_link=[self.users[:2]], method="exact")
+
+    def test_stats_time_every_phase(self):
+        groups, total_score = Clustering.cluster(self.preferences, group_size=3, refine=True)
+        stats_groups, stats_score, proof, stats = Clustering.cluster(
+            self.preferences, group_size=3, refine=True, with_proof=True, stats=True
+        )
+        self.assertEqual((stats_groups, stats_score), (groups, total_score))
+        self.assertIsInstance(stats, ClusterStats)
+        for phase in ("build", "sizes", "leaders", "partners", "refinement", "scoring"):
+            self.assertGreater(stats.calls[phase], 0, phase)
+        self.assertEqual(stats.calls["leaders"], stats.calls["partners"])
+        self.assertLessEqual(sum(stats.seconds.values()), stats.total_seconds)
+        self.assertGreater(stats.peak_memory, 0)
+
+    def test_unknown_objective_raises(self):
+        with self.assertRaises(ValueError):
+            Clustering.cluster(self.preferences, group_size=3, objective="happiness")
+
+    def test_unknown_method_raises(self):
+        with self.assertRaises(ValueError):
+            Clustering.cluster(self.preferences, group_size=3, method="magic")
+
+    def test_unknown_backend_raises(self):
+        with self.assertRaises(ValueError):
+            Clustering.cluster(self.preferences, group_size=3, backend="gpu")
+
 
 if __name__ == "__main__":
     unittest.main()
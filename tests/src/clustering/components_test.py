@@ -0,0 +1,69 @@
+import unittest
+from functools import partial
+import numpy as np
+from src.clustering.clustering import Clustering
+from src.clustering.components import ComponentDecomposition
+from src.clustering.packed_affinity import PackedAffinity
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+def block_matrix(component_sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    size = sum(component_sizes)
+    sym = np.zeros((size, size), dtype=np.int64)
+    start = 0
+    for count in component_sizes:
+        block = np.triu(rng.integers(0, 6, (count, count)), 1)
+        sym[start:start + count, start:start + count] = block + block.T
+        start += count
+    return sym
+
+
+class TestComponentDecomposition(unittest.TestCase):
+    def test_labels_follow_connected_components(self):
+        sym = np.zeros((6, 6), dtype=np.int64)
+        for i, j in [(0, 3), (3, 5), (1, 4)]:
+            sym[i, j] = sym[j, i] = 1
+        self.assertEqual(ComponentDecomposition.labels(sym).tolist(), [0, 1, 2, 0, 1, 0])
+        graph = SparseAffinity.from_triplets(6, np.array([0, 3, 1]), np.array([3, 5, 4]), np.array([1, 1, 1]))
+        self.assertEqual(ComponentDecomposition.labels(graph).tolist(), [0, 1, 2, 0, 1, 0])
+        self.assertEqual(ComponentDecomposition.labels(PackedAffinity.from_dense(sym)).tolist(), [0, 1, 2, 0, 1, 0])
+
+    def test_allocate_covers_as_many_users_as_possible(self):
+        available = {4: 3, 3: 2}
+        self.assertEqual(ComponentDecomposition.allocate(10, 4, available), [4, 3, 3])
+        self.assertEqual(available, {4: 2, 3: 0})
+        self.assertEqual(ComponentDecomposition.allocate(10, 4, available), [4, 4])
+        self.assertEqual(ComponentDecomposition.allocate(3, 4, available), [])
+
+    def test_subproblem_matches_dense_restriction(self):
+        sym = block_matrix([5, 4], seed=1)
+        users = [7, 2, 5, 0]
+        graph = SparseAffinity.from_triplets(9, *np.nonzero(np.triu(sym)), sym[np.nonzero(np.triu(sym))])
+        self.assertEqual(ComponentDecomposition.subproblem(graph, users).to_dense().tolist(),
+                         ComponentDecomposition.subproblem(sym, users).tolist())
+
+    def test_connected_graph_is_not_decomposed(self):
+        sym = block_matrix([80], seed=2)
+        solve = partial(Clustering._solve_start, group_size=4)
+        self.assertIsNone(ComponentDecomposition.solve(sym, [4] * 20, solve))
+
+    def test_solve_keeps_balanced_sizes(self):
+        sym = block_matrix([70, 66, 5, 3, 2], seed=3)
+        group_sizes = Clustering._Clustering__compute_balanced_group_sizes(len(sym), 4)
+        solve = partial(Clustering._solve_start, group_size=4)
+        for affinity in (sym, SparseAffinity.from_triplets(len(sym), *np.nonzero(sym), sym[np.nonzero(sym)] // 2)):
+            groups = ComponentDecomposition.solve(affinity, group_sizes, solve)
+            self.assertEqual(sorted(len(g) for g in groups), sorted(group_sizes))
+            self.assertEqual(sorted(i for g in groups for i in g), list(range(len(sym))))
+
+    def test_parallel_solve_matches_sequential(self):
+        sym = block_matrix([70, 65, 64], seed=4)
+        group_sizes = Clustering._Clustering__compute_balanced_group_sizes(len(sym), 5)
+        solve = partial(Clustering._solve_start, group_size=5)
+        self.assertEqual(ComponentDecomposition.solve(sym, group_sizes, solve, restarts=2, workers=2, seed=1),
+                         ComponentDecomposition.solve(sym, group_sizes, solve, restarts=2, workers=1, seed=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
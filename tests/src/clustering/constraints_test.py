@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from src.clustering.constraints import Constraints
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+class TestConstraints(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        matrix = rng.integers(0, 6, size=(12, 12)) * (rng.random((12, 12)) < 0.5)
+        np.fill_diagonal(matrix, 0)
+        self.sym = matrix + matrix.T
+        rows, cols = np.nonzero(matrix)
+        self.graph = SparseAffinity.from_triplets(12, rows, cols, matrix[rows, cols])
+        self.constraints = Constraints.compile(12, [[0, 5], [5, 9], [2, 3]], [[0, 1], [2, 4, 7]])
+
+    def test_compile_merges_must_links(self):
+        self.assertEqual(self.constraints.count, 9)
+        self.assertEqual(self.constraints.members[0], [0, 5, 9])
+        self.assertEqual(self.constraints.locked.tolist(), [i in (0, 2, 3, 5, 9) for i in range(12)])
+
+    def test_forbidden_pairs_are_closed_over_super_nodes(self):
+        forbidden = self.constraints.forbidden
+        for i, j in [(0, 1), (5, 1), (9, 1), (2, 4), (3, 4), (3, 7), (4, 7)]:
+            self.assertTrue(forbidden(i, j) and forbidden(j, i))
+        self.assertFalse(forbidden(0, 5))
+        users = np.arange(12)
+        self.assertFalse(forbidden(users, users).any())
+        self.assertEqual(forbidden(users[:, None], users[None, :]).sum(), 2 * 8)
+        self.assertEqual(self.constraints.conflicts[0].tolist(), [1])
+
+    def test_memory_grows_with_the_constraints(self):
+        constraints = Constraints.compile(100000, [[0, 1]], [[2, 3], [4, 5, 6]])
+        self.assertFalse(constraints.forbidden(np.arange(100000), np.arange(100000)[::-1]).any())
+        self.assertEqual(sum(len(conflicts) for conflicts in constraints.conflicts), 8)
+
+    def test_compile_rejects_contradictions(self):
+        with self.assertRaises(ValueError):
+            Constraints.compile(4, [[0, 1], [1, 2]], [[0, 2]])
+
+    def test_contract_sums_affinities(self):
+        contracted = self.constraints.contract(self.sym)
+        self.assertEqual(contracted[0, 1], self.sym[[0, 5, 9], 1].sum())
+        self.assertEqual(contracted.sum(), self.sym.sum() - sum(
+            self.sym[np.ix_(m, m)].sum() for m in self.constraints.members
+        ))
+        self.assertTrue(np.array_equal(self.constraints.contract(self.graph).to_dense(), contracted))
+
+    def test_greedy_satisfies_constraints(self):
+        for sym in (self.sym, self.graph):
+            groups = self.constraints.greedy(sym, [3, 3, 3, 3])
+            self.assertTrue(self.constraints.satisfied(groups))
+            self.assertEqual(sorted(u for g in groups for u in g), list(range(12)))
+            self.assertEqual([len(g) for g in groups], [3, 3, 3, 3])
+
+    def test_greedy_rejects_oversized_must_link(self):
+        with self.assertRaises(ValueError):
+            self.constraints.greedy(self.sym, [2] * 6)
+
+    def test_masks(self):
+        swaps = self.constraints.swap_mask([1, 6], [4, 8])
+        self.assertTrue(swaps.all())
+        swaps = self.constraints.swap_mask([0, 5, 9], [1, 6, 8])
+        self.assertFalse(swaps.any())
+        moves = self.constraints.move_mask([4, 6], [7, 8])
+        self.assertEqual(moves.tolist(), [False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
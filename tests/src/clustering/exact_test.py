@@ -0,0 +1,72 @@
+import itertools
+import unittest
+import numpy as np
+from src.clustering.cancellation import CancellationToken
+from src.clustering.exact import ExactSolver, OptimalityProof
+
+
+def partition_score(groups, sym):
+    return int(sum(sym[np.ix_(g, g)].sum() for g in groups)) // 2
+
+
+def brute_force(sym, sizes):
+    best = 0
+
+    def search(unassigned, sizes_left, score):
+        nonlocal best
+        if not unassigned:
+            best = max(best, score)
+            return
+        for size in set(sizes_left):
+            rest_sizes = list(sizes_left)
+            rest_sizes.remove(size)
+            for others in itertools.combinations(unassigned[1:], size - 1):
+                group = (unassigned[0],) + others
+                rest = [u for u in unassigned if u not in group]
+                search(rest, rest_sizes, score + partition_score([list(group)], sym))
+
+    search(list(range(len(sym))), sizes, 0)
+    return best
+
+
+class TestExactSolver(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.instances = []
+        for n, sizes in ((8, [3, 3, 2]), (9, [3, 3, 3]), (10, [2] * 5)):
+            matrix = rng.integers(0, 6, size=(n, n)) * (rng.random((n, n)) < 0.35)
+            sym = matrix + matrix.T
+            np.fill_diagonal(sym, 0)
+            incumbent = np.split(np.arange(n), np.cumsum(sizes)[:-1])
+            self.instances.append((sym, sizes, [g.tolist() for g in incumbent]))
+
+    def test_solve_matches_brute_force(self):
+        for sym, sizes, incumbent in self.instances:
+            groups, score, proof = ExactSolver.solve(sym, sizes, incumbent)
+            self.assertEqual(score, brute_force(sym, sizes))
+            self.assertEqual(score, partition_score(groups, sym))
+            self.assertEqual(sorted(len(g) for g in groups), sorted(sizes))
+            self.assertTrue(proof.proved_optimal)
+            self.assertEqual(proof.gap, 0.0)
+
+    def test_upper_bound_dominates_optimum(self):
+        for sym, sizes, incumbent in self.instances:
+            _, score, _ = ExactSolver.solve(sym, sizes, incumbent)
+            self.assertGreaterEqual(ExactSolver.upper_bound(sym, sizes), score)
+
+    def test_cancelled_search_returns_incumbent_without_proof(self):
+        sym, sizes, incumbent = self.instances[1]
+        token = CancellationToken()
+        token.cancel()
+        groups, score, proof = ExactSolver.solve(sym, sizes, incumbent, cancel=token)
+        self.assertEqual(groups, incumbent)
+        self.assertFalse(proof.proved_optimal)
+        self.assertGreaterEqual(proof.upper_bound, score)
+
+    def test_proof_repr(self):
+        self.assertIn("optimal", repr(OptimalityProof(12, 12, True, nodes=3)))
+        self.assertEqual(OptimalityProof(10, 14.5, False).gap, 4.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
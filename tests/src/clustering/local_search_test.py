@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from src.clustering.constraints import Constraints
+from src.clustering.local_search import LocalSearch
+from src.clustering.objectives import MaximinObjective
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+def partition_score(groups, sym):
+    return int(sum(sym[np.ix_(g, g)].sum() for g in groups)) // 2
+
+
+class TestLocalSearch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        matrix = rng.integers(0, 6, size=(12, 12)) * (rng.random((12, 12)) < 0.4)
+        self.sym = matrix + matrix.T
+        np.fill_diagonal(self.sym, 0)
+        rows, cols = np.nonzero(matrix)
+        self.graph = SparseAffinity.from_triplets(12, rows, cols, matrix[rows, cols])
+        self.groups = [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10], [11]]
+
+    def test_refine_finds_improving_swap(self):
+        sym = np.array([
+            [0, 0, 9, 0],
+            [0, 0, 0, 9],
+            [9, 0, 0, 0],
+            [0, 9, 0, 0],
+        ])
+        refined = LocalSearch.refine([[0, 1], [2, 3]], sym)
+        self.assertEqual(partition_score(refined, sym), 18)
+
+    def test_refine_never_decreases_score_and_keeps_sizes(self):
+        refined = LocalSearch.refine(self.groups, self.sym)
+        self.assertGreaterEqual(partition_score(refined, self.sym), partition_score(self.groups, self.sym))
+        self.assertEqual(sorted(len(g) for g in refined), sorted(len(g) for g in self.groups))
+        self.assertEqual(sorted(u for g in refined for u in g), list(range(12)))
+
+    def test_refine_reaches_local_optimum(self):
+        refined = LocalSearch.refine(self.groups, self.sym)
+        self.assertEqual(LocalSearch.refine(refined, self.sym), refined)
+
+    def test_refine_sparse_matches_dense(self):
+        self.assertEqual(LocalSearch.refine(self.groups, self.graph), LocalSearch.refine(self.groups, self.sym))
+
+    def test_refine_respects_budget(self):
+        self.assertEqual(LocalSearch.refine(self.groups, self.sym, max_iterations=0), self.groups)
+        self.assertEqual(LocalSearch.refine(self.groups, self.sym, time_limit=-1.0), self.groups)
+
+    def test_refine_with_objective_never_lowers_it(self):
+        directed = np.triu(self.sym)
+        objective = MaximinObjective(directed)
+        refined = LocalSearch.refine(self.groups, self.sym, objective=objective)
+        self.assertGreaterEqual(objective.evaluate(refined), objective.evaluate(self.groups))
+        self.assertEqual(sorted(len(g) for g in refined), sorted(len(g) for g in self.groups))
+
+    def test_refine_keeps_constraints(self):
+        constraints = Constraints.compile(12, [[0, 1]], [[3, 6], [4, 7], [5, 8]])
+        self.assertTrue(constraints.satisfied(self.groups))
+        for sym in (self.sym, self.graph):
+            refined = LocalSearch.refine(self.groups, sym, constraints=constraints)
+            self.assertTrue(constraints.satisfied(refined))
+            self.assertGreaterEqual(partition_score(refined, self.sym), partition_score(self.groups, self.sym))
+
+
+if __name__ == "__main__":
+    unittest.main()
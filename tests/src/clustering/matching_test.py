@@ -0,0 +1,75 @@
+import itertools
+import unittest
+import numpy as np
+from src.clustering.matching import PairMatching
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+def matching_weight(edges, mate):
+    weights = {(min(i, j), max(i, j)): w for i, j, w in edges}
+    return sum(weights[(v, m)] for v, m in enumerate(mate) if m > v)
+
+
+def brute_force_weight(n, edges):
+    weights = {(min(i, j), max(i, j)): w for i, j, w in edges}
+    best = 0
+    for count in range(1, n // 2 + 1):
+        for chosen in itertools.combinations(weights, count):
+            used = [v for pair in chosen for v in pair]
+            if len(used) == len(set(used)):
+                best = max(best, sum(weights[pair] for pair in chosen))
+    return best
+
+
+class TestPairMatching(unittest.TestCase):
+    def test_blossom_instance(self):
+        # Odd cycle 0-1-2 forces a blossom; the optimum matches 0-1 (or 1-2) and 2-3 (or 0-3).
+        edges = [(0, 1, 6), (1, 2, 6), (0, 2, 5), (2, 3, 4), (0, 3, 1)]
+        mate = PairMatching.max_weight_matching(edges)
+        self.assertEqual(matching_weight(edges, mate), brute_force_weight(4, edges))
+
+    def test_matches_brute_force_on_random_graphs(self):
+        rng = np.random.default_rng(9)
+        for _ in range(40):
+            n = int(rng.integers(3, 9))
+            edges = [(i, j, int(rng.integers(1, 10))) for i in range(n) for j in range(i + 1, n) if rng.random() < 0.5]
+            if not edges:
+                continue
+            mate = PairMatching.max_weight_matching(edges)
+            for v, m in enumerate(mate):
+                if m >= 0:
+                    self.assertEqual(mate[m], v)
+            self.assertEqual(matching_weight(edges, mate), brute_force_weight(n, edges))
+
+    def test_max_cardinality(self):
+        edges = [(0, 1, 2), (1, 2, 10), (2, 3, 2)]
+        self.assertEqual(PairMatching.max_weight_matching(edges), [-1, 2, 1, -1])
+        self.assertEqual(PairMatching.max_weight_matching(edges, max_cardinality=True), [1, 0, 3, 2])
+
+    def test_pair_handles_odd_count(self):
+        sym = np.array([
+            [0, 5, 0, 0, 0],
+            [5, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 3],
+            [0, 0, 0, 3, 0],
+        ])
+        groups = PairMatching.pair(sym)
+        self.assertEqual(groups, [[0, 1], [3, 4], [2]])
+
+    def test_pair_gives_up_after_its_deadline(self):
+        sym = np.array([[0, 2, 1], [2, 0, 3], [1, 3, 0]])
+        self.assertIsNone(PairMatching.pair(sym, deadline=0.0))
+        self.assertIsNotNone(PairMatching.pair(sym, deadline=None))
+
+    def test_pair_sparse_matches_dense(self):
+        rows = np.array([0, 1, 2, 3, 4, 5])
+        cols = np.array([1, 2, 3, 4, 5, 0])
+        scores = np.array([3, 1, 4, 1, 5, 9])
+        graph = SparseAffinity.from_triplets(6, rows, cols, scores)
+        self.assertEqual(PairMatching.pair(graph), PairMatching.pair(graph.to_dense()))
+        self.assertEqual(graph.score_groups(PairMatching.pair(graph)), 13)
+
+
+if __name__ == "__main__":
+    unittest.main()
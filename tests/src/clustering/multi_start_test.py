@@ -0,0 +1,55 @@
+import unittest
+from functools import partial
+import numpy as np
+from src.clustering.clustering import Clustering
+from src.clustering.constraints import Constraints
+from src.clustering.multi_start import MultiStart
+from src.clustering.objectives import Objectives
+from src.clustering.packed_affinity import PackedAffinity
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+class TestMultiStart(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        matrix = rng.integers(1, 6, size=(30, 30)) * (rng.random((30, 30)) < 0.15)
+        self.sym = matrix + matrix.T
+        np.fill_diagonal(self.sym, 0)
+        rows, cols = np.nonzero(matrix)
+        self.graph = SparseAffinity.from_triplets(30, rows, cols, matrix[rows, cols])
+        self.solve = partial(Clustering._solve_start, group_size=4)
+
+    def test_best_start_is_at_least_deterministic_start(self):
+        _, deterministic = self.solve(self.sym)
+        groups, score = MultiStart.run(self.solve, self.sym, restarts=6, seed=3)
+        self.assertGreaterEqual(score, deterministic)
+        self.assertEqual(sorted(u for g in groups for u in g), list(range(30)))
+
+    def test_single_restart_is_deterministic_start(self):
+        self.assertEqual(MultiStart.run(self.solve, self.sym, restarts=1), self.solve(self.sym))
+
+    def test_process_pool_matches_sequential_run(self):
+        for sym in (self.sym, self.graph, PackedAffinity.from_dense(self.sym)):
+            sequential = MultiStart.run(self.solve, sym, restarts=4, workers=1, seed=5)
+            parallel = MultiStart.run(self.solve, sym, restarts=4, workers=2, seed=5)
+            self.assertEqual(sequential, parallel)
+
+    def test_process_pool_shares_objective_and_constraints(self):
+        solve = partial(Clustering._solve_start, group_size=4, refine=True)
+        constraints = Constraints.compile(30, [[0, 1]], [[2, 3], [4, 5, 6]])
+        results = []
+        for workers in (1, 2):
+            objective = Objectives.create("maximin", self.sym // 2)
+            results.append(MultiStart.run(solve, self.sym, 4, workers, 5, objective, constraints))
+        self.assertEqual(results[0], results[1])
+        self.assertTrue(constraints.satisfied(results[1][0]))
+
+    def test_map_runs_every_solver_once(self):
+        solvers = [partial(Clustering._solve_start, group_size=size) for size in (3, 4, 5)]
+        for sym in (self.sym, self.graph):
+            expected = [solve(sym) for solve in solvers]
+            self.assertEqual(MultiStart.map(solvers, sym), expected)
+            self.assertEqual(MultiStart.map(solvers, sym, workers=2), expected)
+
+if __name__ == "__main__":
+    unittest.main()
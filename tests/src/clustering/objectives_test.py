@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+from src.clustering.objectives import EnvyObjective, MaximinObjective, Objective, Objectives, SumObjective
+
+
+def brute_sum(groups, directed):
+    return sum(int(directed[i, j]) for g in groups for i in g for j in g if i != j)
+
+
+def brute_maximin(groups, directed):
+    return min(sum(int(directed[i, j]) for j in g if j != i) for g in groups for i in g)
+
+
+def brute_envy(groups, directed):
+    label = {u: k for k, g in enumerate(groups) for u in g}
+    n = len(directed)
+    return -sum(1 for i in range(n) for j in range(n) if i != j and directed[i, j] > 0 and label[i] != label[j])
+
+
+class TestObjectives(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.directed = rng.integers(0, 6, size=(11, 11)) * (rng.random((11, 11)) < 0.5)
+        np.fill_diagonal(self.directed, 0)
+        self.groups = [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10]]
+        self.cases = [
+            (SumObjective(self.directed), brute_sum),
+            (MaximinObjective(self.directed), brute_maximin),
+            (EnvyObjective(self.directed), brute_envy),
+        ]
+
+    def test_evaluate_matches_brute_force(self):
+        for objective, brute in self.cases:
+            self.assertEqual(objective.evaluate(self.groups), brute(self.groups, self.directed), objective.name)
+
+    def test_swap_delta_matches_evaluation(self):
+        for objective, _ in self.cases:
+            objective.bind(self.groups)
+            for a, b in [(0, 3), (2, 9), (5, 7), (10, 1)]:
+                before = objective.evaluate(objective.groups)
+                delta = objective.swap_delta(a, b)
+                objective.swap(a, b)
+                self.assertEqual(round(delta), objective.evaluate(objective.groups) - before, objective.name)
+
+    def test_move_delta_matches_evaluation(self):
+        for objective, _ in self.cases:
+            objective.bind(self.groups)
+            before = objective.evaluate(objective.groups)
+            delta = objective.move_delta(0, 3)
+            objective.move(0, 3)
+            self.assertEqual(sorted(len(g) for g in objective.groups), [2, 3, 3, 3])
+            self.assertEqual(round(delta), objective.evaluate(objective.groups) - before, objective.name)
+
+    def test_maximin_tracks_satisfaction(self):
+        objective = MaximinObjective(self.directed)
+        objective.bind(self.groups)
+        objective.swap(0, 9)
+        objective.move(4, 3)
+        for group in objective.groups:
+            expected = self.directed[np.ix_(group, group)].sum(axis=1)
+            self.assertEqual(objective.satisfaction[group].tolist(), expected.tolist())
+
+    def test_pairwise_weights(self):
+        self.assertTrue(np.array_equal(SumObjective(self.directed).weights, self.directed + self.directed.T))
+        self.assertIsNone(MaximinObjective(self.directed).weights)
+
+    def test_pair_triplets_give_the_weights(self):
+        rows, cols = np.nonzero(self.directed)
+        for objective in (SumObjective(self.directed), EnvyObjective(self.directed)):
+            weight_rows, weight_cols, weights, offset = objective.pair_triplets(rows, cols, self.directed[rows, cols])
+            directed = np.zeros_like(self.directed)
+            directed[weight_rows, weight_cols] = weights
+            self.assertTrue(np.array_equal(directed + directed.T, objective.weights))
+            self.assertEqual(offset, objective.offset)
+
+    def test_base_objective_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Objective(self.directed)
+
+    def test_registry(self):
+        self.assertEqual(Objectives.names(), ("sum", "maximin", "envy"))
+        self.assertIsInstance(Objectives.create("envy", self.directed), EnvyObjective)
+        with self.assertRaises(ValueError):
+            Objectives.create("happiness", self.directed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from src.clustering.packed_affinity import PackedAffinity
+
+
+class TestPackedAffinity(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.matrix = rng.integers(0, 11, size=(9, 9)) * (rng.random((9, 9)) < 0.5)
+        np.fill_diagonal(self.matrix, 0)
+        self.sym = self.matrix + self.matrix.T
+        rows, cols = np.nonzero(self.matrix)
+        self.packed = PackedAffinity.from_triplets(9, rows, cols, self.matrix[rows, cols])
+
+    def test_compact_dtype_keeps_headroom(self):
+        self.assertEqual(PackedAffinity.compact_dtype(20), np.int8)
+        self.assertEqual(PackedAffinity.compact_dtype(64), np.int16)
+        self.assertEqual(PackedAffinity.compact_dtype(40000), np.int32)
+        self.assertEqual(PackedAffinity.compact_dtype(2 ** 40), np.int64)
+
+    def test_stores_upper_triangle_in_compact_dtype(self):
+        self.assertEqual(len(self.packed.data), 9 * 8 // 2)
+        self.assertEqual(self.packed.data.dtype, np.int8)
+        self.assertTrue(np.array_equal(self.packed.to_dense(), self.sym))
+        self.assertTrue(np.array_equal(PackedAffinity.from_dense(self.sym).data, self.packed.data))
+
+    def test_rows_and_blocks_match_dense(self):
+        for i in range(9):
+            self.assertEqual(self.packed.row(i).tolist(), self.sym[i].tolist())
+        rows, cols = [0, 4, 8], [1, 4, 7, 2]
+        self.assertEqual(self.packed.block(rows, cols).tolist(), self.sym[np.ix_(rows, cols)].tolist())
+        self.assertEqual(self.packed.rows_sum(rows).tolist(), self.sym[rows].sum(axis=0).tolist())
+        self.assertEqual(self.packed.row_sums().tolist(), self.sym.sum(axis=1).tolist())
+
+    def test_nonzero_lists_upper_entries(self):
+        rows, cols = self.packed.nonzero()
+        expected_rows, expected_cols = np.nonzero(np.triu(self.sym))
+        self.assertEqual(rows.tolist(), expected_rows.tolist())
+        self.assertEqual(cols.tolist(), expected_cols.tolist())
+
+    def test_score_groups(self):
+        groups = [[0, 1, 2], [3, 4, 5], [6, 7, 8]]
+        expected = sum(int(self.sym[np.ix_(g, g)].sum()) for g in groups) // 2
+        self.assertEqual(self.packed.score_groups(groups), expected)
+
+    def test_empty_and_single_user(self):
+        for size in (0, 1):
+            packed = PackedAffinity.from_triplets(size, np.zeros(0, int), np.zeros(0, int), np.zeros(0, int))
+            self.assertEqual(packed.to_dense().shape, (size, size))
+            self.assertEqual(packed.block(list(range(size)), list(range(size))).shape, (size, size))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.clustering.exact import OptimalityProof
+from src.clustering.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.rows = np.array([0, 1, 2])
+        self.cols = np.array([1, 2, 0])
+        self.scores = np.array([3, 4, 5])
+
+    def test_fingerprint_depends_on_matrix_and_options(self):
+        key = ResultCache.fingerprint(3, self.rows, self.cols, self.scores, group_size=3, method="greedy")
+        shuffled = [2, 0, 1]
+        self.assertEqual(key, ResultCache.fingerprint(
+            3, self.rows[shuffled], self.cols[shuffled], self.scores[shuffled], method="greedy", group_size=3
+        ))
+        self.assertNotEqual(key, ResultCache.fingerprint(3, self.rows, self.cols, self.scores, group_size=2, method="greedy"))
+        self.assertNotEqual(key, ResultCache.fingerprint(3, self.rows, self.cols, self.scores + 1, group_size=3, method="greedy"))
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", [[0, 1]], 1)
+        cache.put("b", [[1, 2]], 2)
+        cache.get("a")
+        cache.put("c", [[0, 2]], 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ([[0, 1]], 1, None))
+
+    def test_disk_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ResultCache(directory=directory).put("k", [[0, 1], [2]], 7, OptimalityProof(7, 9.0, False, 3, 1))
+            groups, score, proof = ResultCache(directory=directory).get("k")
+            self.assertEqual((groups, score), ([[0, 1], [2]], 7))
+            self.assertEqual((proof.upper_bound, proof.proved_optimal, proof.nodes), (9.0, False, 3))
+
+    def test_disk_tier_evicts_by_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(directory=directory, max_disk_bytes=250)
+            for k in range(5):
+                cache.put(f"key{k}", [list(range(20))], k)
+                os.utime(os.path.join(directory, f"key{k}.json"), (k, k))
+            names = sorted(os.listdir(directory))
+            self.assertLessEqual(sum(os.path.getsize(os.path.join(directory, n)) for n in names), 250)
+            self.assertIn("key4.json", names)
+            self.assertNotIn("key0.json", names)
+
+    def test_beside_uses_store_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache.beside(os.path.join(directory, "data.json"))
+            self.assertEqual(cache.directory, os.path.join(directory, ResultCache.DIRECTORY_NAME))
+            cache.put("k", [[0]], 0)
+            cache.clear()
+            self.assertEqual(os.listdir(cache.directory), [])
+            self.assertIsNone(cache.get("k"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+import numpy as np
+from src.clustering.shared_arrays import SharedArrays
+
+
+class TestSharedArrays(unittest.TestCase):
+    def test_attach_returns_read_only_copies(self):
+        arrays = {"matrix": np.arange(12).reshape(3, 4), "empty": np.array([], dtype=np.int64)}
+        with SharedArrays(arrays) as shared:
+            attached, blocks = SharedArrays.attach(shared.handles)
+            np.testing.assert_array_equal(attached["matrix"], arrays["matrix"])
+            self.assertEqual(attached["empty"].shape, (0,))
+            self.assertFalse(attached["matrix"].flags.writeable)
+            del attached
+            for block in blocks:
+                block.close()
+
+    def test_close_releases_blocks(self):
+        shared = SharedArrays({"a": np.ones(3)})
+        shared.close()
+        self.assertEqual(shared.blocks, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from src.clustering.sparse_affinity import SparseAffinity
+
+
+class TestSparseAffinity(unittest.TestCase):
+    def setUp(self):
+        rows = np.array([0, 1, 1, 2, 3, 3])
+        cols = np.array([1, 0, 2, 2, 0, 1])
+        scores = np.array([5, 3, 4, 9, 0, 2])
+        self.graph = SparseAffinity.from_triplets(4, rows, cols, scores)
+
+    def test_from_triplets_symmetrizes_and_drops_zeros(self):
+        dense = np.zeros((4, 4), dtype=int)
+        for i in range(4):
+            neighbors, weights = self.graph.neighbors(i)
+            dense[i, neighbors] = weights
+        expected = np.array([
+            [0, 8, 0, 0],
+            [8, 0, 4, 2],
+            [0, 4, 0, 0],
+            [0, 2, 0, 0],
+        ])
+        np.testing.assert_array_equal(dense, expected)
+        self.assertEqual(self.graph.nnz, 6)
+
+    def test_row_sums(self):
+        self.assertEqual(self.graph.row_sums().tolist(), [8, 14, 4, 2])
+
+    def test_score_groups(self):
+        self.assertEqual(self.graph.score_groups([[0, 1], [2, 3]]), 8)
+        self.assertEqual(self.graph.score_groups([[0, 1, 3], [2]]), 10)
+
+    def test_empty_graph(self):
+        empty = np.array([], dtype=int)
+        graph = SparseAffinity.from_triplets(0, empty, empty, empty)
+        self.assertEqual(graph.nnz, 0)
+        self.assertEqual(graph.row_sums().tolist(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
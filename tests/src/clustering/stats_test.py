@@ -0,0 +1,41 @@
+import tracemalloc
+import unittest
+from src.clustering.stats import ClusterStats
+
+
+class TestClusterStats(unittest.TestCase):
+    def test_record_accumulates_phases(self):
+        stats = ClusterStats()
+        stats.record("leaders", 0.5)
+        stats.record("leaders", 0.25)
+        with stats.phase("scoring"):
+            pass
+        self.assertEqual(stats.seconds["leaders"], 0.75)
+        self.assertEqual(stats.calls, {"leaders": 2, "scoring": 1})
+        self.assertEqual(stats.as_dict()["phases"]["leaders"], {"seconds": 0.75, "calls": 2})
+
+    def test_measure_without_stats_does_nothing(self):
+        with ClusterStats.measure(None, "build"):
+            value = 1
+        self.assertEqual(value, 1)
+
+    def test_context_traces_peak_memory(self):
+        with ClusterStats() as stats:
+            block = bytearray(1_000_000)
+            del block
+        self.assertGreaterEqual(stats.peak_memory, 1_000_000)
+        self.assertGreater(stats.total_seconds, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_context_keeps_existing_tracing(self):
+        tracemalloc.start()
+        try:
+            with ClusterStats():
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+from src.clustering.sweep import SweepResult
+
+
+class TestSweepResult(unittest.TestCase):
+    def test_min_satisfaction_is_worst_group_minimum(self):
+        result = SweepResult(3, [["a", "b", "c"], ["d", "e"]], 12, [4, 1], 0.5)
+        self.assertEqual(result.min_satisfaction, 1)
+        self.assertEqual(result.as_row(), {
+            "group_size": 3, "groups": 2, "score": 12, "min_satisfaction": 1, "runtime": 0.5
+        })
+
+    def test_empty_result(self):
+        self.assertEqual(SweepResult(4, [], 0, [], 0.0).min_satisfaction, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+from src.clustering.affinity_matrix import AffinityMatrix
+from src.clustering.clustering import Clustering
+from src.clustering.matching import PairMatching
 from src.service.algo_service import AlgoService
+from src.service.storage_service import StorageService
 from src.domain.user import User
 
 class TestAlgoService(unittest.TestCase):
@@ -40,5 +46,68 @@ class TestAlgoService(unittest.TestCase):
         service.clustering.cluster_users.assert_called_once_with(self.preferences, 1)
         self.assertEqual(result, [[self.user1], [self.user2], [self.user3], [self.user4]])
 
+
+class TestAlgoServiceClusterVotes(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage_service = StorageService(os.path.join(self.directory.name, "data.json"))
+        students = [f"s{i}" for i in range(8)]
+        preferences = {"s0": {"s1": 6, "s2": 4}, "s3": {"s4": 10}, "s5": {"s6": 5, "s7": 5}}
+        self.storage_service.storage.save_vote("v1", {"id": "v1", "group_size": 4, "eligible_students": students,
+                                                      "preferennces": preferences})
+        self.storage_service.storage.save_vote("v2", {"id": "v2", "group_size": 2, "eligible_students": students[:6],
+                                                      "preferennces": preferences})
+        self.storage_service.storage.save_vote("bad", {"id": "bad", "group_size": 0, "eligible_students": students[:4],
+                                                       "preferennces": {}})
+        self.service = AlgoService({}, self.storage_service)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cluster_votes_saves_every_vote_in_one_write(self):
+        self.storage_service.storage._write = MagicMock(wraps=self.storage_service.storage._write)
+        results, errors = self.service.cluster_votes(["v1", "v2", "bad", "missing"])
+        self.assertEqual(sorted(results), ["v1", "v2"])
+        self.assertEqual(sorted(errors), ["bad", "missing"])
+        self.assertIsInstance(errors["bad"], ValueError)
+        self.assertEqual(sorted(len(g) for g in results["v1"]), [4, 4])
+        self.storage_service.storage._write.assert_called_once()
+        saved = self.storage_service.storage.get_groups().values()
+        expected = sorted(vote_id for vote_id, groups in results.items() for _ in groups)
+        self.assertEqual(sorted(group["vote_id"] for group in saved), expected)
+
+    def test_cluster_votes_in_parallel_matches_sequential(self):
+        sequential, _ = self.service.cluster_votes(["v1", "v2"])
+        parallel, errors = self.service.cluster_votes(["v1", "v2", "bad"], workers=2)
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(list(errors), ["bad"])
+        self.assertEqual(len(self.storage_service.storage.get_groups()), sum(map(len, parallel.values())))
+
+    def test_cluster_votes_reads_the_maintained_matrices(self):
+        first, _ = self.service.cluster_votes(["v1", "v2"])
+        matrix = self.storage_service.get_affinity_matrix("v1")
+        matrix.submit("s7", {"s0": 50, "s1": 50, "s2": 50})
+        with patch.object(AffinityMatrix, "from_preferences") as from_preferences:
+            results, _ = self.service.cluster_votes(["v1", "v2"])
+        from_preferences.assert_not_called()
+        self.assertEqual(results["v2"], first["v2"])
+        self.assertIn(["s0", "s1", "s2", "s7"], [sorted(group) for group in results["v1"]])
+
+    def test_repeated_cluster_votes_are_answered_from_the_cache(self):
+        for workers in (1, 2):
+            first, _ = self.service.cluster_votes(["v1", "v2"], workers=workers, refine=True)
+            with patch.object(Clustering, "_solve_start", side_effect=AssertionError("cache miss")), \
+                    patch.object(PairMatching, "pair", side_effect=AssertionError("cache miss")):
+                again, errors = AlgoService({}, self.storage_service).cluster_votes(
+                    ["v1", "v2"], workers=workers, refine=True
+                )
+            self.assertEqual((again, errors), (first, {}))
+            self.storage_service.result_cache.clear()
+
+    def test_cluster_votes_requires_storage(self):
+        with self.assertRaises(ValueError):
+            AlgoService({}).cluster_votes(["v1"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,12 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from src.service.storage_service import StorageService
 from src.domain.group import Group
+from src.domain.user import User
+from src.storage.storage_json import StorageJSON
+from src.storage.storage_sqlite import StorageSQLite
 
 
 class TestStorageServiceGetGroupById(unittest.TestCase):
@@ -30,5 +35,102 @@ class TestStorageServiceGetGroupById(unittest.TestCase):
         self.storage_service.storage.get_group_by_id.assert_called_once_with("nonexistent")
         self.assertIsNone(result)
 
+class TestStorageServiceAffinityMatrix(unittest.TestCase):
+    def setUp(self):
+        self.storage_service = StorageService("test_data.json")
+        self.storage_service.storage = MagicMock()
+        self.vote = {"id": "vote1", "eligible_students": ["alice", "bob", "carol"],
+                     "preferennces": {"alice": {"bob": 6}}}
+        self.storage_service.storage.get_votes.return_value = {"vote1": self.vote}
+        self.storage_service.storage.get_vote_by_id.side_effect = {"vote1": self.vote}.get
+
+    def test_matrix_is_built_once_from_stored_preferences(self):
+        matrix = self.storage_service.get_affinity_matrix("vote1")
+        self.assertEqual(matrix.usernames, ["alice", "bob", "carol"])
+        self.assertIs(self.storage_service.get_affinity_matrix("vote1"), matrix)
+        self.assertIsNone(self.storage_service.get_affinity_matrix("missing"))
+
+    def test_update_vote_preferences_applies_submissions(self):
+        matrix = self.storage_service.get_affinity_matrix("vote1")
+        self.storage_service.update_vote_preferences("vote1", {"bob": {"alice": 3, "carol": 2}})
+        self.storage_service.storage.save_vote.assert_called_once()
+        self.assertEqual(matrix.preferences_of("alice"), {})
+        self.assertEqual(matrix.preferences_of("bob"), {"alice": 3, "carol": 2})
+        self.assertEqual(int(matrix.symmetric()[0, 1]), 3)
+
+    def test_delete_vote_drops_matrix(self):
+        matrix = self.storage_service.get_affinity_matrix("vote1")
+        self.storage_service.delete_vote("vote1")
+        self.assertIsNot(self.storage_service.get_affinity_matrix("vote1"), matrix)
+
+
+class TestStorageServiceVotePreferences(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage_service = StorageService(os.path.join(self.directory.name, "data.json"))
+        self.storage_service.storage.save_vote("vote1", {"id": "vote1", "eligible_students": ["a", "b"],
+                                                         "preferennces": {}})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_preferences_modified_in_place_reach_the_matrix(self):
+        matrix = self.storage_service.get_affinity_matrix("vote1")
+        vote = self.storage_service.get_vote("vote1")
+        vote["preferennces"]["a"] = {"b": 5}
+        self.storage_service.update_vote_preferences("vote1", vote["preferennces"])
+        self.assertEqual(self.storage_service.get_vote("vote1")["preferennces"], {"a": {"b": 5}})
+        self.assertEqual(matrix.preferences_of("a"), {"b": 5})
+
+
+class TestStorageServiceBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage_service = StorageService(os.path.join(self.directory.name, "data.json"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_batch_writes_once(self):
+        storage = self.storage_service.storage
+        with patch.object(storage, "_replace_file", wraps=storage._replace_file) as replace:
+            with self.storage_service.batch():
+                for name in ("alice", "bob", "carol"):
+                    user = User(username=name)
+                    self.storage_service.create_user(user)
+            replace.assert_called_once()
+        self.assertEqual(len(self.storage_service.get_all_users()), 3)
+
+
+class TestStorageServiceBackend(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_backend_is_chosen_from_the_filename(self):
+        json_storage = StorageService.open_storage(os.path.join(self.directory.name, "data.json"))
+        self.assertIsInstance(json_storage, StorageJSON)
+        for name in ("data.db", "data.sqlite3"):
+            storage = StorageService.open_storage(os.path.join(self.directory.name, name))
+            self.assertIsInstance(storage, StorageSQLite)
+            storage.close()
+        storage = StorageService.open_storage("sqlite:///" + os.path.join(self.directory.name, "url.db"))
+        self.assertEqual(storage.filename, os.path.join(self.directory.name, "url.db"))
+        storage.close()
+        memory = StorageService.open_storage("sqlite://")
+        self.assertEqual(memory.filename, ":memory:")
+        memory.close()
+
+    def test_service_works_on_sqlite(self):
+        service = StorageService(os.path.join(self.directory.name, "data.db"))
+        with service.batch():
+            service.create_user(User(username="alice", email="alice@example.com"))
+            service.create_user(User(username="bob", email="bob@example.com"))
+        self.assertEqual(service.get_user_by_email("bob@example.com")["username"], "bob")
+        service.storage.close()
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.storage.migrate import main, migrate
+from src.storage.storage_json import StorageJSON
+from src.storage.storage_sqlite import StorageSQLite
+
+
+class TestMigrate(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.json_file = os.path.join(self.directory.name, 'data.json')
+        self.database = os.path.join(self.directory.name, 'data.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_migrate_copies_every_category(self):
+        source = StorageJSON(self.json_file, wal=True)
+        source.save_user('1', {'id': '1', 'username': 'ann', 'email': 'ann@x.org', 'status': 'teacher'})
+        source.save_vote('v1', {'id': 'v1', 'group_size': 3})
+        source.save_group('g1', {'id': 'g1', 'vote_id': 'v1', 'users': ['ann']})
+        self.assertEqual(migrate(self.json_file, self.database), {'users': 1, 'votes': 1, 'groups': 1})
+        self.assertEqual(migrate(self.json_file, self.database), {'users': 1, 'votes': 1, 'groups': 1})
+        storage = StorageSQLite(self.database)
+        try:
+            self.assertEqual(storage.get_users(), source.get_users())
+            self.assertEqual(storage.get_votes(), source.get_votes())
+            self.assertEqual(storage.get_groups(), source.get_groups())
+        finally:
+            storage.close()
+
+    def test_invalid_json_is_left_untouched(self):
+        with open(self.json_file, 'w') as f:
+            f.write('{"users": ')
+        with self.assertRaises(json.JSONDecodeError):
+            migrate(self.json_file, self.database)
+        with open(self.json_file) as f:
+            self.assertEqual(f.read(), '{"users": ')
+
+    def test_main_requires_two_paths(self):
+        self.assertEqual(main([self.json_file]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
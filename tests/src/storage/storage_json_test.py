@@ -1,5 +1,8 @@
+import json
 import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
 from src.domain.student import Student
 from src.storage.storage_json import StorageJSON
@@ -52,5 +55,168 @@ class TestStorageJSON(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.storage._write({'users': {'bad_id': NonSerializable()}})
 
+    def test_save_groups_replaces_groups_of_the_same_votes(self):
+        self.storage.save_group('old1', {'id': 'old1', 'vote_id': 'v1', 'users': ['a']})
+        self.storage.save_group('old2', {'id': 'old2', 'vote_id': 'v2', 'users': ['b']})
+        self.storage.save_groups({'new1': {'id': 'new1', 'vote_id': 'v1', 'users': ['a', 'c']}}, ['v1'])
+        self.assertEqual(sorted(self.storage.get_groups()), ['new1', 'old2'])
+
+    def test_reads_are_served_from_the_cache(self):
+        self.storage.save_vote('v1', {'id': 'v1'})
+        with patch('src.storage.storage_json.json.load', wraps=json.load) as load:
+            self.assertIn('v1', self.storage.get_votes())
+            self.assertEqual(self.storage.get_users(), {})
+            load.assert_not_called()
+
+    def test_cache_reloads_after_external_change(self):
+        self.storage.save_vote('v1', {'id': 'v1'})
+        with open(self.test_file, 'w') as f:
+            json.dump({'votes': {'v2': {'id': 'v2'}, 'v3': {'id': 'v3'}}}, f)
+        self.assertEqual(sorted(self.storage.get_votes()), ['v2', 'v3'])
+
+    def test_failed_write_invalidates_the_cache(self):
+        self.storage.save_vote('v1', {'id': 'v1'})
+        with self.assertRaises(TypeError):
+            self.storage._write({'votes': {'bad': object()}})
+        self.assertIsNone(self.storage._document)
+
+    def test_batch_commits_once(self):
+        with patch.object(self.storage, '_replace_file', wraps=self.storage._replace_file) as replace:
+            with self.storage.batch():
+                for i in range(5):
+                    self.storage.save_user(str(i), {'id': str(i)})
+                self.storage.delete_user('0')
+                self.assertEqual(len(self.storage.get_users()), 4)
+                replace.assert_not_called()
+            replace.assert_called_once()
+        with open(self.test_file) as f:
+            self.assertEqual(sorted(json.load(f)['users']), ['1', '2', '3', '4'])
+
+    def test_batch_is_discarded_on_exception(self):
+        self.storage.save_user('kept', {'id': 'kept'})
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                self.storage.save_user('lost', {'id': 'lost'})
+                with self.storage.batch():
+                    self.storage.delete_user('kept')
+                raise RuntimeError()
+        self.assertEqual(list(self.storage.get_users()), ['kept'])
+
+    def test_entry_getters_return_copies(self):
+        self.storage.save_vote('v1', {'id': 'v1', 'preferennces': {'a': {'b': 1}}})
+        self.storage.get_vote_by_id('v1')['preferennces']['a']['b'] = 9
+        self.storage.get_vote_by_id('v1')['preferennces'].clear()
+        self.assertEqual(self.storage.get_vote_by_id('v1')['preferennces'], {'a': {'b': 1}})
+
+    def test_category_getters_return_read_only_views(self):
+        self.storage.save_vote('v1', {'id': 'v1'})
+        votes = self.storage.get_votes()
+        with self.assertRaises(TypeError):
+            votes['v2'] = {'id': 'v2'}
+        self.storage.save_vote('v2', {'id': 'v2'})
+        self.assertEqual(sorted(votes), ['v1', 'v2'])
+
+    def test_indexes_follow_user_changes(self):
+        self.storage.save_user('1', {'id': '1', 'username': 'ann', 'email': 'ann@x.org', 'status': 'student'})
+        self.storage.save_user('2', {'id': '2', 'username': 'bob', 'email': 'bob@x.org', 'status': 'teacher'})
+        self.storage.save_user('1', {'id': '1', 'username': 'anne', 'email': 'anne@x.org', 'status': 'teacher'})
+        self.assertIsNone(self.storage.get_user_by_email('ann@x.org'))
+        self.assertEqual(self.storage.get_user_by_email('anne@x.org')['username'], 'anne')
+        self.assertEqual([u['id'] for u in self.storage.get_users_by_role('teacher')], ['1', '2'])
+        self.assertEqual(self.storage.get_users_by_role('student'), [])
+        self.storage.save_user('1', {'id': '1', 'username': 'anne', 'email': 'anne@x.org', 'status': 'teacher'})
+        self.assertEqual([u['id'] for u in self.storage.get_users_by_role('teacher')], ['1', '2'])
+        self.assertEqual(self.storage.get_user_by_email('anne@x.org')['id'], '1')
+        self.storage.delete_user('2')
+        self.assertEqual([u['id'] for u in self.storage.get_users_by_role('teacher')], ['1'])
+        self.assertIsNone(self.storage.get_user_by_email('bob@x.org'))
+
+    def test_indexes_are_rebuilt_on_load(self):
+        student = Student(username="indexed", email="indexed@example.com", status="student", firstname="In", lastname="Dexed")
+        self.storage.save_user(student.id, student)
+        reloaded = StorageJSON(self.test_file)
+        user, status = reloaded.get_user_by_username('indexed')
+        self.assertEqual((user.id, status), (student.id, 'student'))
+        with self.assertRaises(RuntimeError):
+            with reloaded.batch():
+                reloaded.delete_user(student.id)
+                raise RuntimeError()
+        self.assertEqual(reloaded.get_user_by_email('indexed@example.com')['id'], student.id)
+
+
+class TestStorageJSONWriteAheadLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.test_file = os.path.join(self.directory.name, 'data.json')
+        self.storage = StorageJSON(self.test_file, wal=True)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_changes_are_appended_and_replayed(self):
+        self.storage.save_vote('v1', {'id': 'v1'})
+        self.storage.save_vote('v2', {'id': 'v2'})
+        self.storage.delete_vote('v1')
+        with open(self.test_file) as f:
+            self.assertEqual(json.load(f), {})
+        with open(self.storage.log_filename) as f:
+            self.assertEqual(len(f.readlines()), 3)
+        self.assertEqual(list(StorageJSON(self.test_file, wal=True).get_votes()), ['v2'])
+
+    def test_incomplete_last_line_is_dropped(self):
+        self.storage.save_vote('v1', {'id': 'v1'})
+        with open(self.storage.log_filename, 'a') as f:
+            f.write('{"op": "save", "category": "votes", "id": "v2", "da')
+        reloaded = StorageJSON(self.test_file, wal=True)
+        self.assertEqual(list(reloaded.get_votes()), ['v1'])
+        reloaded.save_vote('v3', {'id': 'v3'})
+        self.assertEqual(sorted(StorageJSON(self.test_file, wal=True).get_votes()), ['v1', 'v3'])
+
+    def test_compaction_writes_a_snapshot_and_empties_the_log(self):
+        with patch.object(StorageJSON, 'COMPACT_EVERY', 3):
+            for i in range(4):
+                self.storage.save_user(str(i), {'id': str(i)})
+        with open(self.test_file) as f:
+            self.assertEqual(sorted(json.load(f)['users']), ['0', '1', '2'])
+        with open(self.storage.log_filename) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(len(StorageJSON(self.test_file, wal=True).get_users()), 4)
+
+    def test_batch_is_one_log_line(self):
+        with self.storage.batch():
+            for i in range(3):
+                self.storage.save_user(str(i), {'id': str(i)})
+        with open(self.storage.log_filename) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(len(StorageJSON(self.test_file, wal=True).get_users()), 3)
+
+    def test_replaying_a_compacted_log_is_harmless(self):
+        self.storage.save_user('1', {'id': '1'})
+        self.storage.delete_user('1')
+        self.storage.save_user('2', {'id': '2'})
+        with open(self.storage.log_filename) as f:
+            log = f.read()
+        self.storage.compact()
+        with open(self.storage.log_filename, 'w') as f:
+            f.write(log)
+        self.assertEqual(list(StorageJSON(self.test_file, wal=True).get_users()), ['2'])
+
+    def test_default_mode_replays_and_compacts_the_log(self):
+        self.storage.save_vote('v1', {'id': 'v1'})
+        plain = StorageJSON(self.test_file)
+        self.assertEqual(list(plain.get_votes()), ['v1'])
+        self.assertFalse(os.path.exists(self.storage.log_filename))
+        with open(self.test_file) as f:
+            self.assertEqual(list(json.load(f)['votes']), ['v1'])
+
+    def test_default_mode_sees_later_log_appends(self):
+        plain = StorageJSON(self.test_file)
+        self.storage.save_vote('v1', {'id': 'v1'})
+        self.assertEqual(list(plain.get_votes()), ['v1'])
+        plain.save_vote('v1', {'id': 'v1', 'title': 'newer'})
+        self.assertFalse(os.path.exists(self.storage.log_filename))
+        self.assertEqual(StorageJSON(self.test_file, wal=True).get_vote_by_id('v1')['title'], 'newer')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from src.domain.student import Student
+from src.storage.storage_sqlite import StorageSQLite
+
+
+class TestStorageSQLite(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'data.db')
+        self.storage = StorageSQLite(self.filename)
+
+    def tearDown(self):
+        self.storage.close()
+        self.directory.cleanup()
+
+    def test_save_and_lookup_users(self):
+        student = Student(username="sqlstudent", email="sql@example.com", status="student", firstname="Sql", lastname="Ite")
+        self.storage.save_user(student.id, student)
+        self.storage.save_user('t1', {'id': 't1', 'username': 'teach', 'email': 't@example.com', 'status': 'teacher'})
+        user, status = self.storage.get_user_by_username('sqlstudent')
+        self.assertEqual((user.id, status), (student.id, 'student'))
+        self.assertEqual(self.storage.get_user_by_username('nobody'), (None, None))
+        self.assertEqual(self.storage.get_user_by_email('t@example.com')['id'], 't1')
+        self.assertEqual([u['id'] for u in self.storage.get_users_by_role('teacher')], ['t1'])
+        self.storage.delete_user(student.id)
+        self.assertEqual(list(self.storage.get_users()), ['t1'])
+
+    def test_updates_keep_insertion_order(self):
+        for vote_id in ('a', 'b', 'c'):
+            self.storage.save_vote(vote_id, {'id': vote_id, 'title': vote_id})
+        self.storage.save_vote('a', {'id': 'a', 'title': 'renamed'})
+        self.assertEqual(list(self.storage.get_votes()), ['a', 'b', 'c'])
+        self.assertEqual(self.storage.get_vote_by_id('a')['title'], 'renamed')
+        self.storage.delete_vote('b')
+        self.assertIsNone(self.storage.get_vote_by_id('b'))
+
+    def test_save_groups_replaces_groups_of_the_same_votes(self):
+        self.storage.save_group('old1', {'id': 'old1', 'vote_id': 'v1', 'users': ['a']})
+        self.storage.save_group('old2', {'id': 'old2', 'vote_id': 'v2', 'users': ['b']})
+        self.storage.save_groups({'new1': {'id': 'new1', 'vote_id': 'v1', 'users': ['a', 'c']}}, ['v1'])
+        self.assertEqual(sorted(self.storage.get_groups()), ['new1', 'old2'])
+        self.assertEqual(self.storage.get_group_by_id('new1')['users'], ['a', 'c'])
+        self.storage.delete_group('old2')
+        self.assertEqual(list(self.storage.get_groups()), ['new1'])
+
+    def test_batch_commits_or_rolls_back(self):
+        with self.storage.batch():
+            self.storage.save_user('1', {'id': '1'})
+            with self.storage.batch():
+                self.storage.save_user('2', {'id': '2'})
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                self.storage.delete_user('1')
+                raise RuntimeError()
+        self.assertEqual(list(self.storage.get_users()), ['1', '2'])
+
+    def test_other_connections_see_committed_changes(self):
+        other = StorageSQLite(self.filename)
+        try:
+            self.storage.save_vote('v1', {'id': 'v1'})
+            self.assertEqual(list(other.get_votes()), ['v1'])
+        finally:
+            other.close()
+
+    def test_import_document(self):
+        counts = self.storage.import_document({
+            'users': {'1': {'id': '1', 'username': 'ann', 'status': 'student'}},
+            'votes': {'v1': {'id': 'v1'}, 'v2': {'id': 'v2'}},
+        })
+        self.assertEqual(counts, {'users': 1, 'votes': 2, 'groups': 0})
+        self.assertEqual([u['username'] for u in self.storage.get_users_by_role('student')], ['ann'])
+
+
+if __name__ == '__main__':
+    unittest.main()